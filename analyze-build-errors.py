@@ -2,17 +2,38 @@
 """
 Script to analyze build errors from failed-builds.json and categorize them.
 
+If the errors directory holds the results.jsonl stream written by check-builds.py,
+the diagnostics are read from it directly; otherwise the error files are parsed.
+Error files compressed by check-builds.py --compress-logs (.gz, .zst) are read
+transparently.
+
+With --store, every diagnostic of the analyzed run is also stored in a SQLite
+database (.check-builds/diagnostics.db), which can be queried across runs.
+
 Usage:
     python analyze-build-errors.py [failed-builds.json] [failed-builds_errors]
+    python analyze-build-errors.py --store              # Also store the run in the database
+    python analyze-build-errors.py --top-codes          # Most frequent codes of the last run
+    python analyze-build-errors.py --first-seen-since 7d --code CS0246
 """
 
 import argparse
+import gzip
+import io
 import json
 import re
+import sqlite3
 import sys
+import time
 from collections import defaultdict, Counter
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Any, Dict, Iterator, List, Tuple, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 # Set UTF-8 encoding for Windows console
 if sys.platform == 'win32':
@@ -21,81 +42,215 @@ if sys.platform == 'win32':
     sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
 
 
-def categorize_error(error_line: str) -> str:
+# Results stream written by check-builds.py into its log directory
+RESULTS_STREAM_NAME = "results.jsonl"
+
+# Suffixes of the logs written by check-builds.py --compress-logs
+COMPRESSED_LOG_SUFFIXES = (".gz", ".zst")
+
+# Diagnostics database, in the state directory of check-builds.py (relative to the repo root)
+DIAGNOSTICS_DB_PATH = Path(".check-builds") / "diagnostics.db"
+
+# MSBuild canonical diagnostic: origin(line,col): error CODE: message [project]
+CANONICAL_DIAGNOSTIC_PATTERN = re.compile(
+    r'^(?P<origin>.*?)'
+    r'(?:\((?P<line>\d+)(?:,(?P<column>\d+))?(?:,\d+,\d+)?\))?'
+    r'\s*:\s*(?P<severity>error|warning)\s+(?P<code>[A-Za-z]+\d+)\s*:\s*'
+    r'(?P<message>.*?)'
+    r'(?:\s+\[(?P<project>[^\[\]]+)\])?\s*$'
+)
+
+# Variable parts of a diagnostic, masked in order to fingerprint its root cause
+FINGERPRINT_MASKS = (
+    (re.compile(r'\b[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}\b'), '<guid>'),
+    (re.compile(r'(?:[A-Za-z]:)?(?:[\\/][^\s\\/\'"\[\]():;,]+){2,}[\\/]?'), '<path>'),
+    (re.compile(r'\'[^\']*\'|"[^"]*"'), '<id>'),
+    (re.compile(r'\bv?\d+(?:\.\d+){1,3}(?:-[0-9A-Za-z.]+)?\b'), '<version>'),
+    (re.compile(r'(?<![A-Za-z])\d+'), '<n>'),
+    (re.compile(r'\s+'), ' '),
+)
+
+DIAGNOSTICS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started TEXT NOT NULL,
+    source TEXT NOT NULL,
+    source_key TEXT NOT NULL UNIQUE,
+    source_state TEXT
+);
+CREATE TABLE IF NOT EXISTS diagnostics (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    issue TEXT NOT NULL,
+    project TEXT NOT NULL,
+    severity TEXT,
+    code TEXT,
+    category TEXT NOT NULL,
+    file TEXT,
+    line INTEGER,
+    col INTEGER,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS diagnostics_code ON diagnostics (code, run_id);
+CREATE INDEX IF NOT EXISTS diagnostics_run ON diagnostics (run_id, issue);
+"""
+
+# Lines containing one of these are treated as error lines
+ERROR_LINE_PATTERN = re.compile(r'error|Error|ERROR')
+
+# Diagnostic codes, all captured in a single scan of a line
+DIAGNOSTIC_CODE_PATTERN = re.compile(
+    r'(?P<nunit>NUnit\d{4})'
+    r'|(?i:error (?P<cs>CS\d{4}))'
+    r'|(?P<nu>\bNU\d{4}\b)'
+    r'|(?P<msb>\bMSB\d{4}\b)'
+)
+
+# Keywords of the text based categories, checked in order
+MISSING_REFERENCE_TERMS = ('could not find', 'missing reference', 'assembly reference', 'nuget package')
+TYPE_NAMESPACE_TERMS = ('does not exist', 'could not be found', 'namespace', 'type')
+SYNTAX_TERMS = ('syntax error', 'unexpected', 'expected')
+FRAMEWORK_TERMS = ('target framework', 'netstandard', 'netcoreapp', 'netframework')
+BUILD_PROJECT_TERMS = ('project file', 'build failed', 'msbuild')
+
+
+@lru_cache(maxsize=8192)
+def classify_error(error_line: str) -> Tuple[str, Optional[str]]:
     """
-    Categorize an error line into a category.
-    Returns the error category.
+    Categorize an error line and extract its diagnostic code.
+    Results are memoized, as MSBuild repeats most error lines.
+    Returns: (error_category, code) where code is a CS/NU/NUnit/MSB code or None
     """
+    codes = {}
+    for match in DIAGNOSTIC_CODE_PATTERN.finditer(error_line):
+        codes.setdefault(match.lastgroup, match.group(match.lastgroup))
+    code = codes.get('nunit') or codes.get('cs') or codes.get('nu') or codes.get('msb')
+    
     error_line_lower = error_line.lower()
     
     # NUnit Analyzer errors
     if 'nunit' in error_line_lower and ('analyzer' in error_line_lower or 'nunit10' in error_line_lower or 'nunit11' in error_line_lower):
-        # Extract error code if present
-        match = re.search(r'(NUnit\d{4})', error_line)
-        if match:
-            return f"NUnit Analyzer ({match.group(1)})"
-        return "NUnit Analyzer"
+        if 'nunit' in codes:
+            return f"NUnit Analyzer ({codes['nunit']})", code
+        return "NUnit Analyzer", code
     
     # C# compiler errors (CS####)
-    if re.search(r'error CS\d{4}', error_line, re.IGNORECASE):
-        match = re.search(r'error (CS\d{4})', error_line, re.IGNORECASE)
-        if match:
-            return f"C# Compiler ({match.group(1)})"
-        return "C# Compiler"
+    if 'cs' in codes:
+        return f"C# Compiler ({codes['cs']})", code
     
     # Missing reference/assembly errors
-    if any(term in error_line_lower for term in ['could not find', 'missing reference', 'assembly reference', 'nuget package']):
-        return "Missing Reference"
+    if any(term in error_line_lower for term in MISSING_REFERENCE_TERMS):
+        return "Missing Reference", code
     
     # Type/namespace errors
-    if any(term in error_line_lower for term in ['does not exist', 'could not be found', 'namespace', 'type']):
+    if any(term in error_line_lower for term in TYPE_NAMESPACE_TERMS):
         if 'namespace' in error_line_lower or 'type' in error_line_lower:
-            return "Type/Namespace Not Found"
+            return "Type/Namespace Not Found", code
     
     # Syntax errors
-    if any(term in error_line_lower for term in ['syntax error', 'unexpected', 'expected']):
-        return "Syntax Error"
+    if any(term in error_line_lower for term in SYNTAX_TERMS):
+        return "Syntax Error", code
     
     # Version/target framework errors
-    if any(term in error_line_lower for term in ['target framework', 'netstandard', 'netcoreapp', 'netframework']):
-        return "Framework/Target Error"
+    if any(term in error_line_lower for term in FRAMEWORK_TERMS):
+        return "Framework/Target Error", code
     
     # Build/project errors
-    if any(term in error_line_lower for term in ['project file', 'build failed', 'msbuild']):
-        return "Build/Project Error"
+    if any(term in error_line_lower for term in BUILD_PROJECT_TERMS):
+        return "Build/Project Error", code
     
     # Generic error patterns
     if 'error' in error_line_lower:
-        return "Other Error"
+        return "Other Error", code
     
-    return "Unknown"
+    return "Unknown", code
+
+
+def categorize_error(error_line: str) -> str:
+    """
+    Categorize an error line into a category.
+    Returns the error category.
+    """
+    return classify_error(error_line)[0]
+
+
+def find_log_file(log_file: Path) -> Path:
+    """Return the log file as named, or its compressed version (.gz, .zst) when only that exists."""
+    if log_file.exists():
+        return log_file
+    for suffix in COMPRESSED_LOG_SUFFIXES:
+        compressed = log_file.with_name(log_file.name + suffix)
+        if compressed.exists():
+            return compressed
+    return log_file
+
+
+def open_log_file(log_file: Path):
+    """Open a log file for binary streaming reads, decompressing .gz and .zst files on the fly."""
+    if log_file.suffix == ".gz":
+        return gzip.open(log_file, 'rb')
+    if log_file.suffix == ".zst":
+        if zstandard is None:
+            raise OSError(f"reading {log_file.name} needs the zstandard module (pip install zstandard)")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(log_file, 'rb')))
+    return open(log_file, 'rb')
+
+
+def iter_error_lines(error_file: Path) -> Iterator[str]:
+    """
+    Stream the error lines of a file, compressed or not, without loading it into memory.
+    Yields each stripped line that contains "error", "Error" or "ERROR".
+    """
+    # Binary iteration splits on '\n' only, so lines ended by a bare '\r' (CR-only logs,
+    # progress output) are split here, as universal newlines would
+    with open_log_file(error_file) as f:
+        for raw_line in f:
+            text = raw_line.decode('utf-8', errors='ignore')
+            if not ERROR_LINE_PATTERN.search(text):
+                continue
+            for line in text.split('\r'):
+                if ERROR_LINE_PATTERN.search(line):
+                    line = line.strip()
+                    if line:
+                        yield line
+
+
+def iter_build_errors(error_file: Path) -> Iterator[str]:
+    """
+    Stream the errors of a build log: its canonical error diagnostics, once each
+    (MSBuild repeats them in its final recap), read from the errors-only log
+    check-builds.py keeps next to it when there is one.
+    Falls back to every line containing "error" when no canonical error is found.
+    """
+    suffix = error_file.suffix if error_file.suffix in COMPRESSED_LOG_SUFFIXES else ""
+    errors_log = (error_file.with_suffix("") if suffix else error_file).with_suffix(".errors.log" + suffix)
+    seen = set()
+    for line in iter_error_lines(errors_log if errors_log.exists() else error_file):
+        parsed = parse_diagnostic(line)
+        if parsed and parsed[1] == 'error' and line not in seen:
+            seen.add(line)
+            yield line
+    if not seen:
+        yield from iter_error_lines(error_file)
 
 
 def extract_errors_from_file(error_file: Path, max_errors: int = 5) -> List[Tuple[str, str]]:
     """
-    Extract error lines from an error file.
+    Extract the errors of an error file (see iter_build_errors()).
+    Reading stops as soon as max_errors errors have been found.
     Returns list of (error_category, error_line) tuples.
     """
     errors = []
     
+    error_file = find_log_file(error_file)
     if not error_file.exists():
         return errors
     
     try:
-        with open(error_file, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-            
-        # Look for error lines - typically start with file path and contain "error"
-        # Pattern: path(line,col): error ...
-        error_pattern = r'[^\n]*(?:error|Error|ERROR)[^\n]*'
-        error_lines = re.findall(error_pattern, content)
-        
-        # Limit to max_errors
-        for error_line in error_lines[:max_errors]:
-            error_line = error_line.strip()
-            if error_line and 'error' in error_line.lower():
-                category = categorize_error(error_line)
-                errors.append((category, error_line))
+        for error_line in iter_build_errors(error_file):
+            if len(errors) >= max_errors:
+                break
+            errors.append((categorize_error(error_line), error_line))
     
     except Exception as e:
         errors.append(("File Read Error", f"Could not read file: {e}"))
@@ -103,9 +258,94 @@ def extract_errors_from_file(error_file: Path, max_errors: int = 5) -> List[Tupl
     return errors
 
 
-def analyze_errors(json_file: Path, errors_dir: Path) -> Dict:
+@lru_cache(maxsize=8192)
+def parse_diagnostic(error_line: str) -> Optional[Tuple[str, str, str, Optional[int], Optional[int], str, Optional[str]]]:
     """
-    Analyze all error files and return categorized results.
+    Parse a line in the MSBuild canonical diagnostic format.
+    Returns: (origin, severity, code, line, column, message, project), or None for any other line
+    """
+    match = CANONICAL_DIAGNOSTIC_PATTERN.match(error_line)
+    if not match:
+        return None
+    return (match.group('origin').strip(), match.group('severity'), match.group('code'),
+            int(match.group('line')) if match.group('line') else None,
+            int(match.group('column')) if match.group('column') else None,
+            match.group('message'), match.group('project'))
+
+
+@lru_cache(maxsize=8192)
+def fingerprint_error(error_line: str) -> str:
+    """
+    Reduce an error line to the fingerprint of its root cause: its code and message
+    with paths, GUIDs, quoted identifiers, versions and numbers masked.
+    The origin and project of canonical diagnostics are dropped altogether.
+    """
+    parsed = parse_diagnostic(error_line)
+    text = parsed[5] if parsed else error_line
+    for pattern, mask in FINGERPRINT_MASKS:
+        text = pattern.sub(mask, text)
+    return f"{parsed[2]}: {text.strip()}" if parsed else text.strip()
+
+
+def cluster_errors(issue_stats: List[Dict]) -> List[Dict]:
+    """
+    Group the errors of all failed builds by fingerprint, in a single pass.
+    Returns: Clusters with fingerprint, category, count, member issues and an example
+             line, largest (by issues, then errors) first
+    """
+    clusters = {}
+    for issue_data in issue_stats:
+        for category, error_line in issue_data['errors']:
+            fingerprint = fingerprint_error(error_line)
+            cluster = clusters.get(fingerprint)
+            if cluster is None:
+                cluster = clusters[fingerprint] = {
+                    'fingerprint': fingerprint,
+                    'category': category,
+                    'count': 0,
+                    'issues': set(),
+                    'example': error_line
+                }
+            cluster['count'] += 1
+            cluster['issues'].add(issue_data['issue'])
+    return sorted(clusters.values(), key=lambda c: (-len(c['issues']), -c['count'], c['fingerprint']))
+
+
+def load_results_stream(results_file: Path) -> List[Dict]:
+    """
+    Load the records of a check-builds.py results stream.
+    A sweep may still be appending to it, so an incomplete last line is ignored.
+    Returns: List of build records
+    """
+    records = []
+    with open(results_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+    return records
+
+
+def failed_builds_from_stream(results_file: Path, max_errors: int = 5) -> List[Tuple[str, str, List[Tuple[str, str]]]]:
+    """
+    Collect the failed builds and their already extracted errors from a results stream.
+    Returns: List of (issue, project, errors) tuples
+    """
+    failed_builds = []
+    for record in load_results_stream(results_file):
+        # Skip the run and issue records, which carry no project
+        if 'project' not in record or record.get('success'):
+            continue
+        errors = [(categorize_error(line), line) for line in record.get('errors', [])[:max_errors]]
+        failed_builds.append((record.get('issue', ''), record.get('project', ''), errors))
+    return failed_builds
+
+
+def failed_builds_from_files(json_file: Path, errors_dir: Path, max_errors: int = 5) -> List[Tuple[str, str, List[Tuple[str, str]]]]:
+    """
+    Collect the failed builds listed in a JSON file and parse their error files.
+    Returns: List of (issue, project, errors) tuples
     """
     # Load JSON file
     try:
@@ -115,12 +355,7 @@ def analyze_errors(json_file: Path, errors_dir: Path) -> Dict:
         print(f"Error loading JSON file: {e}", file=sys.stderr)
         sys.exit(1)
     
-    # Statistics
-    issue_stats = []
-    category_counter = Counter()
-    total_errors = 0
-    
-    # Process each failed build
+    failed_builds = []
     for item in data.get('failed_builds', []):
         issue_name = item.get('issue', '')
         project_path = item.get('project', '')
@@ -133,8 +368,29 @@ def analyze_errors(json_file: Path, errors_dir: Path) -> Dict:
         error_file = errors_dir / f"{issue_name}_{safe_project_name}_error.txt"
         
         # Extract errors
-        errors = extract_errors_from_file(error_file, max_errors=5)
-        
+        failed_builds.append((issue_name, project_path, extract_errors_from_file(error_file, max_errors)))
+    return failed_builds
+
+
+def analyze_errors(json_file: Path, errors_dir: Path, max_errors: int = 5) -> Dict:
+    """
+    Analyze the first max_errors errors of the failed builds, from the results stream
+    when check-builds.py wrote one and from the error files otherwise, and return
+    categorized and clustered results.
+    """
+    results_file = errors_dir / RESULTS_STREAM_NAME
+    if results_file.exists():
+        failed_builds = failed_builds_from_stream(results_file, max_errors=max_errors)
+    else:
+        failed_builds = failed_builds_from_files(json_file, errors_dir, max_errors=max_errors)
+    
+    # Statistics
+    issue_stats = []
+    category_counter = Counter()
+    total_errors = 0
+    
+    # Process each failed build
+    for issue_name, project_path, errors in failed_builds:
         if errors:
             # Count errors by category for this issue
             issue_categories = Counter([cat for cat, _ in errors])
@@ -144,7 +400,7 @@ def analyze_errors(json_file: Path, errors_dir: Path) -> Dict:
                 'project': project_path,
                 'error_count': len(errors),
                 'categories': dict(issue_categories),
-                'errors': errors[:5]  # Keep first 5 for display
+                'errors': errors
             })
             
             # Update global category counter
@@ -164,15 +420,231 @@ def analyze_errors(json_file: Path, errors_dir: Path) -> Dict:
     
     return {
         'issues': issue_stats,
+        'clusters': cluster_errors(issue_stats),
         'category_summary': dict(category_counter),
         'total_errors': total_errors,
         'total_issues': len(issue_stats)
     }
 
 
-def print_summary_table(results: Dict):
+def collect_run_diagnostics(json_file: Path, errors_dir: Path) -> List[Tuple[str, str, List[str]]]:
+    """
+    Collect every error line of every failed build, from the full build logs
+    when they are available rather than from the first few kept for the report.
+    Returns: List of (issue, project, error lines) tuples
+    """
+    builds = []
+    results_file = errors_dir / RESULTS_STREAM_NAME
+    if results_file.exists():
+        for record in load_results_stream(results_file):
+            if 'project' not in record or record.get('success'):
+                continue
+            log = Path(record['log']) if record.get('log') else None
+            if log is not None and not log.exists():
+                log = errors_dir / log.name
+            lines = list(iter_build_errors(log)) if log is not None and log.exists() else record.get('errors', [])
+            builds.append((record.get('issue', ''), record.get('project', ''), lines))
+        return builds
+    
+    for issue_name, project_path, _ in failed_builds_from_files(json_file, errors_dir, max_errors=0):
+        safe_project_name = project_path.replace('\\', '_').replace('/', '_').replace(':', '_')
+        error_file = find_log_file(errors_dir / f"{issue_name}_{safe_project_name}_error.txt")
+        builds.append((issue_name, project_path, list(iter_build_errors(error_file)) if error_file.exists() else []))
+    return builds
+
+
+def open_diagnostics_db(db_path: Path) -> sqlite3.Connection:
+    """
+    Open the diagnostics database for writing, creating its tables and, where SQLite
+    has FTS5, the full-text index of the messages.
+    """
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(DIAGNOSTICS_SCHEMA)
+    if 'source_state' not in {row[1] for row in conn.execute("PRAGMA table_info(runs)")}:
+        conn.execute("ALTER TABLE runs ADD COLUMN source_state TEXT")
+    try:
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS diagnostics_fts "
+                     "USING fts5(message, content='diagnostics', content_rowid='id')")
+    except sqlite3.OperationalError:
+        pass  # No FTS5 in this SQLite build, searches fall back to LIKE
+    return conn
+
+
+def open_diagnostics_db_readonly(db_path: Path) -> sqlite3.Connection:
     """
-    Print a formatted summary table of errors.
+    Open an existing diagnostics database for queries, read-only: neither the
+    database nor its tables are created.
+    Raises: sqlite3.OperationalError if the database cannot be opened
+    """
+    return sqlite3.connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True)
+
+
+def has_fts(conn: sqlite3.Connection) -> bool:
+    """Check whether the database has the full-text index of the messages."""
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'diagnostics_fts'").fetchone() is not None
+
+
+def read_run_record(results_file: Path) -> Optional[Dict]:
+    """Returns: The run record at the start of a results stream, or None if there is none"""
+    try:
+        with open(results_file, 'r', encoding='utf-8') as f:
+            record = json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+    return record.get("run") if isinstance(record, dict) else None
+
+
+def ingest_run(conn: sqlite3.Connection, json_file: Path, errors_dir: Path) -> Tuple[int, bool]:
+    """
+    Store every diagnostic of the failed builds in errors_dir as a run.
+    A run is identified by the id in the run record of its results stream or,
+    for older runs, by its source files. Analyzing an unchanged run again adds
+    nothing. A run analyzed while its sweep was still going is replaced by
+    its later state, so it is stored only once.
+    Returns: (run id, whether it was added or updated now)
+    """
+    results_file = errors_dir / RESULTS_STREAM_NAME
+    sources = [path for path in (results_file, json_file) if path.exists()]
+    if not results_file.exists():
+        for suffix in ("", *COMPRESSED_LOG_SUFFIXES):
+            sources.extend(errors_dir.glob(f"*_error.txt{suffix}"))
+    latest = max((path.stat().st_mtime for path in sources), default=time.time())
+    source_state = "|".join(
+        f"{path.name}:{path.stat().st_mtime_ns}:{path.stat().st_size}" for path in sorted(sources))
+    run = read_run_record(results_file) if results_file.exists() else None
+    if run and run.get("id"):
+        source_key = f"run:{run['id']}"
+        started = run.get("started") or time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(latest))
+    else:
+        source_key = f"{errors_dir.resolve()}|{source_state}"
+        started = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(latest))
+    
+    row = conn.execute("SELECT id, source_state FROM runs WHERE source_key = ?", (source_key,)).fetchone()
+    if row and row[1] in (source_state, None):
+        return row[0], False
+    
+    with conn:
+        if row:
+            run_id = row[0]
+            if has_fts(conn):
+                conn.execute("INSERT INTO diagnostics_fts (diagnostics_fts, rowid, message) "
+                             "SELECT 'delete', id, message FROM diagnostics WHERE run_id = ?", (run_id,))
+            conn.execute("DELETE FROM diagnostics WHERE run_id = ?", (run_id,))
+            conn.execute("UPDATE runs SET started = ?, source = ?, source_state = ? WHERE id = ?",
+                         (started, str(errors_dir.resolve()), source_state, run_id))
+        else:
+            run_id = conn.execute(
+                "INSERT INTO runs (started, source, source_key, source_state) VALUES (?, ?, ?, ?)",
+                (started, str(errors_dir.resolve()), source_key, source_state)
+            ).lastrowid
+        rows = []
+        for issue_name, project_path, lines in collect_run_diagnostics(json_file, errors_dir):
+            for error_line in lines:
+                category, code = classify_error(error_line)
+                parsed = parse_diagnostic(error_line)
+                if parsed:
+                    origin, severity, code, line, column, message, _ = parsed
+                    rows.append((run_id, issue_name, project_path, severity, code, category,
+                                 origin, line, column, message))
+                else:
+                    rows.append((run_id, issue_name, project_path, None, code, category,
+                                 None, None, None, error_line))
+        conn.executemany(
+            "INSERT INTO diagnostics (run_id, issue, project, severity, code, category, file, line, col, message) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        if has_fts(conn):
+            conn.execute("INSERT INTO diagnostics_fts (rowid, message) "
+                         "SELECT id, message FROM diagnostics WHERE run_id = ?", (run_id,))
+    return run_id, True
+
+
+def parse_since(value: str) -> str:
+    """Turn a --first-seen-since value (7d, 12h or an ISO date) into a UTC timestamp like runs.started."""
+    match = re.fullmatch(r'(\d+)([dh])', value)
+    if match:
+        seconds = int(match.group(1)) * (86400 if match.group(2) == 'd' else 3600)
+        return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() - seconds))
+    return value if 'T' in value else f"{value}T00:00:00Z"
+
+
+def run_query(conn: sqlite3.Connection, title: str, headers: List[str], sql: str, params: Tuple[Any, ...] = ()):
+    """Run a query against the diagnostics database and print its rows as a table."""
+    started = time.perf_counter()
+    rows = conn.execute(sql, params).fetchall()
+    elapsed = (time.perf_counter() - started) * 1000
+    
+    print("=" * 100)
+    print(title)
+    print("=" * 100)
+    widths = [max([len(header)] + [len(str(row[i])) for row in rows]) for i, header in enumerate(headers)]
+    widths[-1] = len(headers[-1])
+    print("  ".join(f"{header:<{width}}" for header, width in zip(headers, widths)))
+    print("-" * 100)
+    for row in rows:
+        print("  ".join(f"{str(value):<{width}}" for value, width in zip(row, widths)))
+    print(f"\n({len(rows)} rows in {elapsed:.1f} ms)\n")
+
+
+def query_diagnostics(conn: sqlite3.Connection, args: argparse.Namespace):
+    """Answer the query options of the command line from the diagnostics database."""
+    if args.runs:
+        run_query(conn, "RUNS", ["Run", "Started", "Diagnostics", "Issues", "Source"],
+                  "SELECT r.id, r.started, COUNT(d.id), COUNT(DISTINCT d.issue), r.source "
+                  "FROM runs r LEFT JOIN diagnostics d ON d.run_id = r.id GROUP BY r.id ORDER BY r.id")
+    
+    if args.top_codes:
+        run_id = args.run or (conn.execute("SELECT MAX(id) FROM runs").fetchone()[0] or 0)
+        run_query(conn, f"TOP CODES (run {run_id})", ["Code", "Diagnostics", "Issues"],
+                  "SELECT code, COUNT(*) AS n, COUNT(DISTINCT issue) FROM diagnostics "
+                  "WHERE run_id = ? AND code IS NOT NULL GROUP BY code ORDER BY n DESC, code LIMIT ?",
+                  (run_id, args.top_codes))
+    
+    if args.first_seen_since:
+        since = parse_since(args.first_seen_since)
+        code_filter = "AND d.code = ? " if args.code else ""
+        params = (args.code,) if args.code else ()
+        run_query(conn, f"ISSUES FAILING{' WITH ' + args.code if args.code else ''} FOR THE FIRST TIME SINCE {since}",
+                  ["Issue", "First seen", "Diagnostics"],
+                  f"SELECT d.issue, MIN(r.started) AS first_seen, COUNT(*) FROM diagnostics d "
+                  f"JOIN runs r ON r.id = d.run_id WHERE 1 = 1 {code_filter}"
+                  f"GROUP BY d.issue HAVING first_seen >= ? ORDER BY first_seen, d.issue",
+                  params + (since,))
+    
+    if args.search:
+        if has_fts(conn):
+            sql = ("SELECT d.run_id, d.issue, d.code, d.message FROM diagnostics_fts f "
+                   "JOIN diagnostics d ON d.id = f.rowid WHERE diagnostics_fts MATCH ? "
+                   "ORDER BY d.run_id DESC, d.issue LIMIT 100")
+            params = (args.search,)
+        else:
+            sql = ("SELECT run_id, issue, code, message FROM diagnostics WHERE message LIKE ? "
+                   "ORDER BY run_id DESC, issue LIMIT 100")
+            params = (f"%{args.search}%",)
+        run_query(conn, f"DIAGNOSTICS MATCHING '{args.search}'", ["Run", "Issue", "Code", "Message"], sql, params)
+
+
+def print_cluster_report(clusters: List[Dict]):
+    """
+    Print the error clusters, one root cause each, with their member issues.
+    """
+    print("\n" + "-" * 100)
+    print(f"ROOT CAUSE CLUSTERS ({len(clusters)})")
+    print("-" * 100)
+    
+    for number, cluster in enumerate(clusters, 1):
+        issues = sorted(cluster['issues'])
+        print(f"\n#{number} [{cluster['category']}] {cluster['count']} error(s) in {len(issues)} issue(s)")
+        print(f"  Fingerprint: {cluster['fingerprint'][:120]}")
+        print(f"  Issues: {', '.join(issues)}")
+        example = cluster['example']
+        print(f"  Example: {example[:120] + '...' if len(example) > 120 else example}")
+
+
+def print_summary_table(results: Dict, breakdown: bool = True):
+    """
+    Print a formatted summary table of errors, their clusters and, if breakdown
+    is set, the errors of every issue.
     """
     print("=" * 100)
     print("BUILD ERROR ANALYSIS SUMMARY")
@@ -190,6 +662,11 @@ def print_summary_table(results: Dict):
     for category, count in sorted(results['category_summary'].items(), key=lambda x: x[1], reverse=True):
         print(f"{category:<40} {count:<10}")
     
+    print_cluster_report(results['clusters'])
+    
+    if not breakdown:
+        return
+    
     # Detailed issue breakdown
     print("\n" + "=" * 100)
     print("ISSUE-BY-ISSUE BREAKDOWN")
@@ -233,6 +710,12 @@ def main():
 Examples:
   python analyze-build-errors.py
   python analyze-build-errors.py failed-builds.json failed-builds_errors
+  python analyze-build-errors.py --clusters-only --max-errors 50
+  python analyze-build-errors.py --store
+  python analyze-build-errors.py --runs
+  python analyze-build-errors.py --top-codes 20 --run 3
+  python analyze-build-errors.py --first-seen-since 7d --code CS0246
+  python analyze-build-errors.py --search "NUnit.Framework"
         """
     )
     parser.add_argument(
@@ -249,9 +732,87 @@ Examples:
         default='failed-builds_errors',
         help='Directory containing error files (default: failed-builds_errors)'
     )
+    parser.add_argument(
+        '--max-errors',
+        type=int,
+        default=5,
+        metavar='N',
+        help='Errors analyzed per failed build (default: 5)'
+    )
+    parser.add_argument(
+        '--clusters-only',
+        action='store_true',
+        help='Print the summary and the root cause clusters, without the issue-by-issue breakdown'
+    )
+    parser.add_argument(
+        '--db',
+        type=str,
+        default=str(DIAGNOSTICS_DB_PATH),
+        help=f'SQLite database of the diagnostics of all analyzed runs (default: {DIAGNOSTICS_DB_PATH})'
+    )
+    parser.add_argument(
+        '--store',
+        action='store_true',
+        help='Also add the analyzed run to the database'
+    )
+    parser.add_argument(
+        '--runs',
+        action='store_true',
+        help='List the stored runs'
+    )
+    parser.add_argument(
+        '--top-codes',
+        type=int,
+        nargs='?',
+        const=10,
+        metavar='N',
+        help='Show the N most frequent diagnostic codes of a stored run (default: 10)'
+    )
+    parser.add_argument(
+        '--run',
+        type=int,
+        help='Run queried by --top-codes (default: the latest)'
+    )
+    parser.add_argument(
+        '--first-seen-since',
+        type=str,
+        metavar='WHEN',
+        help='Show the issues whose first stored failure is after WHEN (7d, 12h or YYYY-MM-DD)'
+    )
+    parser.add_argument(
+        '--code',
+        type=str,
+        help='Restrict --first-seen-since to one diagnostic code (e.g. CS0246)'
+    )
+    parser.add_argument(
+        '--search',
+        type=str,
+        metavar='TEXT',
+        help='Full-text search of the stored diagnostic messages'
+    )
     args = parser.parse_args()
     
     repo_root = Path(__file__).parent
+    db_path = Path(args.db)
+    if not db_path.is_absolute():
+        db_path = repo_root / db_path
+    
+    # Queries only read the database
+    if args.runs or args.top_codes or args.first_seen_since or args.search:
+        if not db_path.is_file():
+            print(f"Error: no diagnostics stored in {db_path}", file=sys.stderr)
+            print("Hint: analyze a run with --store first.", file=sys.stderr)
+            sys.exit(1)
+        try:
+            conn = open_diagnostics_db_readonly(db_path)
+        except sqlite3.OperationalError as e:
+            print(f"Error: cannot open {db_path}: {e}", file=sys.stderr)
+            sys.exit(1)
+        try:
+            query_diagnostics(conn, args)
+        finally:
+            conn.close()
+        return
     
     # Resolve paths
     json_file = Path(args.json_file)
@@ -262,24 +823,36 @@ Examples:
     if not errors_dir.is_absolute():
         errors_dir = repo_root / errors_dir
     
-    if not json_file.exists():
-        print(f"Error: JSON file not found: {json_file}", file=sys.stderr)
-        sys.exit(1)
-    
     if not errors_dir.exists():
         print(f"Error: Errors directory not found: {errors_dir}", file=sys.stderr)
         print(f"Hint: Run 'python check-builds.py {args.json_file}' first to generate error files.", file=sys.stderr)
         sys.exit(1)
     
-    # Analyze errors
-    print(f"Analyzing errors from: {json_file}")
-    print(f"Reading error files from: {errors_dir}")
+    results_file = errors_dir / RESULTS_STREAM_NAME
+    if results_file.exists():
+        print(f"Reading build results from: {results_file}")
+    else:
+        if not json_file.exists():
+            print(f"Error: JSON file not found: {json_file}", file=sys.stderr)
+            sys.exit(1)
+        
+        # Analyze errors
+        print(f"Analyzing errors from: {json_file}")
+        print(f"Reading error files from: {errors_dir}")
     print()
     
-    results = analyze_errors(json_file, errors_dir)
+    results = analyze_errors(json_file, errors_dir, args.max_errors)
     
     # Print summary
-    print_summary_table(results)
+    print_summary_table(results, breakdown=not args.clusters_only)
+    
+    if args.store:
+        conn = open_diagnostics_db(db_path)
+        try:
+            run_id, added = ingest_run(conn, json_file, errors_dir)
+        finally:
+            conn.close()
+        print(f"\nDiagnostics {'stored as' if added else 'already stored as'} run {run_id} in: {db_path}")
 
 
 if __name__ == "__main__":
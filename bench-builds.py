@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks of check-builds.py and analyze-build-errors.py.
+
+Generates synthetic issue repositories of N Issue* directories (nested solutions and
+projects, ignore markers, bin/obj noise, issue_results.json and failed build logs
+recorded from the real issue_results.json files), then times discovery, scheduling
+and error analysis on them. A stub dotnet (sleeps, replays recorded MSBuild output,
+fails on demand) lets --end-to-end run check-builds.py itself without an SDK.
+
+Each benchmark keeps the median of its repeats, next to the median of a fixed
+calibration loop run in the same process, and is compared to a local baseline
+(.check-builds/bench-baseline.json, written by --save-baseline) relative to that
+calibration, so that a slower or busier machine does not read as a regression.
+The run fails when one regresses; without a baseline the timings are only printed.
+
+Usage:
+    python bench-builds.py                          # 100, 1,000 and 10,000 issues vs. the baseline
+    python bench-builds.py --sizes 100,1000         # Smaller sizes only
+    python bench-builds.py --save-baseline          # Store the timings as the local baseline
+    python bench-builds.py --end-to-end --sizes 100 # Also run check-builds.py against the stub dotnet
+    python bench-builds.py --generate 500 /tmp/repo # Only generate a synthetic repository
+"""
+
+import argparse
+import glob
+import importlib.util
+import json
+import os
+import random
+import shutil
+import stat
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+DEFAULT_SIZES = "100,1000,10000"
+
+# Baseline timings, local to the machine that saved them (timings do not carry across machines)
+BASELINE_PATH = Path(".check-builds") / "bench-baseline.json"
+
+# Timing of the calibration loop, stored with the benchmarks of each size
+CALIBRATION_NAME = "calibration"
+CALIBRATION_ITERATIONS = 200_000
+
+# A benchmark regresses when slower than its baseline by more than the tolerance once both
+# are scaled by their calibration, and by more than the noise floor (timings of a few ms are
+# too noisy to compare)
+DEFAULT_TOLERANCE = 0.25
+NOISE_FLOOR_SECONDS = 0.005
+
+# Share of the synthetic issues with each layout, and of the projects that fail to build
+LAYOUT_WEIGHTS = {"csproj": 45, "sln": 30, "nested_sln": 10, "multi_sln": 5,
+                  "marker": 5, "no_project": 3, "classic": 2}
+FAILURE_RATE = 0.2
+
+# bin/obj files generated per project, which discovery has to prune
+NOISE_FILES = ("bin/Debug/net8.0/{name}.dll", "bin/Debug/net8.0/{name}.pdb", "bin/Debug/net8.0/nunit.framework.dll",
+               "bin/Debug/net8.0/{name}.deps.json", "obj/project.assets.json", "obj/{name}.csproj.nuget.g.props",
+               "obj/Debug/net8.0/{name}.AssemblyInfo.cs", "obj/Debug/net8.0/{name}.dll")
+
+# Used when the repository has no recorded failed build output to replay
+FALLBACK_BUILD_OUTPUTS = (
+    "{project}(3,7): error CS0246: The type or namespace name 'NUnit' could not be found "
+    "(are you missing a using directive or an assembly reference?) [{project}]\n"
+    "\nBuild FAILED.\n\n    0 Warning(s)\n    1 Error(s)\n\nTime Elapsed 00:00:02.31\n",
+    "{project} : error NU1101: Unable to find package NUnit.Foo. No packages exist with this id "
+    "in source(s): nuget.org [{project}]\n\nBuild FAILED.\n\n    0 Warning(s)\n    1 Error(s)\n\n"
+    "Time Elapsed 00:00:01.07\n",
+)
+
+SUCCESS_OUTPUT = ("  Determining projects to restore...\n  All projects are up-to-date for restore.\n"
+                  "  {name} -> {project_dir}/bin/Debug/net8.0/{name}.dll\n\nBuild succeeded.\n"
+                  "    0 Warning(s)\n    0 Error(s)\n\nTime Elapsed 00:00:{seconds:05.2f}\n")
+
+# Stub dotnet put first on PATH by --end-to-end: sleeps STUB_DOTNET_SLEEP seconds, then
+# replays the .stub-build.log next to the project and fails, or fails when the project
+# matches the STUB_DOTNET_FAIL regex, or succeeds
+STUB_DOTNET = '''#!{python}
+import os, re, sys, time
+args = sys.argv[1:]
+if args[:1] == ["--version"]:
+    print("8.0.100")
+    sys.exit(0)
+project = args[1] if len(args) > 1 else ""
+time.sleep(float(os.environ.get("STUB_DOTNET_SLEEP", "0")))
+recorded = os.path.join(os.path.dirname(project), ".stub-build.log")
+fail_pattern = os.environ.get("STUB_DOTNET_FAIL")
+if os.path.exists(recorded):
+    with open(recorded, encoding="utf-8") as f:
+        output = f.read()
+elif fail_pattern and re.search(fail_pattern, project):
+    output = project + " : error MSB4000: Failed on demand by STUB_DOTNET_FAIL [" + project + "]\\n"
+else:
+    print("Build succeeded.")
+    sys.exit(0)
+sys.stdout.write(output)
+for arg in args:
+    match = re.match(r"-flp1:logfile=(.*);errorsonly$", arg)
+    if match:
+        with open(match.group(1), "w", encoding="utf-8") as f:
+            f.writelines(line + "\\n" for line in output.splitlines() if ": error " in line)
+sys.exit(1)
+'''
+
+
+def load_script(repo_root: Path, file_name: str):
+    """Import one of the hyphenated scripts of the repository as a module."""
+    spec = importlib.util.spec_from_file_location(file_name[:-3].replace('-', '_'), repo_root / file_name)
+    module = importlib.util.module_from_spec(spec)
+    # The scripts rewrap the console streams on Windows, which must happen only once
+    streams = sys.stdout, sys.stderr
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        sys.stdout, sys.stderr = streams
+    return module
+
+
+def load_recorded_outputs(repo_root: Path) -> List[str]:
+    """
+    Collect the failed build outputs recorded in the issue_results.json files,
+    with the original project path replaced by a {project} placeholder.
+    Returns: Build outputs to replay, or the built-in ones if none is recorded
+    """
+    outputs = []
+    for results_file in sorted(glob.glob(str(repo_root / "Issue*" / "issue_results.json"))):
+        try:
+            with open(results_file, 'r', encoding='utf-8-sig') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for entry in entries if isinstance(entries, list) else []:
+            output = entry.get("build_output") or ""
+            if entry.get("build_result") != "Failed" or ": error " not in output:
+                continue
+            output = output.replace('\r\n', '\n')
+            # Replace the absolute path of the original project with a placeholder
+            for line in output.splitlines():
+                if ": error " in line:
+                    origin = line.split(": error ", 1)[0]
+                    project = origin.split('(', 1)[0].strip()
+                    if project.endswith(("proj", ".sln")):
+                        output = output.replace(project, "{project}")
+                    break
+            outputs.append(output.replace('{', '{{').replace('}', '}}').replace('{{project}}', '{project}'))
+    return outputs or list(FALLBACK_BUILD_OUTPUTS)
+
+
+def write_file(path: Path, content: str = ""):
+    """Write a text file, creating its parent directories."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding='utf-8')
+
+
+def write_project(project_file: Path, framework: str, classic: bool = False):
+    """Write an SDK-style (or classic) test project and its bin/obj noise."""
+    name = project_file.stem
+    if classic:
+        content = ('<Project ToolsVersion="15.0">\n  <PropertyGroup>\n'
+                   '    <TargetFrameworkVersion>v4.7.2</TargetFrameworkVersion>\n'
+                   '    <OutputPath>bin\\Debug\\</OutputPath>\n  </PropertyGroup>\n</Project>\n')
+    else:
+        content = ('<Project Sdk="Microsoft.NET.Sdk">\n  <PropertyGroup>\n'
+                   f'    <TargetFrameworks>{framework}</TargetFrameworks>\n  </PropertyGroup>\n'
+                   '  <ItemGroup>\n    <PackageReference Include="NUnit" Version="4.3.2" />\n'
+                   '    <PackageReference Include="NUnit3TestAdapter" Version="5.0.0" />\n'
+                   '    <PackageReference Include="Microsoft.NET.Test.Sdk" Version="17.12.0" />\n'
+                   '  </ItemGroup>\n</Project>\n')
+    write_file(project_file, content)
+    write_file(project_file.parent / "UnitTest1.cs", "namespace Tests;\n\npublic class UnitTest1 { }\n")
+    for noise_file in NOISE_FILES:
+        write_file(project_file.parent / noise_file.format(name=name))
+
+
+def generate_repo(repo_root: Path, count: int, outputs: List[str], seed: int = 0) -> Dict[str, Any]:
+    """
+    Generate a synthetic issue repository with count issue directories.
+    A FAILURE_RATE share of the projects gets a recorded build output to replay
+    (.stub-build.log) and a build log in the errors directory, as check-builds.py writes it.
+    Returns: Dictionary with the issue count, project paths and failed builds
+    """
+    rng = random.Random(seed)
+    layouts = list(LAYOUT_WEIGHTS)
+    weights = list(LAYOUT_WEIGHTS.values())
+    errors_dir = repo_root / "failed-builds_errors"
+    errors_dir.mkdir(parents=True, exist_ok=True)
+    
+    projects = []
+    failed = []
+    for number in range(1, count + 1):
+        issue_name = f"Issue{number}"
+        issue_dir = repo_root / issue_name
+        issue_dir.mkdir()
+        layout = rng.choices(layouts, weights)[0]
+        framework = rng.choice(["net8.0", "net6.0;net8.0", "net462;net8.0", "netcoreapp3.1", "net10.0"])
+        
+        if layout == "no_project":
+            write_file(issue_dir / "README.md", f"# {issue_name}\n")
+            continue
+        if layout == "marker":
+            write_file(issue_dir / rng.choice(["ignore", "explicit.md", "wip", "gui"]))
+        if layout in ("csproj", "marker"):
+            project_files = [issue_dir / f"{issue_name}.csproj"]
+            build_files = project_files
+        elif layout == "classic":
+            project_files = [issue_dir / f"{issue_name}.Tests" / f"{issue_name}.Tests.csproj"]
+            build_files = project_files
+        else:
+            solution_count = 2 if layout == "multi_sln" else 1
+            root = issue_dir / "src" if layout == "nested_sln" else issue_dir
+            project_files = [root / f"Project{i}" / f"Project{i}.csproj" for i in range(rng.randint(1, 4))]
+            build_files = [root / f"{issue_name}{'' if i == 0 else i}.sln" for i in range(solution_count)]
+            for solution in build_files:
+                write_file(solution, "Microsoft Visual Studio Solution File, Format Version 12.00\n")
+        for project_file in project_files:
+            write_project(project_file, framework, classic=layout == "classic")
+        if rng.random() < 0.1:
+            write_file(issue_dir / "Directory.Build.props", "<Project />\n")
+        
+        results = []
+        for build_file in build_files:
+            rel_path = build_file.relative_to(issue_dir)
+            fails = layout != "marker" and rng.random() < FAILURE_RATE
+            if fails:
+                output = rng.choice(outputs).format(project=build_file)
+                write_file(build_file.parent / ".stub-build.log", output)
+                log_name = str(build_file.relative_to(repo_root)).replace('\\', '_').replace('/', '_')
+                write_file(errors_dir / f"{issue_name}_{log_name}_error.txt",
+                           f"Project: {build_file.relative_to(repo_root)}\nIssue: {issue_name}\n{'=' * 80}\n\n"
+                           f"STDOUT:\n{'-' * 80}\n{output}\n\n")
+                failed.append({"issue": issue_name, "project": str(build_file.relative_to(repo_root))})
+            else:
+                output = SUCCESS_OUTPUT.format(name=build_file.stem, project_dir=build_file.parent,
+                                               seconds=rng.uniform(1, 40))
+            results.append({"number": number, "project_path": str(rel_path).replace('/', '\\'),
+                            "target_frameworks": framework.split(';'),
+                            "build_result": "Failed" if fails else "Success", "build_output": output})
+            projects.append(build_file)
+        write_file(issue_dir / "issue_results.json", json.dumps(results, indent=2))
+    
+    with open(repo_root / "failed-builds.json", 'w', encoding='utf-8') as f:
+        json.dump({"failed_builds": failed}, f, indent=2)
+    return {"issues": count, "projects": projects, "failed": failed}
+
+
+def write_stub_dotnet(bin_dir: Path) -> Path:
+    """Write the stub dotnet executable into bin_dir."""
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    stub_path = bin_dir / "dotnet"
+    stub_path.write_text(STUB_DOTNET.format(python=sys.executable), encoding='utf-8')
+    stub_path.chmod(stub_path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return stub_path
+
+
+def time_median(func: Callable[[], Any], repeat: int) -> float:
+    """Run func repeat times and return its median wall time in seconds."""
+    elapsed = []
+    for _ in range(max(repeat, 1)):
+        started = time.perf_counter()
+        func()
+        elapsed.append(time.perf_counter() - started)
+    return statistics.median(elapsed)
+
+
+def calibration_loop() -> List[str]:
+    """Fixed pure Python workload (string formatting, dictionary updates, sorting) timed next to the benchmarks."""
+    counts = {}
+    for index in range(CALIBRATION_ITERATIONS):
+        key = f"Issue{index % 997}"
+        counts[key] = counts.get(key, 0) + 1
+    return sorted(counts)
+
+
+def run_end_to_end(repo_root: Path, synthetic_root: Path, jobs: int, expect_failures: bool) -> float:
+    """
+    Run check-builds.py over a synthetic repository with the stub dotnet first on PATH.
+    The sweep must print its BUILD SUMMARY and exit with 1 when the repository has failing
+    builds, 0 otherwise; anything else (a crash, a usage error) raises RuntimeError.
+    Returns: Wall time in seconds
+    """
+    shutil.copy2(repo_root / "check-builds.py", synthetic_root / "check-builds.py")
+    stub_dir = write_stub_dotnet(synthetic_root / ".stub-bin").parent
+    env = {**os.environ, "PATH": f"{stub_dir}{os.pathsep}{os.environ.get('PATH', '')}"}
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, str(synthetic_root / "check-builds.py"), "--force", "-j", str(jobs),
+                                "--log-dir", str(synthetic_root / ".check-builds" / "logs")],
+                               cwd=synthetic_root, env=env, capture_output=True, text=True,
+                               encoding='utf-8', errors='replace')
+    elapsed = time.perf_counter() - started
+    expected = 1 if expect_failures else 0
+    if completed.returncode != expected or "BUILD SUMMARY" not in completed.stdout:
+        tail = (completed.stderr or completed.stdout).strip().splitlines()[-10:]
+        raise RuntimeError(f"check-builds.py exited with {completed.returncode} (expected {expected}):\n"
+                           + "\n".join(f"    {line}" for line in tail))
+    return elapsed
+
+
+def run_benchmarks(repo_root: Path, count: int, args: argparse.Namespace, outputs: List[str],
+                   check_builds, analyzer) -> Dict[str, float]:
+    """
+    Generate a repository of count issues and time each benchmark on it, and the
+    calibration loop right before them.
+    Returns: Dictionary mapping benchmark names (and CALIBRATION_NAME) to their median time in seconds
+    """
+    with tempfile.TemporaryDirectory(prefix=f"bench-{count}-") as tmp:
+        synthetic_root = Path(tmp)
+        started = time.perf_counter()
+        repo = generate_repo(synthetic_root, count, outputs, seed=args.seed)
+        print(f"  Generated {count} issues, {len(repo['projects'])} builds, {len(repo['failed'])} failing "
+              f"({time.perf_counter() - started:.1f} s)")
+        
+        issue_dirs = sorted(d for d in synthetic_root.iterdir() if d.is_dir() and d.name.startswith("Issue"))
+        errors_dir = synthetic_root / "failed-builds_errors"
+        error_files = sorted(errors_dir.glob("*_error.txt"))
+        plan = check_builds.plan_all_builds(synthetic_root, issue_dirs)
+        history = {project.relative_to(synthetic_root).as_posix():
+                   [{"wall_time": 10.0 + index % 17}] for index, project in enumerate(repo["projects"][::3])}
+        
+        timings = {
+            CALIBRATION_NAME: time_median(calibration_loop, args.repeat),
+            "find_project_files": time_median(
+                lambda: [check_builds.find_project_files(issue_dir) for issue_dir in issue_dirs], args.repeat),
+            "plan_all_builds (indexed)": time_median(
+                lambda: check_builds.plan_all_builds(synthetic_root, issue_dirs), args.repeat),
+            "order_longest_first": time_median(
+                lambda: check_builds.order_longest_first(plan, history, synthetic_root), args.repeat),
+            "extract_errors_from_file": time_median(
+                lambda: [analyzer.extract_errors_from_file(error_file) for error_file in error_files], args.repeat),
+            "analyze_errors": time_median(
+                lambda: analyzer.analyze_errors(synthetic_root / "failed-builds.json", errors_dir), args.repeat),
+        }
+        if args.end_to_end:
+            timings["check-builds.py end to end"] = run_end_to_end(repo_root, synthetic_root, args.jobs,
+                                                                   expect_failures=bool(repo["failed"]))
+    
+    return timings
+
+
+def compare_to_baseline(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+                        tolerance: float) -> List[str]:
+    """
+    Print every timing next to its baseline. The change of a benchmark is that of its
+    ratio to the calibration loop of the same size, so both runs are compared as if
+    on the same machine load.
+    Returns: Descriptions of the benchmarks that regressed past the tolerance
+    """
+    regressions = []
+    print("\n" + "=" * 80)
+    print("BENCHMARK RESULTS")
+    print("=" * 80)
+    print(f"{'Benchmark':<40} {'Issues':>7} {'Time':>10} {'Baseline':>10} {'Change':>8}")
+    print("-" * 80)
+    for size, timings in results.items():
+        reference_timings = baseline.get(size, {})
+        calibration = timings.get(CALIBRATION_NAME)
+        reference_calibration = reference_timings.get(CALIBRATION_NAME)
+        # Baseline timings scaled to the speed of this run
+        scale = calibration / reference_calibration if calibration and reference_calibration else 1.0
+        for name, seconds in timings.items():
+            reference = reference_timings.get(name)
+            if reference is None:
+                print(f"{name:<40} {size:>7} {seconds * 1000:>8.1f}ms {'-':>10} {'new':>8}")
+                continue
+            if name == CALIBRATION_NAME:
+                print(f"{name:<40} {size:>7} {seconds * 1000:>8.1f}ms {reference * 1000:>8.1f}ms "
+                      f"{scale - 1:>+7.0%}")
+                continue
+            expected = reference * scale
+            change = (seconds - expected) / expected if expected else 0.0
+            regressed = change > tolerance and seconds - expected > NOISE_FLOOR_SECONDS
+            flag = "  [SLOW]" if regressed else ""
+            print(f"{name:<40} {size:>7} {seconds * 1000:>8.1f}ms {reference * 1000:>8.1f}ms "
+                  f"{change:>+7.0%}{flag}")
+            if regressed:
+                regressions.append(f"{name} at {size} issues: {reference * 1000:.1f} ms -> {seconds * 1000:.1f} ms "
+                                   f"({change:+.0%} relative to the calibration loop)")
+    return regressions
+
+
+def main():
+    """Main function to run the benchmarks."""
+    parser = argparse.ArgumentParser(
+        description='Benchmark discovery, scheduling and error analysis on synthetic issue repositories.',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python bench-builds.py                          # All sizes, compared to the local baseline if any
+  python bench-builds.py --sizes 100 --repeat 3   # Quick run
+  python bench-builds.py --save-baseline          # Accept the current timings
+  python bench-builds.py --end-to-end --sizes 100,1000 -j 8  # Include a full stub sweep
+  python bench-builds.py --generate 1000 /tmp/issues  # Keep a synthetic repository for manual runs
+        """
+    )
+    parser.add_argument(
+        '--sizes',
+        type=str,
+        default=DEFAULT_SIZES,
+        help=f'Comma-separated issue counts of the synthetic repositories (default: {DEFAULT_SIZES})'
+    )
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=5,
+        help='Runs per benchmark, the median is kept (default: 5)'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+        help='Seed of the synthetic repository layouts (default: 0)'
+    )
+    parser.add_argument(
+        '--baseline',
+        type=str,
+        help=f'Baseline timings file (default: {BASELINE_PATH.as_posix()})'
+    )
+    parser.add_argument(
+        '--save-baseline', '--update-baseline',
+        dest='save_baseline',
+        action='store_true',
+        help='Store the timings of this run as the local baseline instead of comparing'
+    )
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help=f'Allowed slowdown against the baseline, as a fraction (default: {DEFAULT_TOLERANCE})'
+    )
+    parser.add_argument(
+        '--end-to-end',
+        action='store_true',
+        help='Also time a full check-builds.py sweep of each repository against the stub dotnet'
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=os.cpu_count() or 1,
+        help='Parallel jobs of the end-to-end sweep (default: number of CPUs)'
+    )
+    parser.add_argument(
+        '--generate',
+        nargs=2,
+        metavar=('N', 'DIR'),
+        help='Only generate a synthetic repository of N issues in DIR, with the stub dotnet in DIR/.stub-bin'
+    )
+    args = parser.parse_args()
+    
+    repo_root = Path(__file__).parent
+    outputs = load_recorded_outputs(repo_root)
+    
+    if args.generate:
+        target = Path(args.generate[1])
+        if target.exists() and any(target.iterdir()):
+            print(f"Error: {target} is not empty", file=sys.stderr)
+            return 1
+        target.mkdir(parents=True, exist_ok=True)
+        repo = generate_repo(target, int(args.generate[0]), outputs, seed=args.seed)
+        write_stub_dotnet(target / ".stub-bin")
+        print(f"Generated {repo['issues']} issues, {len(repo['projects'])} builds, {len(repo['failed'])} failing")
+        print(f"Stub dotnet: PATH={target / '.stub-bin'}{os.pathsep}$PATH "
+              f"(STUB_DOTNET_SLEEP=seconds, STUB_DOTNET_FAIL=regex)")
+        return 0
+    
+    try:
+        sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    except ValueError:
+        print(f"Error: invalid --sizes: {args.sizes}", file=sys.stderr)
+        return 1
+    
+    baseline_path = Path(args.baseline) if args.baseline else repo_root / BASELINE_PATH
+    try:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        baseline = {}
+    
+    check_builds = load_script(repo_root, "check-builds.py")
+    analyzer = load_script(repo_root, "analyze-build-errors.py")
+    print(f"Replaying {len(outputs)} recorded build outputs")
+    results = {}
+    for size in sizes:
+        print(f"\nBenchmarking {size} issues...")
+        try:
+            results[str(size)] = run_benchmarks(repo_root, size, args, outputs, check_builds, analyzer)
+        except RuntimeError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+    
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump({**baseline, **results}, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to: {baseline_path}")
+        return 0
+    
+    if not baseline:
+        print(f"\nNo baseline in {baseline_path}, nothing compared; run with --save-baseline to store one")
+        return 0
+    
+    if regressions:
+        print(f"\n[FAIL] {len(regressions)} benchmarks regressed by more than {args.tolerance:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"\n[OK] No benchmark regressed by more than {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,16 +5,53 @@ Script to build all issue projects and report compilation failures.
 Usage:
     python check-builds.py                    # Build all issues
     python check-builds.py failed-builds.json # Build only projects in JSON file
+    python check-builds.py --jobs 8           # Build 8 projects at a time
+    python check-builds.py --force            # Ignore the build cache
+    python check-builds.py --test -j 8        # Build, then test every green project
+    python check-builds.py --priority         # Build last run's failures and regressions first
+    python check-builds.py --watch            # Rebuild projects as their files change
+    python check-builds.py --tfm net8.0 --state open  # Build only matching issues
+    python check-builds.py --scratch -j 8     # Build with bin/obj redirected to /dev/shm
+    python check-builds.py --governor -j 16   # Start builds only while load and memory allow
+    python check-builds.py --compress-logs --log-cap 512  # Compressed logs of at most ~512 KB of text
+    python check-builds.py --shard 1/4        # Build the first of 4 shards of the issues
+    python check-builds.py merge shard-*/results-*.jsonl  # Combine the shard results
 """
 
 import argparse
+import ctypes
+import ctypes.util
+import fnmatch
+import gzip
+import hashlib
+import io
 import json
 import os
+import re
+import shutil
+import select
+import signal
+import statistics
+import struct
 import subprocess
 import sys
-from pathlib import Path
-from collections import defaultdict
-from typing import List, Tuple, Optional, Dict, Any
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+import xml.etree.ElementTree as ElementTree
+import zipfile
+from xml.sax.saxutils import quoteattr
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path, PureWindowsPath
+from collections import defaultdict, deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 # Set UTF-8 encoding for Windows console
 if sys.platform == 'win32':
@@ -22,68 +59,2786 @@ if sys.platform == 'win32':
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
     sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
 
+# Directory (relative to the repo root) holding state kept between runs
+STATE_DIR_NAME = ".check-builds"
+
+# Directories that only hold build output and never contain build inputs
+BUILD_OUTPUT_DIRS = {"bin", "obj", "packages", "TestResults", ".vs", ".git"}
+
+# Files that affect the outcome of a build
+BUILD_INPUT_SUFFIXES = {".sln", ".slnx", ".slnf", ".csproj", ".fsproj", ".vbproj",
+                        ".cs", ".fs", ".fsi", ".vb", ".props", ".targets", ".resx"}
+BUILD_INPUT_NAMES = {"nuget.config", "global.json", "packages.config", "app.config"}
+
+# Lines kept in memory per build; the full output only goes to the log file
+OUTPUT_TAIL_LINES = 40
+MAX_ERROR_LINES = 200
+
+# Compressed build logs (--compress-logs): file suffix per compressor
+LOG_COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+# Build timeouts: --timeout, raised for projects whose past builds of the same mode
+# (see build_mode()) had a p95 x factor above it, up to the ceiling
+DEFAULT_TIMEOUT_SECONDS = 300
+TIMEOUT_CEILING_SECONDS = 1800
+
+# Scratch roots for --scratch: bin/obj of every build are redirected below a per-run
+# directory, on tmpfs by default, through a generated Directory.Build.props
+SCRATCH_DEFAULT_PARENT = "/dev/shm"
+SCRATCH_DEFAULT_LIMIT_MB = 4096
+SCRATCH_MIN_FREE_BYTES = 256 * 1024 * 1024
+SCRATCH_PROPS_NAME = "Directory.Build.props"
+SCRATCH_PROPS = """<Project>
+  <!-- Generated by check-builds.py: import the issue's own Directory.Build.props, then
+       move bin/obj below the scratch directory given by CheckBuildsScratchDir -->
+  <PropertyGroup>
+    <CheckBuildsOriginalProps>$([MSBuild]::GetPathOfFileAbove('Directory.Build.props', '$(MSBuildProjectDirectory)'))</CheckBuildsOriginalProps>
+  </PropertyGroup>
+  <Import Project="$(CheckBuildsOriginalProps)" Condition="'$(CheckBuildsOriginalProps)' != ''" />
+  <PropertyGroup>
+    <CheckBuildsProjectDir>$(CheckBuildsScratchDir)$(MSBuildProjectName)-$([MSBuild]::StableStringHash('$(MSBuildProjectFullPath)'))/</CheckBuildsProjectDir>
+    <BaseOutputPath>$(CheckBuildsProjectDir)bin/</BaseOutputPath>
+    <BaseIntermediateOutputPath>$(CheckBuildsProjectDir)obj/</BaseIntermediateOutputPath>
+  </PropertyGroup>
+</Project>
+"""
+
+# Characters of an item spec MSBuild would expand or split on (wildcards, item and
+# property references, separators), written as %XX in generated traversal projects
+MSBUILD_SPECIAL_CHARACTERS = "%$@';?*"
+
+# Test result files shared with the IssueRunner, and the TRX schema of dotnet test
+TEST_RESULT_FILES = {"success": "test-passes.json", "fail": "test-fails.json"}
+TRX_NAMESPACE = {"trx": "http://microsoft.com/schemas/VisualStudio/TeamTest/2010"}
+ISSUE_RUNNER_DIR = Path(".nunit") / "IssueRunner"
+# Project entry of a .sln: Project("{type}") = "Name", "relative\path.csproj", "{guid}"
+SOLUTION_PROJECT_PATTERN = re.compile(r'^Project\("[^"]*"\)\s*=\s*"[^"]*"\s*,\s*"([^"]+)"', re.MULTILINE)
+TEST_PROJECT_PATTERN = re.compile(r'Microsoft\.NET\.Test\.Sdk|<IsTestProject>\s*true', re.IGNORECASE)
+
+# Watch mode: quiet time that ends a burst of saves, and the polling interval without inotify
+WATCH_DEBOUNCE_SECONDS = 0.5
+WATCH_POLL_SECONDS = 1.0
+
+# Concurrency governor: a build is admitted while the load average (plus the CPUs of
+# builds started too recently to show in it) stays below the limit and MemAvailable,
+# minus the recorded peak RSS of those recent builds, leaves room for its own peak RSS
+GOVERNOR_POLL_SECONDS = 0.5
+GOVERNOR_RAMP_SECONDS = 30.0
+GOVERNOR_DEFAULT_RSS_MB = 1024
+GOVERNOR_DEFAULT_RESERVE_MB = 1024
+
+# inotify(7) flags and events
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_ISDIR = 0x40000000
+INOTIFY_EVENT = struct.Struct("iIII")
+
+# Samples kept per project in the build history
+HISTORY_SAMPLES = 10
+
+# Fallback cost model for projects without any recorded build time (seconds)
+BASE_BUILD_SECONDS = 5.0
+PER_TARGET_FRAMEWORK_SECONDS = 10.0
+
+# Build time printed by MSBuild, as stored in issue_results.json build_output
+TIME_ELAPSED_PATTERN = re.compile(r'Time Elapsed (\d+):(\d+):(\d+(?:\.\d+)?)')
+TARGET_FRAMEWORKS_PATTERN = re.compile(r'<TargetFrameworks?>([^<]*)</TargetFrameworks?>')
+TARGET_FRAMEWORK_VERSION_PATTERN = re.compile(r'<TargetFrameworkVersion>\s*v(\d+(?:\.\d+)*)\s*</TargetFrameworkVersion>')
+
+# Per-issue metadata files indexed for --tfm/--label/--state/--package selection
+ISSUE_METADATA_FILES = ("issue_results.json", "issue_metadata.json")
+PACKAGE_SELECTOR_PATTERN = re.compile(r'^\s*([A-Za-z0-9_.\-]+?)\s*(?:(<=|>=|==|!=|<|>|=)\s*(\d[0-9A-Za-z.\-]*))?\s*$')
+
+# Lines reported as errors (same rule as analyze-build-errors.py)
+ERROR_LINE_PATTERN = re.compile(r'error|Error|ERROR')
+
+# First compiler or NuGet error, used to stop a build early in fail-fast mode
+FAIL_FAST_PATTERN = re.compile(r'\berror (?:CS|NU)\d{4}\b')
+
+# Project an MSBuild diagnostic belongs to: "... [/path/to/app.csproj::TargetFramework=net8.0]"
+DIAGNOSTIC_PROJECT_PATTERN = re.compile(r'\[([^\[\]]+?)(?:::[^\[\]]*)?\]\s*$')
+# Output line MSBuild prints for every project it builds: "  Name -> /path/to/bin/Debug/net8.0/Name.dll"
+PROJECT_OUTPUT_PATTERN = re.compile(r'^\s*(\S+) -> (.+?)\s*$')
+CANONICAL_ERROR_PATTERN = re.compile(r':\s*error(?:\s+[A-Za-z]+\d+)?\s*:')
+CANONICAL_WARNING_PATTERN = re.compile(r':\s*warning(?:\s+[A-Za-z]+\d+)?\s*:')
+
+# MSBuild canonical diagnostic, strictly: origin(line,col): error CODE: message [project]
+CANONICAL_DIAGNOSTIC_PATTERN = re.compile(
+    r'^(?P<origin>.*?)'
+    r'(?:\((?P<line>\d+)(?:,(?P<column>\d+))?(?:,\d+,\d+)?\))?'
+    r'\s*:\s*(?P<severity>error|warning)\s+(?P<code>[A-Za-z]+\d+)\s*:\s*'
+    r'(?P<message>.*?)'
+    r'(?:\s+\[(?P<project>[^\[\]]+)\])?\s*$'
+)
+
+# Package source used to fill the local feed with packages missing from the NuGet cache
+NUGET_FLAT_CONTAINER_URL = "https://api.nuget.org/v3-flatcontainer"
+
+# Package the .NET SDK references implicitly in SDK-style projects targeting .NET Framework
+# (its dependencies bring the reference assemblies of each framework version)
+REFERENCE_ASSEMBLIES_PACKAGE = ("microsoft.netframework.referenceassemblies", "1.0.3")
+SDK_PROJECT_PATTERN = re.compile(r'<Project\s[^>]*\bSdk\s*=', re.IGNORECASE)
+NET_FRAMEWORK_TFM_PATTERN = re.compile(r'^net[1-4]\d{1,2}$')
+
+# Marker files that exclude an issue from a full build
+IGNORE_MARKERS = ["ignore", "ignore.md", "explicit", "explicit.md", 
+                  "wip", "wip.md", "gui", "gui.md", "closedasnotplanned", 
+                  "closedasnotplanned.md"]
+
+
+def load_state_file(state_path: Path) -> Dict[str, Any]:
+    """
+    Load a JSON state file kept between runs (build cache, index, history).
+    Returns: The stored dictionary, or an empty one if missing or unreadable
+    """
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state_file(state_path: Path, state: Dict[str, Any]):
+    """Write a JSON state file, replacing the previous one atomically."""
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = state_path.with_suffix(".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, sort_keys=True)
+    os.replace(tmp_path, state_path)
+
+
+def scan_issue_dir(issue_dir: Path) -> Dict[str, Any]:
+    """
+    Walk an issue directory once, skipping build output directories.
+    Returns: Index entry with the solution and project files, the ignore markers
+             present and the mtime of every directory visited
+    """
+    entry = {"sln": [], "csproj": [], "markers": [], "dirs": {}}
+    stack = [(issue_dir, "")]
+    while stack:
+        directory, rel_dir = stack.pop()
+        entry["dirs"][rel_dir or "."] = directory.stat().st_mtime_ns
+        with os.scandir(directory) as it:
+            for item in it:
+                rel_path = f"{rel_dir}/{item.name}" if rel_dir else item.name
+                if item.is_dir(follow_symlinks=False):
+                    if item.name not in BUILD_OUTPUT_DIRS:
+                        stack.append((Path(item.path), rel_path))
+                elif item.name.endswith(".sln"):
+                    entry["sln"].append(rel_path)
+                elif item.name.endswith(".csproj"):
+                    entry["csproj"].append(rel_path)
+                if not rel_dir and item.name in IGNORE_MARKERS:
+                    entry["markers"].append(item.name)
+    
+    entry["sln"].sort()
+    entry["csproj"].sort()
+    entry["markers"].sort()
+    return entry
+
+
+def is_index_entry_current(issue_dir: Path, entry: Dict[str, Any]) -> bool:
+    """Check that no directory recorded in an index entry has changed since it was scanned."""
+    try:
+        return all((issue_dir / rel_dir).stat().st_mtime_ns == mtime
+                   for rel_dir, mtime in entry["dirs"].items())
+    except (OSError, KeyError):
+        return False
+
+
+def load_discovery_index(repo_root: Path, issue_dirs: List[Path]) -> Dict[str, Dict[str, Any]]:
+    """
+    Load the persisted discovery index, rescanning only the issue directories
+    that changed since they were indexed.
+    Returns: Dictionary mapping issue names to their index entries
+    """
+    index_path = repo_root / STATE_DIR_NAME / "discovery-index.json"
+    stored = load_state_file(index_path)
+    
+    index = {}
+    changed = len(stored) != len(issue_dirs)
+    for issue_dir in issue_dirs:
+        entry = stored.get(issue_dir.name)
+        if entry is None or not is_index_entry_current(issue_dir, entry):
+            entry = scan_issue_dir(issue_dir)
+            changed = True
+        index[issue_dir.name] = entry
+    
+    if changed:
+        save_state_file(index_path, index)
+    
+    return index
+
+
+def project_files_from_index(issue_dir: Path, entry: Dict[str, Any]) -> List[Path]:
+    """Return the files to build for an index entry, preferring solution files."""
+    return [issue_dir / rel_path for rel_path in (entry["sln"] or entry["csproj"])]
+
+
+def find_project_files(issue_dir: Path) -> List[Path]:
+    """Find all .csproj and .sln files in an issue directory."""
+    return project_files_from_index(issue_dir, scan_issue_dir(issue_dir))
+
+
+def find_descendants(pid: int) -> List[int]:
+    """Find all descendants of a process from /proc (Linux only, empty elsewhere)."""
+    children = defaultdict(list)
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return []
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", 'r') as f:
+                # The ppid follows the state, after the parenthesised command name
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children[ppid].append(int(entry))
+    
+    descendants = []
+    stack = [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            descendants.append(child)
+            stack.append(child)
+    return descendants
+
+
+def kill_process_tree(process: subprocess.Popen):
+    """
+    Kill a process started by start_build() together with all of its children:
+    its whole process group, plus any descendant that left the group
+    (MSBuild worker nodes, VBCSCompiler).
+    """
+    try:
+        if sys.platform == 'win32':
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)], capture_output=True)
+            return
+        for pid in find_descendants(process.pid):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
+        os.killpg(process.pid, signal.SIGKILL)
+    except (OSError, subprocess.SubprocessError):
+        pass
+
+
+def start_build(command: List[str], cwd: Path) -> subprocess.Popen:
+    """Start a build in its own process group, with stderr merged into stdout."""
+    if sys.platform == 'win32':
+        group_args = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        group_args = {"start_new_session": True}
+    return subprocess.Popen(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            stdin=subprocess.DEVNULL, **group_args)
+
+
+def wait_for_build(process: subprocess.Popen) -> Dict[str, Optional[float]]:
+    """
+    Wait for a build process and collect its resource usage.
+    On POSIX, os.wait4() reports the CPU time of the process and of every child it
+    reaped (MSBuild nodes, compiler), and the peak RSS of the largest of them.
+    Returns: Dictionary with cpu_user, cpu_sys (seconds) and peak_rss_kb, None where unavailable
+    """
+    usage = {"cpu_user": None, "cpu_sys": None, "peak_rss_kb": None}
+    if not hasattr(os, "wait4"):
+        process.wait()
+        return usage
+    
+    try:
+        _, status, rusage = os.wait4(process.pid, 0)
+    except ChildProcessError:
+        process.wait()
+        return usage
+    process.returncode = os.waitstatus_to_exitcode(status)
+    
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+    peak_rss = rusage.ru_maxrss // 1024 if sys.platform == 'darwin' else rusage.ru_maxrss
+    return {"cpu_user": round(rusage.ru_utime, 3), "cpu_sys": round(rusage.ru_stime, 3), "peak_rss_kb": peak_rss}
+
+
+def uncompressed_log_path(log_path: Path) -> Path:
+    """Return a log path without its compression suffix (.gz, .zst)."""
+    return log_path.with_suffix("") if log_path.suffix in LOG_COMPRESSION_SUFFIXES.values() else log_path
+
+
+def diagnostic_log_paths(log_path: Path) -> Tuple[Path, Path]:
+    """Return the errors-only and warnings-only MSBuild file logs kept next to a build log, compressed alike."""
+    base = uncompressed_log_path(log_path)
+    suffix = log_path.suffix if base != log_path else ""
+    return base.with_suffix(".errors.log" + suffix), base.with_suffix(".warnings.log" + suffix)
+
+
+def open_log_file(log_path: Path):
+    """Open a log file for writing text, through a streaming compressor chosen by its suffix (.gz, .zst)."""
+    if log_path.suffix == ".gz":
+        return gzip.open(log_path, 'wt', encoding='utf-8', compresslevel=6)
+    if log_path.suffix == ".zst":
+        return io.TextIOWrapper(zstandard.ZstdCompressor(level=3).stream_writer(open(log_path, 'wb')),
+                                encoding='utf-8')
+    return open(log_path, 'w', encoding='utf-8')
+
+
+def compress_log_file(source: Path, target: Path):
+    """Compress a plain log written by MSBuild into target (by its suffix), removing the plain one."""
+    if source == target or not source.exists():
+        return
+    with open(source, 'r', encoding='utf-8', errors='replace') as src, open_log_file(target) as dst:
+        shutil.copyfileobj(src, dst)
+    source.unlink()
+
+
+def capped_log(log_file, cap: Optional[int]) -> Dict[str, Any]:
+    """
+    Wrap an open log file for write_log(). With cap (bytes of text), the first half
+    of the cap is written as is; after that every line with an error or warning is
+    still written, while the other lines only survive in the last half of the cap,
+    kept in memory until finish_log().
+    """
+    return {"file": log_file, "cap": cap, "head": cap // 2 if cap else 0,
+            "tail": deque(), "tail_size": 0, "omitted": 0}
+
+
+def write_log(log: Dict[str, Any], text: str):
+    """Write text to a log opened with capped_log(), applying its size cap."""
+    if not log["cap"]:
+        log["file"].write(text)
+        return
+    for line in text.splitlines(keepends=True):
+        if log["head"] > 0:
+            log["head"] -= len(line)
+            log["file"].write(line)
+            continue
+        log["tail"].append(line)
+        log["tail_size"] += len(line)
+        while log["tail_size"] > log["cap"] - log["cap"] // 2:
+            evicted = log["tail"].popleft()
+            log["tail_size"] -= len(evicted)
+            if ERROR_LINE_PATTERN.search(evicted) or CANONICAL_WARNING_PATTERN.search(evicted):
+                log["file"].write(evicted)
+            else:
+                log["omitted"] += 1
+
+
+def finish_log(log: Dict[str, Any]):
+    """Write the tail of a capped log, after a note of the lines the cap dropped."""
+    if log["omitted"]:
+        log["file"].write(f"\n[... {log['omitted']} lines without errors or warnings omitted, "
+                          f"log capped at {log['cap']} bytes ...]\n\n")
+    log["file"].writelines(log["tail"])
+    log["tail"].clear()
+
+
+def remove_build_logs(log_path: Path):
+    """Remove a build log together with its errors-only and warnings-only logs (also the uncompressed ones)."""
+    for path in (log_path, *diagnostic_log_paths(log_path), *diagnostic_log_paths(uncompressed_log_path(log_path))):
+        path.unlink(missing_ok=True)
+
+
+def canonical_errors(lines: Iterable[str]) -> List[str]:
+    """
+    Select the canonical error diagnostics among output lines, dropping the repeats
+    of the recap MSBuild prints at the end of a build.
+    Returns: Stripped error lines in order of first appearance, at most MAX_ERROR_LINES
+    """
+    errors = {}
+    for line in lines:
+        line = line.strip()
+        match = CANONICAL_DIAGNOSTIC_PATTERN.match(line)
+        if match and match.group('severity') == 'error':
+            errors.setdefault(line, None)
+            if len(errors) >= MAX_ERROR_LINES:
+                break
+    return list(errors)
+
+
+def build_project(project_path: Path, log_path: Path, header: str = "",
+                  timeout: int = 300, fail_fast: bool = False,
+                  extra_args: Sequence[str] = (), command: str = "build",
+                  restore: bool = False, governor: Optional[Dict[str, Any]] = None,
+                  log_cap: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Build a project using dotnet build (or another dotnet command, such as test),
+    streaming its output to log_path. extra_args are passed on to dotnet.
+    A log_path ending in .gz or .zst is written compressed, and log_cap limits
+    its size (see capped_log()).
+    The project is expected to be restored already, unless restore is set.
+    With a governor (see open_governor()), the build waits to be admitted and
+    gets its share of the CPUs through -maxcpucount.
+    MSBuild also writes errors-only and warnings-only logs next to it (see
+    diagnostic_log_paths()); the errors are taken from these, strictly parsed,
+    and only from the console lines containing "error" if it has none.
+    Only the last OUTPUT_TAIL_LINES lines and the error lines are kept in memory.
+    If fail_fast is set, the build is killed at the first CS/NU error.
+    Returns: Dictionary with success, exit_code, wall_time, cpu_user, cpu_sys,
+             peak_rss_kb, errors, tail, timeout, timed_out and stopped_early
+    """
+    tail = deque(maxlen=OUTPUT_TAIL_LINES)
+    errors = []
+    state = {"timed_out": False, "stopped_early": False}
+    
+    errors_log, warnings_log = diagnostic_log_paths(uncompressed_log_path(log_path))
+    file_loggers = [f"-flp1:logfile={errors_log};errorsonly", f"-flp2:logfile={warnings_log};warningsonly"]
+    if governor:
+        file_loggers.append(f"-maxcpucount:{governor['maxcpucount']}")
+        admitted = admit_build(governor, governor["peak_rss_kb"].get(project_path, governor["default_rss_kb"]))
+    started = time.monotonic()
+    
+    with open_log_file(log_path) as log_file:
+        log = capped_log(log_file, log_cap)
+        write_log(log, header)
+        try:
+            process = start_build(["dotnet", command, str(project_path), *([] if restore else ["--no-restore"]),
+                                   *file_loggers, *extra_args], project_path.parent)
+        except Exception as e:
+            if governor:
+                release_build(governor, admitted)
+            write_log(log, f"STDERR:\n{'-' * 80}\n{e}\n\n")
+            finish_log(log)
+            return {"success": False, "exit_code": None, "wall_time": 0.0, "cpu_user": None,
+                    "cpu_sys": None, "peak_rss_kb": None, "errors": [str(e)], "tail": [],
+                    "timeout": timeout, "timed_out": False, "stopped_early": False}
+        
+        def on_timeout():
+            state["timed_out"] = True
+            kill_process_tree(process)
+        
+        watchdog = threading.Timer(timeout, on_timeout)
+        watchdog.start()
+        try:
+            write_log(log, f"STDOUT:\n{'-' * 80}\n")
+            for raw_line in process.stdout:
+                line = raw_line.decode('utf-8', errors='replace').rstrip('\r\n')
+                write_log(log, line + "\n")
+                tail.append(line)
+                if ERROR_LINE_PATTERN.search(line) and len(errors) < MAX_ERROR_LINES:
+                    errors.append(line.strip())
+                if fail_fast and not state["stopped_early"] and FAIL_FAST_PATTERN.search(line):
+                    state["stopped_early"] = True
+                    kill_process_tree(process)
+            usage = wait_for_build(process)
+        finally:
+            watchdog.cancel()
+            process.stdout.close()
+            if governor:
+                release_build(governor, admitted)
+        write_log(log, "\n\n")
+        
+        try:
+            with open(errors_log, 'r', encoding='utf-8', errors='replace') as f:
+                logged_errors = canonical_errors(f)
+        except OSError:
+            logged_errors = []
+        errors = logged_errors or canonical_errors(errors) or errors
+        for plain_log, compressed_log in zip((errors_log, warnings_log), diagnostic_log_paths(log_path)):
+            compress_log_file(plain_log, compressed_log)
+        
+        if state["timed_out"]:
+            message = f"{command.capitalize()} timed out after {timeout} seconds"
+            write_log(log, f"STDERR:\n{'-' * 80}\n{message}\n\n")
+            errors.append(message)
+        finish_log(log)
+    
+    success = process.returncode == 0 and not state["timed_out"] and not state["stopped_early"]
+    return {"success": success, "exit_code": process.returncode, "wall_time": time.monotonic() - started,
+            **usage, "errors": errors, "tail": list(tail), "timeout": timeout, **state}
+
+
+def read_mem_available_kb() -> Optional[int]:
+    """Read MemAvailable from /proc/meminfo (Linux only, None elsewhere)."""
+    try:
+        with open("/proc/meminfo", 'r') as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def read_load_average() -> Optional[float]:
+    """Return the 1-minute load average, or None where unavailable."""
+    try:
+        return os.getloadavg()[0]
+    except (OSError, AttributeError):
+        return None
+
+
+def open_governor(jobs: int, max_load: Optional[float], reserve_mb: int,
+                  history: Dict[str, List[Dict[str, Any]]], repo_root: Path) -> Dict[str, Any]:
+    """
+    Create the concurrency governor of a run. The CPUs are split between the jobs
+    workers and the MSBuild nodes of each build (-maxcpucount), and every project
+    is expected to peak at the largest RSS recorded in its history.
+    Returns: Governor state shared by the build threads
+    """
+    cpus = os.cpu_count() or 1
+    peak_rss_kb = {}
+    for project, samples in history.items():
+        recorded = [sample["peak_rss_kb"] for sample in samples if sample.get("peak_rss_kb")]
+        if recorded:
+            peak_rss_kb[repo_root / project] = max(recorded)
+    return {
+        "condition": threading.Condition(),
+        "maxcpucount": max(1, cpus // max(1, jobs)),
+        "max_load": max_load or float(cpus),
+        "reserve_kb": reserve_mb * 1024,
+        "default_rss_kb": GOVERNOR_DEFAULT_RSS_MB * 1024,
+        "peak_rss_kb": peak_rss_kb,
+        "running": 0,
+        "ramping": [],
+        "held": 0,
+        "held_seconds": 0.0
+    }
+
+
+def has_capacity(governor: Dict[str, Any], rss_kb: int) -> bool:
+    """Check the live load average and available memory against the governor's limits."""
+    now = time.monotonic()
+    governor["ramping"] = [build for build in governor["ramping"] if now - build[0] < GOVERNOR_RAMP_SECONDS]
+    load = read_load_average()
+    if load is not None and load + len(governor["ramping"]) * governor["maxcpucount"] > governor["max_load"]:
+        return False
+    available_kb = read_mem_available_kb()
+    if available_kb is not None:
+        available_kb -= sum(kb for _, kb in governor["ramping"])
+        if available_kb < rss_kb + governor["reserve_kb"]:
+            return False
+    return True
+
+
+def admit_build(governor: Dict[str, Any], rss_kb: int) -> Tuple[float, int]:
+    """
+    Wait until the governor admits a build expected to peak at rss_kb.
+    A build is always admitted when no other is running, so that a loaded
+    machine slows the run down instead of stalling it.
+    Returns: The admitted build, to pass to release_build()
+    """
+    started = time.monotonic()
+    with governor["condition"]:
+        while governor["running"] and not has_capacity(governor, rss_kb):
+            governor["condition"].wait(GOVERNOR_POLL_SECONDS)
+        build = (time.monotonic(), rss_kb)
+        governor["running"] += 1
+        governor["ramping"].append(build)
+        waited = build[0] - started
+        if waited >= GOVERNOR_POLL_SECONDS:
+            governor["held"] += 1
+            governor["held_seconds"] += waited
+    return build
+
+
+def release_build(governor: Dict[str, Any], build: Tuple[float, int]):
+    """Record the end of an admitted build and wake up the builds waiting for admission."""
+    with governor["condition"]:
+        governor["running"] -= 1
+        if build in governor["ramping"]:
+            governor["ramping"].remove(build)
+        governor["condition"].notify_all()
+
+
+def remove_stale_scratch_roots(parent: Path):
+    """Remove the scratch roots left behind by runs that no longer exist (killed, crashed)."""
+    for root in parent.glob("check-builds-*"):
+        pid = root.name.rsplit('-', 1)[1]
+        if pid.isdigit() and not Path(f"/proc/{pid}").exists() and sys.platform.startswith('linux'):
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def open_scratch_root(parent: Optional[str], limit_mb: int) -> Dict[str, Any]:
+    """
+    Create the scratch root of this run below parent, or below the temporary
+    directory when parent is not a directory, and write the props file every
+    build imports through DirectoryBuildPropsPath.
+    Returns: Scratch root with its path, size limit in bytes and a counter of
+             builds that fell back to the issue tree
+    """
+    # MSBuild resolves the scratch properties against each project's directory, so the root is absolute
+    parent_dir = Path(parent).resolve() if parent and Path(parent).is_dir() else Path(tempfile.gettempdir()).resolve()
+    remove_stale_scratch_roots(parent_dir)
+    root = parent_dir / f"check-builds-{os.getpid()}"
+    root.mkdir(parents=True, exist_ok=True)
+    (root / SCRATCH_PROPS_NAME).write_text(SCRATCH_PROPS, encoding='utf-8')
+    return {"root": root, "limit": limit_mb * 1024 * 1024, "lock": threading.Lock(),
+            "next": 0, "fallbacks": 0}
+
+
+def directory_size(path: Path) -> int:
+    """Return the total size of the files below a directory."""
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+def claim_scratch_dir(scratch: Dict[str, Any], issue_name: str) -> Optional[Path]:
+    """
+    Create a scratch directory for one build, so that parallel builds never share
+    bin/obj. While the scratch root is over its size limit, or its file system is
+    nearly full, builds fall back to the issue tree.
+    Returns: The scratch directory, or None to build in the issue tree
+    """
+    with scratch["lock"]:
+        if (directory_size(scratch["root"]) >= scratch["limit"]
+                or shutil.disk_usage(scratch["root"]).free < SCRATCH_MIN_FREE_BYTES):
+            scratch["fallbacks"] += 1
+            return None
+        scratch_dir = scratch["root"] / f"{scratch['next']:05d}-{issue_name}"
+        scratch["next"] += 1
+    scratch_dir.mkdir()
+    return scratch_dir
+
+
+def scratch_args(scratch_dir: Optional[Path]) -> List[str]:
+    """Return the dotnet arguments that redirect bin/obj into a scratch directory (none without one)."""
+    if scratch_dir is None:
+        return []
+    return [f"-p:DirectoryBuildPropsPath={scratch_dir.parent / SCRATCH_PROPS_NAME}",
+            f"-p:CheckBuildsScratchDir={scratch_dir}/"]
+
+
+def close_scratch_root(scratch: Dict[str, Any]):
+    """Remove the scratch root of this run and report the builds that did not fit in it."""
+    shutil.rmtree(scratch["root"], ignore_errors=True)
+    if scratch["fallbacks"]:
+        print(f"\nScratch: {scratch['fallbacks']} builds ran in the issue tree, "
+              f"{scratch['root'].parent} was over {scratch['limit'] // (1024 * 1024)} MB or nearly full")
+
+
+def get_dotnet_version() -> str:
+    """Return the output of 'dotnet --version', or an empty string if it cannot be run."""
+    try:
+        result = subprocess.run(["dotnet", "--version"], capture_output=True, text=True, timeout=60)
+        return result.stdout.strip()
+    except Exception:
+        return ""
+
+
+def is_inherited_build_input(name: str) -> bool:
+    """Check whether a file name is a build input that applies to all directories below it."""
+    lower = name.lower()
+    return (lower in ("nuget.config", "global.json")
+            or lower.startswith("directory.build.") or lower.startswith("directory.packages."))
+
+
+def is_build_input(name: str) -> bool:
+    """Check whether a file name is one of the inputs of a build."""
+    lower = name.lower()
+    return (Path(lower).suffix in BUILD_INPUT_SUFFIXES or lower in BUILD_INPUT_NAMES
+            or is_inherited_build_input(lower))
+
+
+def hash_build_inputs(issue_dir: Path, repo_root: Path, dotnet_version: str) -> str:
+    """
+    Hash every build input of an issue directory, together with the inherited
+    Directory.Build.*/nuget.config files above it and the dotnet SDK version.
+    Returns: Hex digest identifying the inputs
+    """
+    input_files = []
+    for dirpath, dirnames, filenames in os.walk(issue_dir):
+        dirnames[:] = [d for d in dirnames if d not in BUILD_OUTPUT_DIRS]
+        input_files.extend(Path(dirpath) / name for name in filenames if is_build_input(name))
+    
+    for parent in issue_dir.parents:
+        if parent == repo_root.parent:
+            break
+        input_files.extend(f for f in parent.iterdir()
+                           if f.is_file() and is_inherited_build_input(f.name))
+    
+    digest = hashlib.sha256()
+    digest.update(dotnet_version.encode('utf-8'))
+    for input_file in sorted(input_files):
+        digest.update(b"\0" + input_file.relative_to(repo_root).as_posix().encode('utf-8') + b"\0")
+        digest.update(input_file.read_bytes())
+    return digest.hexdigest()
+
+
+def error_log_path(log_dir: Path, issue_name: str, rel_path: Path,
+                   log_format: Optional[Dict[str, Any]] = None) -> Path:
+    """
+    Return the log file of a project build, named as analyze-build-errors.py expects,
+    with the compression suffix of log_format (see parse_log_format()) if any.
+    """
+    # Create a safe filename from the project path
+    safe_project_name = str(rel_path).replace('\\', '_').replace('/', '_').replace(':', '_')
+    suffix = log_format["suffix"] if log_format else ""
+    return log_dir / f"{issue_name}_{safe_project_name}_error.txt{suffix}"
+
+
+def parse_log_format(compression: Optional[str], cap_kb: Optional[int]) -> Optional[Dict[str, Any]]:
+    """
+    Resolve the --compress-logs and --log-cap options: auto picks zstd when the
+    zstandard module is installed and gzip otherwise.
+    Returns: Log format with the file suffix and the cap in bytes, None for plain uncapped logs
+    """
+    if compression == "auto":
+        compression = "zstd" if zstandard is not None else "gzip"
+    if compression == "zstd" and zstandard is None:
+        raise ValueError("--compress-logs zstd needs the zstandard module (pip install zstandard)")
+    if not compression and not cap_kb:
+        return None
+    return {"suffix": LOG_COMPRESSION_SUFFIXES.get(compression, ""), "cap": cap_kb * 1024 if cap_kb else None}
+
+
+def log_header(issue_name: str, rel_path: Path) -> str:
+    """Return the header written at the top of a project's build log."""
+    return f"Project: {rel_path}\nIssue: {issue_name}\n{'=' * 80}\n\n"
+
+
+def check_build_cache(project_path: Path, issue_dir: Path, repo_root: Path,
+                      cache: Dict[str, Dict[str, Any]], dotnet_version: str,
+                      force: bool) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Look up a project in the build cache.
+    Returns: (cached build result or None on a miss, input hash)
+    """
+    rel_path = project_path.relative_to(repo_root)
+    try:
+        input_hash = hash_build_inputs(issue_dir, repo_root, dotnet_version)
+    except OSError:
+        input_hash = None
+    
+    entry = cache.get(rel_path.as_posix())
+    if not force and input_hash and entry and entry.get("hash") == input_hash:
+        return {"success": True, "exit_code": 0, "wall_time": 0.0, "cpu_user": None, "cpu_sys": None,
+                "peak_rss_kb": None, "errors": [], "tail": [], "timeout": None, "timed_out": False,
+                "stopped_early": False, "log": None, "cached": True, "hash": input_hash}, input_hash
+    return None, input_hash
+
+
+def build_with_cache(project_path: Path, issue_dir: Path, repo_root: Path,
+                     cache: Dict[str, Dict[str, Any]], dotnet_version: str, force: bool,
+                     log_dir: Path, fail_fast: bool, timeout: int,
+                     extra_args: Sequence[str] = (), scratch: Optional[Dict[str, Any]] = None,
+                     keep_scratch: bool = False, governor: Optional[Dict[str, Any]] = None,
+                     log_format: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Build a project unless the cache holds a green build of the same inputs.
+    The log of a green build is removed, only failures keep theirs.
+    With a scratch root (see open_scratch_root()), the build restores and builds into
+    its own scratch directory, which is removed afterwards unless keep_scratch is set
+    and the build is green (its output is then tested and removed by test_built_project()).
+    Returns: build_project() result, plus the log path, cached flag, input hash and scratch directory
+    """
+    cached, input_hash = check_build_cache(project_path, issue_dir, repo_root, cache, dotnet_version, force)
+    if cached:
+        return cached
+    
+    rel_path = project_path.relative_to(repo_root)
+    log_path = error_log_path(log_dir, issue_dir.name, rel_path, log_format)
+    scratch_dir = claim_scratch_dir(scratch, issue_dir.name) if scratch else None
+    build = build_project(project_path, log_path, log_header(issue_dir.name, rel_path),
+                          timeout=timeout, fail_fast=fail_fast,
+                          extra_args=[*extra_args, *scratch_args(scratch_dir)], restore=scratch_dir is not None,
+                          governor=governor, log_cap=log_format["cap"] if log_format else None)
+    if build["success"]:
+        remove_build_logs(log_path)
+        log_path = None
+    if scratch_dir and not (keep_scratch and build["success"]):
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+        scratch_dir = None
+    return {**build, "log": log_path, "cached": False, "hash": input_hash, "scratch": scratch_dir}
+
+
+def msbuild_escape(value: str) -> str:
+    """Returns: value with the characters MSBuild gives a meaning in item specs escaped as %XX"""
+    return "".join(f"%{ord(char):02X}" if char in MSBUILD_SPECIAL_CHARACTERS else char for char in value)
+
+
+def write_traversal_project(traversal_path: Path, project_paths: List[Path]):
+    """
+    Write an MSBuild project that builds all the given projects in one invocation.
+    Paths are MSBuild-escaped, then quoted as XML attributes, so that any file name
+    is taken literally.
+    """
+    items = "\n".join(f'    <BatchProject Include={quoteattr(msbuild_escape(str(project_path)))} />'
+                       for project_path in project_paths)
+    traversal_path.write_text(f"""<Project>
+  <ItemGroup>
+{items}
+  </ItemGroup>
+  <Target Name="Build">
+    <MSBuild Projects="@(BatchProject)" Targets="Build" BuildInParallel="true" StopOnFirstFailure="false" />
+  </Target>
+</Project>
+""", encoding='utf-8')
+
+
+def batch_member_for(diagnostic_project: str, members: List[Path]) -> Optional[Path]:
+    """
+    Find the batch member a diagnostic belongs to: the project itself, or the
+    solution with the deepest directory containing the project.
+    """
+    project = Path(os.path.normcase(diagnostic_project.strip()))
+    best, best_depth = None, -1
+    for member in members:
+        member_norm = Path(os.path.normcase(str(member)))
+        if project == member_norm:
+            return member
+        if member.suffix == ".sln" and member_norm.parent in project.parents:
+            depth = len(member_norm.parent.parts)
+            if depth > best_depth:
+                best, best_depth = member, depth
+    return best
+
+
+def output_member_for(project_name: str, output_path: str, members: List[Path]) -> Optional[Path]:
+    """
+    Find the batch member a project output line belongs to: the member with the
+    deepest directory containing the output, or else the project of the same name.
+    """
+    output = Path(os.path.normcase(output_path.strip()))
+    best, best_depth = None, -1
+    for member in members:
+        member_dir = Path(os.path.normcase(str(member.parent)))
+        if member_dir in output.parents and len(member_dir.parts) > best_depth:
+            best, best_depth = member, len(member_dir.parts)
+    if best is None:
+        best = next((member for member in members
+                     if member.suffix != ".sln" and member.stem.lower() == project_name.lower()), None)
+    return best
+
+
+def build_batch(batch: List[Tuple[str, Path, Optional[str]]], batch_path: Path, repo_root: Path,
+                log_dir: Path, timeouts: Dict[Path, int], governor: Optional[Dict[str, Any]] = None,
+                log_format: Optional[Dict[str, Any]] = None) -> Dict[Path, Dict[str, Any]]:
+    """
+    Build a group of projects in one MSBuild invocation through a generated
+    traversal project, with node reuse, then split the output back per project
+    using the project each diagnostic line is attributed to.
+    If the batch times out, or an error cannot be attributed, every member is
+    rebuilt on its own so the per-project outcome stays exact. So is a member
+    that left no trace in the output (no attributed line, no "Name -> output"
+    line), since the batch cannot tell that it was built at all.
+    The traversal project is removed afterwards, and so is the batch log unless
+    a member's failure log refers to it.
+    Returns: Dictionary mapping each project path to its build_with_cache()-style result
+    """
+    members = [project_path for _, project_path, _ in batch]
+    issues = {project_path: issue_name for issue_name, project_path, _ in batch}
+    hashes = {project_path: input_hash for _, project_path, input_hash in batch}
+    
+    write_traversal_project(batch_path, members)
+    batch_log = batch_path.with_suffix(".log")
+    try:
+        batch_build = build_project(batch_path, batch_log, timeout=sum(timeouts[m] for m in members),
+                                    extra_args=["-nodeReuse:true"], governor=governor)
+    finally:
+        batch_path.unlink(missing_ok=True)
+    
+    lines = {member: [] for member in members}
+    produced = set()
+    unattributed_error = batch_build["timed_out"] or batch_build["exit_code"] is None
+    with open(batch_log, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            match = DIAGNOSTIC_PROJECT_PATTERN.search(line)
+            member = batch_member_for(match.group(1), members) if match else None
+            output = PROJECT_OUTPUT_PATTERN.match(line) if member is None else None
+            if member:
+                lines[member].append(line.rstrip('\n'))
+                produced.add(member)
+            elif output:
+                member = output_member_for(output.group(1), output.group(2), members)
+                if member:
+                    produced.add(member)
+            elif CANONICAL_ERROR_PATTERN.search(line):
+                unattributed_error = True
+    
+    failed = {member for member in members
+              if any(CANONICAL_ERROR_PATTERN.search(line) for line in lines[member])}
+    if batch_build["exit_code"] != 0 and not failed:
+        unattributed_error = True
+    
+    outcomes = {}
+    for member in members:
+        rel_path = member.relative_to(repo_root)
+        if unattributed_error or member not in produced:
+            log_path = error_log_path(log_dir, issues[member], rel_path, log_format)
+            build = build_project(member, log_path, log_header(issues[member], rel_path),
+                                  timeout=timeouts[member], governor=governor,
+                                  log_cap=log_format["cap"] if log_format else None)
+            if build["success"]:
+                remove_build_logs(log_path)
+                log_path = None
+            outcomes[member] = {**build, "log": log_path, "cached": False, "hash": hashes[member]}
+            continue
+        
+        success = member not in failed
+        log_path = None
+        if not success:
+            log_path = error_log_path(log_dir, issues[member], rel_path, log_format)
+            with open_log_file(log_path) as log_file:
+                log = capped_log(log_file, log_format["cap"] if log_format else None)
+                write_log(log, log_header(issues[member], rel_path))
+                write_log(log, f"STDOUT:\n{'-' * 80}\n")
+                write_log(log, "\n".join(lines[member]))
+                write_log(log, f"\n\n(Built in a batch, full output in {batch_log})\n")
+                finish_log(log)
+        outcomes[member] = {
+            "success": success,
+            "exit_code": 0 if success else batch_build["exit_code"],
+            "wall_time": batch_build["wall_time"] / len(members),
+            "cpu_user": None,
+            "cpu_sys": None,
+            "peak_rss_kb": None,
+            "errors": (canonical_errors(lines[member])
+                       or [line.strip() for line in lines[member] if ERROR_LINE_PATTERN.search(line)][:MAX_ERROR_LINES]),
+            "tail": lines[member][-OUTPUT_TAIL_LINES:],
+            "timeout": None,
+            "timed_out": False,
+            "stopped_early": False,
+            "batched": True,
+            "log": log_path,
+            "cached": False,
+            "hash": hashes[member]
+        }
+    
+    if all(outcome["success"] or not outcome.get("batched") for outcome in outcomes.values()):
+        remove_build_logs(batch_log)
+    return outcomes
+
+
+def submit_batches(executor: ThreadPoolExecutor, jobs: List[Tuple[str, Path, float]], batch_size: int,
+                   repo_root: Path, cache: Dict[str, Dict[str, Any]], dotnet_version: str, force: bool,
+                   log_dir: Path, timeouts: Dict[Path, int], governor: Optional[Dict[str, Any]] = None,
+                   log_format: Optional[Dict[str, Any]] = None) -> Dict[Path, Future]:
+    """
+    Check the cache for every job, then submit the misses in batches of batch_size.
+    Returns: Dictionary mapping each project path to a future of its own result
+    """
+    builds = {}
+    pending = []
+    for issue_name, project_path, _ in jobs:
+        if project_path in builds:
+            continue
+        builds[project_path] = Future()
+        cached, input_hash = check_build_cache(project_path, repo_root / issue_name, repo_root,
+                                               cache, dotnet_version, force)
+        if cached:
+            builds[project_path].set_result(cached)
+        else:
+            pending.append((issue_name, project_path, input_hash))
+    
+    batch_dir = repo_root / STATE_DIR_NAME / "batches"
+    batch_dir.mkdir(parents=True, exist_ok=True)
+    
+    def distribute(batch: List[Tuple[str, Path, Optional[str]]]) -> Callable[[Future], None]:
+        def on_done(future: Future):
+            for _, project_path, _ in batch:
+                if future.exception():
+                    builds[project_path].set_exception(future.exception())
+                else:
+                    builds[project_path].set_result(future.result()[project_path])
+        return on_done
+    
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    if batches:
+        print(f"Building {len(pending)} projects in {len(batches)} batches of up to {batch_size}")
+    for number, batch in enumerate(batches, 1):
+        future = executor.submit(build_batch, batch, batch_dir / f"batch-{number}.proj", repo_root,
+                                 log_dir, timeouts, governor, log_format)
+        future.add_done_callback(distribute(batch))
+    return builds
+
+
+def read_solution_projects(solution_path: Path) -> List[Path]:
+    """
+    Read the project files a solution references (solution folders left out).
+    Returns: Project file paths, resolved against the solution directory
+    """
+    try:
+        content = solution_path.read_text(encoding='utf-8-sig', errors='ignore')
+    except OSError:
+        return []
+    projects = []
+    for match in SOLUTION_PROJECT_PATTERN.finditer(content):
+        rel_path = match.group(1).replace('\\', '/')
+        if rel_path.endswith((".csproj", ".fsproj", ".vbproj")):
+            projects.append(Path(os.path.normpath(solution_path.parent / rel_path)))
+    return projects
+
+
+def find_test_projects(project_path: Path) -> List[Path]:
+    """
+    Find the test projects covered by a built project: the project itself, or for
+    a solution the test projects it references.
+    Returns: Sorted list of project files referencing the test SDK
+    """
+    candidates = read_solution_projects(project_path) if project_path.suffix == ".sln" else [project_path]
+    
+    test_projects = []
+    for candidate in candidates:
+        try:
+            if TEST_PROJECT_PATTERN.search(candidate.read_text(encoding='utf-8', errors='ignore')):
+                test_projects.append(candidate)
+        except OSError:
+            continue
+    return sorted(test_projects)
+
+
+def read_trx_counters(trx_path: Path) -> Optional[Dict[str, int]]:
+    """
+    Read the result counters (total, executed, passed, failed, error, ...) of a TRX file.
+    Returns: Dictionary of counters, or None if the file is missing or unreadable
+    """
+    try:
+        root = ElementTree.parse(trx_path).getroot()
+    except (OSError, ElementTree.ParseError):
+        return None
+    counters = root.find("trx:ResultSummary/trx:Counters", TRX_NAMESPACE)
+    if counters is None:
+        return None
+    return {name: int(value) for name, value in counters.attrib.items() if value.isdigit()}
+
+
+def test_project(test_project_path: Path, issue_name: str, repo_root: Path, log_dir: Path,
+                 no_build: bool, timeout: int, framework: Optional[str] = None,
+                 scratch_dir: Optional[Path] = None, governor: Optional[Dict[str, Any]] = None,
+                 log_format: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Run the tests of a project with dotnet test and a TRX logger, and judge the run from
+    the TRX file: it passes only if tests executed and none failed, errored or timed out.
+    With framework, only that target framework is tested. With scratch_dir, bin/obj
+    are looked up (or, without no_build, restored and built) in that scratch directory.
+    The console log is kept in log_dir unless the run passes.
+    Returns: Dictionary with project (relative to the issue, as in the test result files),
+             test_result ("success" or "fail"), counters, wall_time and log
+    """
+    issue_dir = repo_root / issue_name
+    rel_path = test_project_path.relative_to(repo_root)
+    results_dir = repo_root / STATE_DIR_NAME / "test-results" / issue_name
+    results_dir.mkdir(parents=True, exist_ok=True)
+    trx_path = results_dir / error_log_path(results_dir, issue_name, rel_path).name.replace("_error.txt", ".trx")
+    trx_path.unlink(missing_ok=True)
+    
+    log_name = error_log_path(log_dir, issue_name, rel_path, log_format).name
+    log_path = log_dir / log_name.replace("_error.txt", "_test.txt")
+    extra_args = ["--logger", f"trx;LogFileName={trx_path.name}", "--results-directory", str(results_dir)]
+    if no_build:
+        extra_args.append("--no-build")
+    if framework:
+        extra_args.extend(["-f", framework])
+    run = build_project(test_project_path, log_path, log_header(issue_name, rel_path),
+                        timeout=timeout, extra_args=[*extra_args, *scratch_args(scratch_dir)], command="test",
+                        restore=scratch_dir is not None and not no_build, governor=governor,
+                        log_cap=log_format["cap"] if log_format else None)
+    
+    counters = read_trx_counters(trx_path)
+    passed = (counters is not None and counters.get("executed", 0) > 0
+              and not any(counters.get(name, 0) for name in ("failed", "error", "timeout", "aborted")))
+    if passed:
+        remove_build_logs(log_path)
+    return {
+        "project": str(PureWindowsPath(test_project_path.relative_to(issue_dir))),
+        "test_result": "success" if passed else "fail",
+        "counters": counters,
+        "wall_time": run["wall_time"],
+        "log": None if passed else log_path
+    }
+
+
+def test_result_issue_name(issue_name: str) -> str:
+    """Return the issue name used in the test result files (Issue0001 -> Issue1, Issue4413And3936 -> Issue4413)."""
+    match = re.match(r'Issue(\d+)', issue_name)
+    return f"Issue{int(match.group(1))}" if match else issue_name
+
+
+def update_test_result_files(repo_root: Path, issue_name: str, outcome: Dict[str, Any]):
+    """
+    Record a test outcome in test-passes.json or test-fails.json, removing the
+    previous outcome of the same project from both files.
+    """
+    entry = {
+        "issue": test_result_issue_name(issue_name),
+        "project": outcome["project"],
+        "last_run": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "test_result": outcome["test_result"]
+    }
+    for test_result, file_name in TEST_RESULT_FILES.items():
+        path = repo_root / file_name
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = json.load(f).get("test_results", [])
+        except (OSError, ValueError):
+            entries = []
+        kept = [e for e in entries if (e.get("issue"), e.get("project")) != (entry["issue"], entry["project"])]
+        if test_result == entry["test_result"]:
+            kept.append(entry)
+        elif len(kept) == len(entries):
+            continue
+        kept.sort(key=lambda e: (e.get("issue", ""), e.get("project", "")))
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"test_results": kept}, f, indent=2)
+        os.replace(tmp_path, path)
+
+
+def test_built_project(build: Dict[str, Any], project_path: Path, issue_name: str, repo_root: Path,
+                       log_dir: Path, timeout: int, tracker: Dict[str, Any],
+                       framework: Optional[str] = None,
+                       scratch: Optional[Dict[str, Any]] = None, governor: Optional[Dict[str, Any]] = None,
+                       log_format: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Run the tests of a green build, each test project once per run, and record every
+    outcome in the test result files as soon as it is known.
+    A cached build is tested with an incremental build, as its output may be gone;
+    with a scratch root, into a scratch directory of its own.
+    The scratch directory of the build is removed once its tests are done.
+    Returns: List of test outcomes (see test_project())
+    """
+    with tracker["lock"]:
+        test_projects = [p for p in find_test_projects(project_path) if p not in tracker["claimed"]]
+        tracker["claimed"].update(test_projects)
+    
+    outcomes = []
+    try:
+        for test_project_path in test_projects:
+            scratch_dir = build.get("scratch")
+            if build["cached"] and scratch:
+                scratch_dir = claim_scratch_dir(scratch, issue_name)
+            try:
+                outcome = test_project(test_project_path, issue_name, repo_root, log_dir,
+                                       not build["cached"], timeout, framework, scratch_dir, governor,
+                                       log_format)
+            finally:
+                if scratch_dir and scratch_dir != build.get("scratch"):
+                    shutil.rmtree(scratch_dir, ignore_errors=True)
+            with tracker["lock"]:
+                update_test_result_files(repo_root, issue_name, outcome)
+            outcomes.append(outcome)
+    finally:
+        if build.get("scratch"):
+            shutil.rmtree(build["scratch"], ignore_errors=True)
+    return outcomes
+
+
+def print_test_summary(outcomes: List[Tuple[str, Dict[str, Any]]]):
+    """Print the TEST SUMMARY of a --test run and the details of the failed test projects."""
+    failed = [(issue_name, outcome) for issue_name, outcome in outcomes if outcome["test_result"] != "success"]
+    print("\n" + "=" * 80)
+    print("TEST SUMMARY")
+    print("=" * 80)
+    print(f"Total test projects run: {len(outcomes)}")
+    print(f"  [OK] Passed: {len(outcomes) - len(failed)}")
+    print(f"  [FAIL] Failed: {len(failed)}")
+    for issue_name, outcome in sorted(failed, key=lambda item: (item[0], item[1]["project"])):
+        counters = outcome["counters"]
+        if counters is None:
+            detail = "no test results"
+        elif not counters.get("executed"):
+            detail = "no tests executed"
+        else:
+            detail = f"{counters.get('failed', 0)} of {counters.get('total', 0)} tests failed"
+        print(f"\n  [{issue_name}] {outcome['project']}: {detail}")
+        print(f"  Log: {outcome['log']}")
+    print(f"\nTest results written to: {', '.join(TEST_RESULT_FILES.values())}")
+
+
+def normalize_nuget_version(version: str) -> str:
+    """Normalize a NuGet version the way package folders are named (1.0 -> 1.0.0, lowercase)."""
+    version = version.strip().split('+')[0].lower()
+    release, dash, label = version.partition('-')
+    parts = release.split('.')
+    while len(parts) < 3:
+        parts.append('0')
+    if len(parts) == 4 and parts[3] == '0':
+        parts = parts[:3]
+    return '.'.join(parts) + dash + label
+
+
+def lowest_version_in_range(version_range: str) -> Optional[str]:
+    """
+    Return the version NuGet picks for a dependency range (its inclusive lower bound),
+    or None if the range has no fixed lowest version.
+    """
+    version_range = version_range.strip()
+    if not version_range or '*' in version_range or '$' in version_range:
+        return None
+    if version_range[0] in '[(':
+        lower = version_range[1:].split(',')[0].strip(' ])')
+        if version_range[0] == '(' or not lower:
+            return None
+        return normalize_nuget_version(lower)
+    return normalize_nuget_version(version_range)
+
+
+def read_package_references(project_file: Path) -> Set[Tuple[str, str]]:
+    """Read the PackageReference items of a project file that pin a version."""
+    packages = set()
+    try:
+        root = ElementTree.parse(project_file).getroot()
+    except (OSError, ElementTree.ParseError):
+        return packages
+    for element in root.iter():
+        if not element.tag.endswith("PackageReference"):
+            continue
+        name = element.get("Include") or element.get("Update")
+        version = element.get("Version")
+        if version is None:
+            child = next((c for c in element if c.tag.endswith("Version")), None)
+            version = child.text if child is not None else None
+        version = lowest_version_in_range(version or "")
+        if name and version:
+            packages.add((name.lower(), version))
+    return packages
+
+
+def read_implicit_packages(project_file: Path) -> Set[Tuple[str, str]]:
+    """
+    Read the packages the .NET SDK adds to a project without a PackageReference:
+    the .NET Framework reference assemblies, for SDK-style projects targeting net4x.
+    """
+    try:
+        content = project_file.read_text(encoding='utf-8', errors='ignore')
+    except OSError:
+        return set()
+    if not SDK_PROJECT_PATTERN.search(content):
+        return set()
+    if any(NET_FRAMEWORK_TFM_PATTERN.match(tfm) for tfm in read_project_frameworks(project_file)):
+        return {REFERENCE_ASSEMBLIES_PACKAGE}
+    return set()
+
+
+def collect_packages(project_files: Iterable[Path], issue_dirs: Iterable[Path]) -> Tuple[Set[Tuple[str, str]], Set[Path]]:
+    """
+    Collect the unique (package id, version) pairs referenced by the projects to restore,
+    from the project files below them (explicit and implicit SDK references) and the
+    packages recorded in issue_results.json.
+    Projects with a packages.config below them cannot be restored from the local feed
+    alone (the packages they list are not collected), and are returned separately.
+    Returns: Tuple of (set of lowercase ids with normalized versions,
+             project files to restore from the configured package sources)
+    """
+    packages = set()
+    online_projects = set()
+    for project_file in project_files:
+        for dirpath, dirnames, filenames in os.walk(project_file.parent):
+            dirnames[:] = [d for d in dirnames if d not in BUILD_OUTPUT_DIRS]
+            for name in filenames:
+                if name.endswith((".csproj", ".fsproj", ".vbproj")):
+                    packages |= read_package_references(Path(dirpath) / name)
+                    packages |= read_implicit_packages(Path(dirpath) / name)
+                elif name.lower() == "packages.config":
+                    online_projects.add(project_file)
+    
+    for issue_dir in issue_dirs:
+        try:
+            with open(issue_dir / "issue_results.json", 'r', encoding='utf-8-sig') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for entry in entries if isinstance(entries, list) else []:
+            for package in entry.get("packages") or []:
+                name, _, version = package.partition('=')
+                version = lowest_version_in_range(version)
+                if name and version:
+                    packages.add((name.lower(), version))
+    return packages, online_projects
+
+
+def read_nupkg_dependencies(nupkg_path: Path) -> Set[Tuple[str, str]]:
+    """Read the dependencies of a package (all target framework groups) from its nuspec."""
+    dependencies = set()
+    with zipfile.ZipFile(nupkg_path) as nupkg:
+        nuspec_name = next(n for n in nupkg.namelist() if n.endswith(".nuspec") and "/" not in n)
+        root = ElementTree.fromstring(nupkg.read(nuspec_name))
+    for element in root.iter():
+        if element.tag.endswith("dependency") and element.get("id"):
+            version = lowest_version_in_range(element.get("version") or "")
+            if version:
+                dependencies.add((element.get("id").lower(), version))
+    return dependencies
+
+
+def fetch_package(package: Tuple[str, str], feed_dir: Path) -> str:
+    """
+    Put one package into the local feed, from the NuGet global packages folder if
+    it is there and from nuget.org otherwise.
+    Returns: Where the package came from ("feed", "cache" or "download")
+    """
+    name, version = package
+    target = feed_dir / f"{name}.{version}.nupkg"
+    if target.exists():
+        return "feed"
+    
+    global_packages = Path(os.environ.get("NUGET_PACKAGES", Path.home() / ".nuget" / "packages"))
+    cached = global_packages / name / version / f"{name}.{version}.nupkg"
+    tmp_path = target.with_suffix(".tmp")
+    if cached.exists():
+        tmp_path.write_bytes(cached.read_bytes())
+        source = "cache"
+    else:
+        url = f"{NUGET_FLAT_CONTAINER_URL}/{name}/{version}/{name}.{version}.nupkg"
+        with urllib.request.urlopen(url, timeout=120) as response, open(tmp_path, 'wb') as f:
+            while True:
+                chunk = response.read(1 << 16)
+                if not chunk:
+                    break
+                f.write(chunk)
+        source = "download"
+    os.replace(tmp_path, target)
+    return source
+
+
+def populate_local_feed(packages: Set[Tuple[str, str]], feed_dir: Path, jobs: int) -> Dict[str, Any]:
+    """
+    Fill a local folder feed with the given packages and all their dependencies,
+    each unique id/version fetched once and in parallel. Dependencies resolve to
+    the lowest version of their range, as NuGet does.
+    Returns: Dictionary with per-source counts and the packages that could not be fetched
+    """
+    feed_dir.mkdir(parents=True, exist_ok=True)
+    counts = defaultdict(int)
+    missing = []
+    seen = set(packages)
+    wave = sorted(packages)
+    with ThreadPoolExecutor(max_workers=max(jobs, 8)) as executor:
+        while wave:
+            next_wave = set()
+            fetches = {package: executor.submit(fetch_package, package, feed_dir) for package in wave}
+            for package, future in fetches.items():
+                try:
+                    counts[future.result()] += 1
+                    next_wave |= read_nupkg_dependencies(feed_dir / f"{package[0]}.{package[1]}.nupkg")
+                except Exception as e:
+                    missing.append((package, str(e)))
+            wave = sorted(next_wave - seen)
+            seen |= next_wave
+    return {"counts": dict(counts), "missing": missing}
+
+
+def restore_project(project_path: Path, feed_dir: Path, offline: bool = True) -> Tuple[bool, str]:
+    """
+    Restore a project against the local feed only, so no network access is made,
+    or against its configured package sources when offline is not set.
+    Returns: (success, last lines of the output)
+    """
+    sources = ["--source", str(feed_dir)] if offline else []
+    try:
+        result = subprocess.run(
+            ["dotnet", "restore", str(project_path), *sources, "-p:NuGetAudit=false"],
+            cwd=project_path.parent,
+            capture_output=True,
+            text=True,
+            timeout=300
+        )
+    except subprocess.TimeoutExpired:
+        return False, "Restore timed out after 300 seconds"
+    except Exception as e:
+        return False, str(e)
+    output_lines = [line for line in result.stdout.splitlines() if ERROR_LINE_PATTERN.search(line)]
+    if result.returncode != 0 and not output_lines:
+        output_lines = (result.stdout + result.stderr).strip().splitlines()[-5:]
+    return result.returncode == 0, "\n".join(output_lines[:5])
+
+
+def run_restore(plan: List[Dict[str, Any]], repo_root: Path, jobs: int) -> Dict[Path, str]:
+    """
+    Restore every project of the plan: fill the local feed once with the unique
+    package set of all selected issues, then restore the projects in parallel
+    against that feed only. Projects using packages.config are restored from
+    their configured package sources instead.
+    Returns: Dictionary mapping the project files that failed to restore to their restore output
+    """
+    project_files = [project["path"] for entry in plan for project in entry["projects"] if project["exists"]]
+    issue_dirs = [repo_root / entry["issue"] for entry in plan if entry["projects"]]
+    feed_dir = repo_root / STATE_DIR_NAME / "feed"
+    
+    print("\n" + "=" * 80)
+    print("RESTORE")
+    print("=" * 80)
+    packages, online_projects = collect_packages(project_files, issue_dirs)
+    print(f"{len(packages)} unique package versions referenced by {len(project_files)} projects")
+    if online_projects:
+        print(f"{len(online_projects)} projects use packages.config and are restored from their package sources")
+    feed = populate_local_feed(packages, feed_dir, jobs)
+    counts = feed["counts"]
+    print(f"Local feed {feed_dir}: {counts.get('feed', 0)} present, "
+          f"{counts.get('cache', 0)} copied from the NuGet cache, {counts.get('download', 0)} downloaded")
+    for (name, version), error in feed["missing"]:
+        print(f"  [FAIL] {name} {version}: {error}")
+    
+    def restore_issue(issue_projects: List[Path]) -> List[Tuple[bool, str]]:
+        # Solutions of one issue may share projects, so they are restored one after another
+        return [restore_project(project_file, feed_dir, project_file not in online_projects)
+                for project_file in issue_projects]
+    
+    failed = {}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        restores = [(issue_projects, executor.submit(restore_issue, issue_projects))
+                    for issue_projects in ([p["path"] for p in entry["projects"] if p["exists"]] for entry in plan)
+                    if issue_projects]
+        for issue_projects, future in restores:
+            for project_file, (success, output) in zip(issue_projects, future.result()):
+                if success:
+                    continue
+                failed[project_file] = output or f"Restore failed: {project_file}"
+                print(f"  [FAIL] Restore failed: {project_file.relative_to(repo_root)}")
+                for line in output.splitlines():
+                    print(f"    {line}")
+    print(f"Restored {len(project_files) - len(failed)}/{len(project_files)} projects")
+    return failed
+
+
+def load_json_projects(json_path: Path) -> Dict[str, List[str]]:
+    """
+    Load project paths from JSON file.
+    Returns: Dictionary mapping issue names to list of project paths
+    """
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        projects_by_issue = defaultdict(list)
+        for item in data.get('failed_builds', []):
+            issue = item.get('issue', '')
+            project = item.get('project', '')
+            if issue and project:
+                projects_by_issue[issue].append(project)
+        
+        return dict(projects_by_issue)
+    except Exception as e:
+        print(f"Error loading JSON file {json_path}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def plan_json_builds(repo_root: Path, json_projects: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+    """
+    Resolve the projects listed in a JSON file into an ordered build plan.
+    Returns: List of issue entries, each with its status and projects
+    """
+    plan = []
+    for issue_name, project_paths in sorted(json_projects.items()):
+        issue_dir = repo_root / issue_name
+        if not issue_dir.exists():
+            plan.append({"issue": issue_name, "status": "not_found", "projects": []})
+            continue
+        
+        projects = []
+        for project_path_str in project_paths:
+            # Convert Windows path separators if needed
+            project_path = repo_root / project_path_str.replace('\\', os.sep)
+            projects.append({
+                "name": project_path_str,
+                "path": project_path,
+                "exists": project_path.exists()
+            })
+        plan.append({"issue": issue_name, "status": None, "projects": projects})
+    
+    return plan
+
+
+def plan_all_builds(repo_root: Path, issue_dirs: List[Path]) -> List[Dict[str, Any]]:
+    """
+    Discover the projects of every issue directory into an ordered build plan.
+    Returns: List of issue entries, each with its status and projects
+    """
+    index = load_discovery_index(repo_root, issue_dirs)
+    
+    plan = []
+    for issue_dir in issue_dirs:
+        issue_name = issue_dir.name
+        entry = index[issue_name]
+        # Check for ignore markers
+        if entry["markers"]:
+            plan.append({"issue": issue_name, "status": "skipped", "projects": []})
+            continue
+        
+        # Find project files
+        project_files = project_files_from_index(issue_dir, entry)
+        if not project_files:
+            plan.append({"issue": issue_name, "status": "no_project", "projects": []})
+            continue
+        
+        projects = [{"name": str(project_file), "path": project_file, "exists": True}
+                    for project_file in project_files]
+        plan.append({"issue": issue_name, "status": None, "projects": projects})
+    
+    return plan
+
+
+def read_project_frameworks(project_file: Path) -> List[str]:
+    """
+    Read the target frameworks of a project file, from TargetFramework(s) or, for
+    classic projects, TargetFrameworkVersion (v4.7.2 -> net472).
+    Returns: Lowercase framework monikers, empty if none is set literally
+    """
+    try:
+        content = project_file.read_text(encoding='utf-8', errors='ignore')
+    except OSError:
+        return []
+    match = TARGET_FRAMEWORKS_PATTERN.search(content)
+    if match:
+        return [tfm.strip().lower() for tfm in match.group(1).split(';') if tfm.strip() and '$' not in tfm]
+    match = TARGET_FRAMEWORK_VERSION_PATTERN.search(content)
+    return ["net" + match.group(1).replace('.', '')] if match else []
+
+
+def normalize_issue_state(state: Any) -> Optional[str]:
+    """Normalize an issue state as recorded by the IssueRunner (0/1 or Open/Closed) to open/closed."""
+    if state in (0, "0"):
+        return "open"
+    if state in (1, "1"):
+        return "closed"
+    return str(state).lower() if state else None
+
+
+def metadata_sources(issue_dir: Path, discovery_entry: Dict[str, Any], repo_root: Path) -> Dict[str, int]:
+    """Return the mtime of every file a metadata index entry is read from (missing files are left out)."""
+    paths = [issue_dir / name for name in ISSUE_METADATA_FILES]
+    paths += [issue_dir / rel_path for rel_path in discovery_entry["csproj"]]
+    paths.append(repo_root / ISSUE_RUNNER_DIR / "issues_metadata.json")
+    sources = {}
+    for path in paths:
+        try:
+            sources[str(path.relative_to(repo_root))] = path.stat().st_mtime_ns
+        except OSError:
+            continue
+    return sources
+
+
+def scan_issue_metadata(issue_dir: Path, discovery_entry: Dict[str, Any], repo_root: Path,
+                        runner_metadata: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Read what selection needs from an issue's metadata files and project files.
+    Labels and state come from issue_metadata.json, or else from the IssueRunner's
+    issues_metadata.json. Packages come from the project files, or else from issue_results.json.
+    Returns: Index entry with state, labels, packages ({lowercase id: [versions]}),
+             project styles, frameworks per project and the frameworks of issue_results.json
+    """
+    metadata = read_json_list(issue_dir / "issue_metadata.json")
+    if not metadata:
+        match = re.match(r'Issue(\d+)', issue_dir.name)
+        metadata = [runner_metadata[str(int(match.group(1)))]] if match and str(int(match.group(1))) in runner_metadata else []
+    results = read_json_list(issue_dir / "issue_results.json")
+    
+    packages = defaultdict(set)
+    projects = {}
+    for rel_path in discovery_entry["csproj"]:
+        projects[rel_path] = read_project_frameworks(issue_dir / rel_path)
+        for name, version in read_package_references(issue_dir / rel_path):
+            packages[name].add(version)
+    result_frameworks = set()
+    result_packages = defaultdict(set)
+    for entry in results:
+        frameworks = entry.get("target_frameworks") or []
+        result_frameworks.update(tfm.lower() for tfm in frameworks if isinstance(tfm, str))
+        for package in entry.get("packages") or []:
+            name, _, version = str(package).partition('=')
+            if name and version:
+                result_packages[name.lower()].add(version)
+    if not packages:
+        packages = result_packages
+    
+    return {
+        "sources": metadata_sources(issue_dir, discovery_entry, repo_root),
+        "state": normalize_issue_state(metadata[0].get("state")) if metadata else None,
+        "labels": sorted({label for entry in metadata for label in entry.get("labels") or []}),
+        "packages": {name: sorted(versions) for name, versions in packages.items()},
+        "styles": sorted({entry["project_style"] for entry in results if entry.get("project_style")}),
+        "projects": projects,
+        "result_frameworks": sorted(result_frameworks)
+    }
+
+
+def load_metadata_index(repo_root: Path) -> Dict[str, Dict[str, Any]]:
+    """
+    Load the persisted metadata index of all issues, rereading only the issues
+    whose metadata or project files changed since they were indexed.
+    Returns: Dictionary mapping issue names to their index entries (see scan_issue_metadata())
+    """
+    index_path = repo_root / STATE_DIR_NAME / "metadata-index.json"
+    stored = load_state_file(index_path)
+    issue_dirs = sorted(d for d in repo_root.iterdir() if d.is_dir() and d.name.startswith("Issue"))
+    discovery = load_discovery_index(repo_root, issue_dirs)
+    runner_metadata = None
+    
+    index = {}
+    changed = False
+    for issue_dir in issue_dirs:
+        entry = stored.get(issue_dir.name)
+        if entry is None or entry["sources"] != metadata_sources(issue_dir, discovery[issue_dir.name], repo_root):
+            if runner_metadata is None:
+                runner_metadata = {str(e.get("number")): e for e in
+                                   read_json_list(repo_root / ISSUE_RUNNER_DIR / "issues_metadata.json")}
+            entry = scan_issue_metadata(issue_dir, discovery[issue_dir.name], repo_root, runner_metadata)
+            changed = True
+        index[issue_dir.name] = entry
+    
+    if changed or set(stored) != set(index):
+        save_state_file(index_path, index)
+    return index
+
+
+def parse_package_selector(value: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """Parse a --package value: NAME, or NAME followed by <, <=, >, >=, = or != and a version."""
+    match = PACKAGE_SELECTOR_PATTERN.match(value)
+    if not match:
+        raise argparse.ArgumentTypeError(f"expected NAME or NAME<op>VERSION (e.g. NUnit3TestAdapter<5), got '{value}'")
+    return match.group(1).lower(), match.group(2), match.group(3)
+
+
+def version_key(version: str) -> Tuple[int, ...]:
+    """Turn the release part of a version into a comparable tuple (4.3 -> (4, 3, 0, 0))."""
+    numbers = [int(part) for part in re.findall(r'\d+', version.split('-')[0])[:4]]
+    return tuple(numbers + [0] * (4 - len(numbers)))
+
+
+def package_matches(packages: Dict[str, List[str]], selector: Tuple[str, Optional[str], Optional[str]]) -> bool:
+    """Check whether any referenced version of the selected package satisfies the selector."""
+    name, operator, version = selector
+    if name not in packages:
+        return False
+    if operator is None:
+        return True
+    wanted = version_key(version)
+    compare = {
+        "<": lambda v: v < wanted, "<=": lambda v: v <= wanted,
+        ">": lambda v: v > wanted, ">=": lambda v: v >= wanted,
+        "=": lambda v: v == wanted, "==": lambda v: v == wanted, "!=": lambda v: v != wanted
+    }[operator]
+    return any(compare(version_key(referenced)) for referenced in packages[name])
+
+
+def split_selector_values(values: Optional[List[str]]) -> List[str]:
+    """Flatten repeated and comma-separated selector values, lowercased."""
+    return [value.strip().lower() for item in values or [] for value in item.split(',') if value.strip()]
+
+
+def project_frameworks(project_path: Path, issue_dir: Path, entry: Dict[str, Any]) -> List[str]:
+    """
+    Return the indexed target frameworks of a plan project: its own, or for a solution
+    those of the projects below its directory. The frameworks recorded in
+    issue_results.json are used when no project sets one literally.
+    """
+    rel_path = project_path.relative_to(issue_dir).as_posix()
+    if project_path.suffix == ".sln":
+        prefix = "" if project_path.parent == issue_dir else project_path.parent.relative_to(issue_dir).as_posix() + "/"
+        frameworks = sorted({tfm for path, tfms in entry["projects"].items() if path.startswith(prefix) for tfm in tfms})
+    else:
+        frameworks = entry["projects"].get(rel_path, [])
+    return frameworks or entry["result_frameworks"]
+
+
+def select_plan(plan: List[Dict[str, Any]], index: Dict[str, Dict[str, Any]], repo_root: Path,
+                args: argparse.Namespace) -> Tuple[List[Dict[str, Any]], Dict[Path, str]]:
+    """
+    Keep the issues of a plan matching every given selector: one of the --label
+    patterns, one of the --state values, all --package constraints, and with
+    --tfm, the projects targeting one of the framework patterns.
+    A multi-targeted project file (not a solution) with exactly one matching
+    framework is built for that framework only.
+    Returns: The selected plan, and the framework to pass with -f per project path
+    """
+    tfms = split_selector_values(args.tfm)
+    labels = split_selector_values(args.label)
+    states = split_selector_values(args.state)
+    
+    selected = []
+    frameworks = {}
+    for entry in plan:
+        metadata = index.get(entry["issue"])
+        if metadata is None or not entry["projects"]:
+            continue
+        if labels and not any(fnmatch.fnmatch(label.lower(), pattern)
+                              for label in metadata["labels"] for pattern in labels):
+            continue
+        if states and metadata["state"] not in states:
+            continue
+        if not all(package_matches(metadata["packages"], selector) for selector in args.package or []):
+            continue
+        
+        if tfms:
+            projects = []
+            for project in entry["projects"]:
+                if not project["exists"]:
+                    continue
+                available = project_frameworks(project["path"], repo_root / entry["issue"], metadata)
+                matching = [tfm for tfm in available if any(fnmatch.fnmatch(tfm, pattern) for pattern in tfms)]
+                if not matching:
+                    continue
+                projects.append(project)
+                if project["path"].suffix != ".sln" and len(available) > 1 and len(matching) == 1:
+                    frameworks[project["path"]] = matching[0]
+            if not projects:
+                continue
+            entry = {**entry, "projects": projects}
+        selected.append(entry)
+    
+    return selected, frameworks
+
+
+def open_results_stream(results_path: Path) -> Dict[str, Any]:
+    """Start a new results stream, replacing the one of the previous run."""
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    return {"file": open(results_path, 'w', encoding='utf-8'), "lock": threading.Lock()}
+
+
+def write_stream_record(stream: Dict[str, Any], record: Dict[str, Any]):
+    """Append one record to the results stream and flush it."""
+    line = json.dumps(record) + "\n"
+    with stream["lock"]:
+        stream["file"].write(line)
+        stream["file"].flush()
+
+
+def write_result_record(stream: Dict[str, Any], issue_name: str, project: str, build: Dict[str, Any]):
+    """Append the outcome of one project build to the results stream."""
+    write_stream_record(stream, {
+        "issue": issue_name,
+        "project": project,
+        "success": build["success"],
+        "exit_code": build["exit_code"],
+        "wall_time": round(build["wall_time"], 3),
+        "cpu_user": build["cpu_user"],
+        "cpu_sys": build["cpu_sys"],
+        "peak_rss_kb": build["peak_rss_kb"],
+        "timed_out": build["timed_out"],
+        "cached": build["cached"],
+        "log": str(build["log"]) if build["log"] else None,
+        "errors": build["errors"],
+        "tail": [] if build["success"] else build["tail"]
+    })
+
+
+def finish_issue(issue_name: str, status: str, projects: List[str], results: Dict[str, List[str]],
+                 stream: Dict[str, Any]):
+    """
+    Count an issue in its result class and append an issue record to the results stream,
+    so that merge can rebuild the summary of a sharded sweep from the streams alone.
+    """
+    results[status].append(issue_name)
+    write_stream_record(stream, {"issue": issue_name, "status": status, "projects": projects})
+
+
+def record_build_history(history: Dict[str, List[Dict[str, Any]]], project: str,
+                         build: Dict[str, Any], mode: str) -> Dict[str, Any]:
+    """
+    Append the cost of a build to the project's history, keeping the last HISTORY_SAMPLES.
+    mode is the build mode of the sample (see build_mode()).
+    Returns: Profile entry with the new sample and the previous one (None for a first build)
+    """
+    samples = history.setdefault(project, [])
+    previous = samples[-1] if samples else None
+    sample = {
+        "when": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "mode": mode,
+        "success": build["success"],
+        "timed_out": build["timed_out"],
+        "wall_time": round(build["wall_time"], 3),
+        "cpu_user": build["cpu_user"],
+        "cpu_sys": build["cpu_sys"],
+        "peak_rss_kb": build["peak_rss_kb"]
+    }
+    samples.append(sample)
+    del samples[:-HISTORY_SAMPLES]
+    return {"project": project, **sample, "previous": previous}
+
+
+def print_build_profile(profile: List[Dict[str, Any]], top: int):
+    """Print the most expensive builds of the run, compared with their previous run."""
+    print("\n" + "=" * 80)
+    print(f"BUILD PROFILE (top {top} by wall time)")
+    print("=" * 80)
+    print(f"{'Project':<44} {'Wall s':>8} {'CPU s':>8} {'RSS MB':>8} {'vs prev':>9}")
+    print("-" * 80)
+    for entry in sorted(profile, key=lambda e: e["wall_time"], reverse=True)[:top]:
+        cpu = (entry["cpu_user"] or 0) + (entry["cpu_sys"] or 0)
+        rss = f"{entry['peak_rss_kb'] / 1024:.0f}" if entry["peak_rss_kb"] else "-"
+        previous = entry["previous"]
+        if previous and previous["wall_time"]:
+            change = f"{(entry['wall_time'] - previous['wall_time']) / previous['wall_time']:+.0%}"
+        else:
+            change = "new"
+        print(f"{entry['project'][-44:]:<44} {entry['wall_time']:>8.1f} {cpu:>8.1f} {rss:>8} {change:>9}")
+    
+    total_wall = sum(e["wall_time"] for e in profile)
+    total_cpu = sum((e["cpu_user"] or 0) + (e["cpu_sys"] or 0) for e in profile)
+    print("-" * 80)
+    print(f"{len(profile)} builds, {total_wall:.1f} s wall time, {total_cpu:.1f} s CPU time")
+
+
+def load_issue_build_times(issue_dir: Path) -> Dict[str, float]:
+    """
+    Read the build times recorded in an issue's issue_results.json.
+    Returns: Dictionary mapping project paths (relative to the issue, '/' separated) to seconds
+    """
+    try:
+        with open(issue_dir / "issue_results.json", 'r', encoding='utf-8-sig') as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    
+    times = {}
+    for entry in entries if isinstance(entries, list) else []:
+        match = TIME_ELAPSED_PATTERN.search(entry.get("build_output") or "")
+        if match and entry.get("project_path"):
+            hours, minutes, seconds = match.groups()
+            times[entry["project_path"].replace('\\', '/')] = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    return times
+
+
+def count_target_frameworks(project_dir: Path) -> int:
+    """Count the target frameworks of all project files below a directory (at least 1)."""
+    total = 0
+    for dirpath, dirnames, filenames in os.walk(project_dir):
+        dirnames[:] = [d for d in dirnames if d not in BUILD_OUTPUT_DIRS]
+        for name in filenames:
+            if name.endswith((".csproj", ".fsproj", ".vbproj")):
+                try:
+                    content = (Path(dirpath) / name).read_text(encoding='utf-8', errors='ignore')
+                except OSError:
+                    continue
+                match = TARGET_FRAMEWORKS_PATTERN.search(content)
+                total += len([tfm for tfm in match.group(1).split(';') if tfm.strip()]) if match else 1
+    return max(total, 1)
+
+
+def estimate_build_cost(project_path: Path, issue_dir: Path, history: Dict[str, List[Dict[str, Any]]],
+                        issue_times: Dict[str, float], repo_root: Path) -> float:
+    """
+    Estimate how long a project takes to build, in seconds.
+    Uses the median of its recorded builds, else the times in issue_results.json
+    for the projects it covers, else a guess from its project and target framework count.
+    """
+    samples = [sample["wall_time"] for sample in history.get(project_path.relative_to(repo_root).as_posix(), [])
+               if not sample.get("timed_out")]
+    if samples:
+        return statistics.median(samples)
+    
+    rel_path = project_path.relative_to(issue_dir).as_posix()
+    if project_path.suffix == ".sln":
+        prefix = "" if project_path.parent == issue_dir else project_path.parent.relative_to(issue_dir).as_posix() + "/"
+        recorded = [seconds for path, seconds in issue_times.items() if path.startswith(prefix)]
+    else:
+        recorded = [issue_times[rel_path]] if rel_path in issue_times else []
+    if recorded:
+        return sum(recorded)
+    
+    project_dir = project_path.parent
+    if project_path.suffix == ".sln":
+        return BASE_BUILD_SECONDS + PER_TARGET_FRAMEWORK_SECONDS * count_target_frameworks(project_dir)
+    content = project_path.read_text(encoding='utf-8', errors='ignore')
+    match = TARGET_FRAMEWORKS_PATTERN.search(content)
+    tfm_count = len([tfm for tfm in match.group(1).split(';') if tfm.strip()]) if match else 1
+    return BASE_BUILD_SECONDS + PER_TARGET_FRAMEWORK_SECONDS * max(tfm_count, 1)
+
+
+def build_mode(project_path: Path, scratch: Optional[Dict[str, Any]]) -> str:
+    """
+    Classify the build about to run: scratch under --scratch (empty bin/obj of its own),
+    incremental when the tree holds the obj directory of an earlier build, clean otherwise.
+    Returns: "scratch", "incremental" or "clean"
+    """
+    if scratch:
+        return "scratch"
+    project_dir = project_path.parent
+    if (project_dir / "obj").is_dir() or (project_path.suffix == ".sln" and any(project_dir.glob("*/obj"))):
+        return "incremental"
+    return "clean"
+
+
+def adaptive_timeout(samples: List[Dict[str, Any]], mode: str, factor: float, default: int) -> int:
+    """
+    Derive a build timeout from a project's history: the 95th percentile of its
+    completed build times in the same mode (see build_mode()) times factor, never
+    below default (--timeout) and at most TIMEOUT_CEILING_SECONDS. Incremental, clean
+    and scratch builds differ too much in cost to share one percentile, so samples of
+    other modes, and those recorded without a mode, are ignored.
+    Returns: Timeout in seconds, default for projects without completed builds in that mode
+    """
+    times = sorted(sample["wall_time"] for sample in samples
+                   if sample.get("mode") == mode and not sample.get("timed_out"))
+    if not times:
+        return default
+    p95 = statistics.quantiles(times, n=20, method='inclusive')[-1] if len(times) > 1 else times[0]
+    return int(max(min(p95 * factor, TIMEOUT_CEILING_SECONDS), default))
+
+
+def order_longest_first(plan: List[Dict[str, Any]], history: Dict[str, List[Dict[str, Any]]],
+                        repo_root: Path) -> List[Tuple[str, Path, float]]:
+    """
+    Order the project builds of a plan by decreasing estimated cost, so that a pool
+    taking them in order schedules the longest jobs first (ties keep plan order).
+    Returns: List of (issue name, project path, estimated seconds)
+    """
+    issue_times = {}
+    jobs = []
+    for entry in plan:
+        issue_dir = repo_root / entry["issue"]
+        for project in entry["projects"]:
+            if not project["exists"] or "restore_error" in project:
+                continue
+            if entry["issue"] not in issue_times:
+                issue_times[entry["issue"]] = load_issue_build_times(issue_dir)
+            cost = estimate_build_cost(project["path"], issue_dir, history,
+                                       issue_times[entry["issue"]], repo_root)
+            jobs.append((entry["issue"], project["path"], cost))
+    
+    return sorted(jobs, key=lambda job: -job[2])
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse a --shard value of the form i/N (1 <= i <= N)."""
+    match = re.fullmatch(r'(\d+)/(\d+)', value)
+    if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+        raise argparse.ArgumentTypeError(f"expected i/N with 1 <= i <= N, got '{value}'")
+    return int(match.group(1)), int(match.group(2))
+
+
+def load_shard_weights(results_path: Path) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Read the build times of a previous sweep from its (merged) results stream.
+    Returns: Dictionary mapping project paths ('/' separated) to samples, shaped like the build history
+    """
+    weights = defaultdict(list)
+    try:
+        with open(results_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if "project" in record and not record["cached"]:
+                    weights[record["project"].replace('\\', '/')].append(
+                        {"wall_time": record["wall_time"], "timed_out": record["timed_out"]})
+    except OSError as e:
+        print(f"Warning: could not read shard weights from {results_path}: {e}", file=sys.stderr)
+    return dict(weights)
+
+
+def shard_plan(plan: List[Dict[str, Any]], shard: Tuple[int, int], weights: Dict[str, List[Dict[str, Any]]],
+               repo_root: Path) -> Tuple[List[Dict[str, Any]], List[float]]:
+    """
+    Split a plan into shards of about equal estimated build time and keep one of them.
+    Whole issues are assigned, heaviest first, to the lightest shard (ties to the lowest
+    shard number), so every agent computes the same partition from the same tree.
+    The local build history differs between agents and is deliberately not used:
+    costs come from weights (a previous sweep's results) and the repository itself.
+    Returns: Entries of the selected shard in plan order, and the estimated seconds of every shard
+    """
+    index, count = shard
+    costs = {}
+    for entry in plan:
+        issue_dir = repo_root / entry["issue"]
+        issue_times = load_issue_build_times(issue_dir) if entry["projects"] else {}
+        costs[entry["issue"]] = sum(estimate_build_cost(project["path"], issue_dir, weights, issue_times, repo_root)
+                                    for project in entry["projects"] if project["exists"])
+    
+    loads = [0.0] * count
+    owners = {}
+    for entry in sorted(plan, key=lambda entry: (-costs[entry["issue"]], entry["issue"])):
+        owner = min(range(count), key=lambda shard_index: (loads[shard_index], shard_index))
+        loads[owner] += costs[entry["issue"]]
+        owners[entry["issue"]] = owner
+    
+    return [entry for entry in plan if owners[entry["issue"]] == index - 1], loads
+
+
+def read_json_list(json_path: Path, key: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Read a list of entries from a JSON file, optionally stored under key.
+    Returns: The entries, or an empty list if the file is missing or malformed
+    """
+    try:
+        with open(json_path, 'r', encoding='utf-8-sig') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return []
+    if key is not None:
+        data = data.get(key, []) if isinstance(data, dict) else []
+    return [entry for entry in data if isinstance(entry, dict)] if isinstance(data, list) else []
+
+
+def latest_input_mtime(issue_dir: Path) -> float:
+    """Return the latest modification time of an issue directory's build inputs."""
+    latest = 0.0
+    for dirpath, dirnames, filenames in os.walk(issue_dir):
+        dirnames[:] = [d for d in dirnames if d not in BUILD_OUTPUT_DIRS]
+        for name in filenames:
+            if is_build_input(name):
+                try:
+                    latest = max(latest, os.stat(os.path.join(dirpath, name)).st_mtime)
+                except OSError:
+                    continue
+    return latest
+
+
+def find_priority_issues(repo_root: Path, issue_names: List[str]) -> Dict[str, List[str]]:
+    """
+    Find the issues whose result matters most when checking a fix: the failed builds
+    of failed-builds.json, the failed tests of test-fails.json (here and in the
+    IssueRunner directory), the issues modified since the last run, and the builds
+    or tests that pass in the IssueRunner's results-baseline.json but fail in results.json.
+    Returns: Dictionary mapping issue names to the reasons they were picked
+    """
+    by_runner_name = {test_result_issue_name(name): name for name in issue_names}
+    known = set(issue_names)
+    reasons = defaultdict(list)
+    
+    def add(issue_name: Optional[str], reason: str):
+        if issue_name in known and reason not in reasons[issue_name]:
+            reasons[issue_name].append(reason)
+    
+    for entry in read_json_list(repo_root / "failed-builds.json", "failed_builds"):
+        add(entry.get("issue"), "failed build")
+    for test_fails in (repo_root / TEST_RESULT_FILES["fail"], repo_root / ISSUE_RUNNER_DIR / TEST_RESULT_FILES["fail"]):
+        for entry in read_json_list(test_fails, "test_results"):
+            add(by_runner_name.get(entry.get("issue")), "failed tests")
+    
+    # Modified since the build cache was last saved, that is since the end of the last run
+    cache_path = repo_root / STATE_DIR_NAME / "build-cache.json"
+    last_run = cache_path.stat().st_mtime if cache_path.exists() else time.time() - 24 * 3600
+    for issue_name in issue_names:
+        if latest_input_mtime(repo_root / issue_name) > last_run:
+            add(issue_name, "modified")
+    
+    baseline = {(entry.get("number"), entry.get("project_path")): entry
+                for entry in read_json_list(repo_root / ISSUE_RUNNER_DIR / "results-baseline.json")}
+    for entry in read_json_list(repo_root / ISSUE_RUNNER_DIR / "results.json"):
+        before = baseline.get((entry.get("number"), entry.get("project_path")))
+        if before is None or not str(entry.get("number", "")).isdigit():
+            continue
+        for step in ("build_result", "test_result"):
+            if before.get(step) == "Success" and entry.get(step) == "Failed":
+                add(by_runner_name.get(f"Issue{int(entry['number'])}"), "regression")
+    
+    return dict(reasons)
+
+
+def prioritize_plan(plan: List[Dict[str, Any]], priority: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+    """
+    Move the priority issues to the front of a plan, keeping the order within both
+    parts, and flag them so their builds are started first.
+    Returns: The reordered plan
+    """
+    for entry in plan:
+        entry["priority"] = entry["issue"] in priority
+    return sorted(plan, key=lambda entry: not entry["priority"])
+
+
+def report_issue(entry: Dict[str, Any], builds: Dict[Path, Future], repo_root: Path,
+                 results: Dict[str, List[str]], failures: Dict[str, List[Dict[str, Any]]],
+                 error_output_dir: Optional[Path], cache: Dict[str, Dict[str, Any]],
+                 stream: Dict[str, Any], tests: Dict[Path, Future],
+                 test_outcomes: List[Tuple[str, Dict[str, Any]]]):
+    """
+    Wait for the builds (and with --test, the test runs) of one issue and print
+    its output as a single group.
+    Updates results, failures, test_outcomes and the build cache in place.
+    """
+    issue_name = entry["issue"]
+    status = entry["status"]
+    
+    if status == "not_found":
+        print(f"\n[{issue_name}] ISSUE DIRECTORY NOT FOUND")
+        finish_issue(issue_name, "no_project", [], results, stream)
+        if error_output_dir:
+            error_file = error_output_dir / f"{issue_name}_not_found.txt"
+            with open(error_file, 'w', encoding='utf-8') as f:
+                f.write(f"Issue directory not found: {issue_name}\n")
+        return
+    
+    print(f"\n[{issue_name}]", end=" ", flush=True)
+    
+    if status == "skipped":
+        print("SKIPPED (has ignore marker)")
+        finish_issue(issue_name, "skipped", [], results, stream)
+        return
+    
+    if status == "no_project":
+        print("NO PROJECT FILES")
+        finish_issue(issue_name, "no_project", [], results, stream)
+        return
+    
+    issue_success = True
+    issue_timed_out = False
+    project_names = []
+    for project in entry["projects"]:
+        project_path = project["path"]
+        
+        if not project["exists"]:
+            print(f"\n  Project not found: {project['name']}")
+            project_names.append(project["name"])
+            issue_success = False
+            error_msg = f"Project file not found: {project_path}"
+            failures[issue_name].append({
+                "project": project["name"],
+                "errors": [error_msg],
+                "tail": [],
+                "log": None,
+                "timed_out": False
+            })
+            write_result_record(stream, issue_name, project["name"], {
+                "success": False, "exit_code": None, "wall_time": 0.0, "cpu_user": None,
+                "cpu_sys": None, "peak_rss_kb": None, "timed_out": False, "cached": False,
+                "log": None, "errors": [error_msg], "tail": []
+            })
+            if error_output_dir:
+                error_file = error_output_dir / f"{issue_name}_{Path(project['name']).stem}_not_found.txt"
+                with open(error_file, 'w', encoding='utf-8') as f:
+                    f.write(f"Project: {project['name']}\n")
+                    f.write(f"Error: {error_msg}\n")
+            continue
+        
+        rel_path = project_path.relative_to(repo_root)
+        project_names.append(str(rel_path))
+        print(f"\n  Building: {rel_path}", end=" ", flush=True)
+        
+        if "restore_error" in project:
+            # Not built (see run_restore()), reported as a failed build with the restore output
+            print("[FAIL] RESTORE FAILED")
+            issue_success = False
+            errors = project["restore_error"].splitlines()
+            failures[issue_name].append({
+                "project": str(rel_path),
+                "errors": errors,
+                "tail": [],
+                "log": None,
+                "timed_out": False
+            })
+            write_result_record(stream, issue_name, str(rel_path), {
+                "success": False, "exit_code": None, "wall_time": 0.0, "cpu_user": None,
+                "cpu_sys": None, "peak_rss_kb": None, "timed_out": False, "cached": False,
+                "log": None, "errors": errors, "tail": []
+            })
+            cache.pop(rel_path.as_posix(), None)
+            if error_output_dir:
+                error_file = error_output_dir / f"{issue_name}_{project_path.stem}_restore_failed.txt"
+                with open(error_file, 'w', encoding='utf-8') as f:
+                    f.write(f"Project: {rel_path}\n")
+                    f.write(f"Restore failed:\n{project['restore_error']}\n")
+            continue
+        
+        build = builds[project_path].result()
+        
+        if build["cached"]:
+            print("[OK] SUCCESS (cached)")
+        elif build["success"]:
+            print("[OK] SUCCESS")
+            if build["hash"]:
+                # Only green builds are cached, a failure is always retried
+                cache[rel_path.as_posix()] = {"hash": build["hash"]}
+        else:
+            if build["timed_out"]:
+                print(f"[TIME] TIMED OUT after {build['timeout']} s")
+                issue_timed_out = True
+            else:
+                print("[FAIL] FAILED (stopped at first error)" if build["stopped_early"] else "[FAIL] FAILED")
+                issue_success = False
+            cache.pop(rel_path.as_posix(), None)
+            failures[issue_name].append({
+                "project": str(rel_path),
+                "errors": build["errors"],
+                "tail": build["tail"],
+                "log": build["log"],
+                "timed_out": build["timed_out"]
+            })
+        
+        for outcome in tests[project_path].result() if project_path in tests else []:
+            counters = outcome["counters"] or {}
+            if outcome["test_result"] == "success":
+                print(f"    Tests: {outcome['project']} [OK] PASSED ({counters.get('passed', 0)} passed)")
+            else:
+                print(f"    Tests: {outcome['project']} [FAIL] FAILED "
+                      f"({counters.get('failed', 0)} failed of {counters.get('total', 0)})")
+            test_outcomes.append((issue_name, outcome))
+    
+    if not issue_success:
+        finish_issue(issue_name, "failed", project_names, results, stream)
+    elif issue_timed_out:
+        # Only counted as a timeout when no project of the issue failed to compile
+        finish_issue(issue_name, "timeout", project_names, results, stream)
+    else:
+        finish_issue(issue_name, "success", project_names, results, stream)
+        print("  → All builds succeeded")
+
+
+def run_builds(plan: List[Dict[str, Any]], args: argparse.Namespace, repo_root: Path,
+               results: Dict[str, List[str]], failures: Dict[str, List[Dict[str, Any]]],
+               error_output_dir: Optional[Path], log_dir: Path, results_path: Path,
+               frameworks: Optional[Dict[Path, str]] = None):
+    """
+    Build every project in the plan on a bounded pool of args.jobs workers.
+    Output is printed per issue, in plan order, regardless of completion order,
+    while each build is appended to the results stream as soon as it finishes.
+    With more than one worker, builds are started longest-first from the cost model.
+    With args.batch > 1, projects are built in groups through one MSBuild invocation each.
+    Each build's timeout is derived from its history (see adaptive_timeout()).
+    Projects whose inputs are unchanged since their last green build are skipped
+    unless args.force is set. The cost of every individual build is added to the build history.
+    With priority issues (see prioritize_plan()), their builds are started first and an
+    interim summary is printed as soon as they are all reported.
+    With args.test, the tests of each green project are started on a second pool of
+    args.jobs workers as soon as its build finishes, overlapping with the other builds.
+    Projects in frameworks are built and tested for that target framework only, outside
+    of batches and under their own cache key.
+    With args.scratch, every build and test run gets its own bin/obj below a scratch root
+    (see open_scratch_root()), removed when done.
+    With args.governor, builds and test runs start only while the load average and the
+    available memory allow (see admit_build()), each with its share of the CPUs.
+    Returns: Profile entries of the builds that ran, and the (issue, outcome) of every test run
+    """
+    cache_path = repo_root / STATE_DIR_NAME / "build-cache.json"
+    history_path = repo_root / STATE_DIR_NAME / "build-history.json"
+    cache = load_state_file(cache_path)
+    history = load_state_file(history_path)
+    profile = []
+    dotnet_version = get_dotnet_version()
+    scratch = open_scratch_root(args.scratch, args.scratch_limit) if args.scratch else None
+    governor = (open_governor(args.jobs, args.max_load, args.memory_reserve, history, repo_root)
+                if args.governor else None)
+    stream = open_results_stream(results_path)
+    write_stream_record(stream, {"run": {
+        "id": uuid.uuid4().hex,
+        "started": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "shard": f"{args.shard[0]}/{args.shard[1]}" if args.shard else None,
+        "selection": "json" if args.json_file else "all",
+        "filter": " ".join([f"--{name} {value}" for name in ("tfm", "label", "state")
+                            for value in getattr(args, name) or []]
+                           + [f"--package {''.join(part or '' for part in selector)}"
+                              for selector in args.package or []]) or None
+    }})
+    
+    def record_when_done(issue_name: str, project: str) -> Callable[[Future], None]:
+        return lambda future: write_result_record(stream, issue_name, project, future.result())
+    
+    frameworks = frameworks or {}
+    tests = {}
+    test_outcomes = []
+    tracker = {"lock": threading.Lock(), "claimed": set()}
+    
+    def test_when_green(issue_name: str, project_path: Path) -> Callable[[Future], None]:
+        def on_built(future: Future):
+            if future.exception() or not future.result()["success"]:
+                tests[project_path].set_result([])
+                return
+            test_future = test_executor.submit(test_built_project, future.result(), project_path, issue_name,
+                                               repo_root, log_dir, args.timeout, tracker,
+                                               frameworks.get(project_path), scratch, governor,
+                                               args.log_format)
+            test_future.add_done_callback(lambda done: tests[project_path].set_exception(done.exception())
+                                          if done.exception() else tests[project_path].set_result(done.result()))
+        return on_built
+    
+    jobs = [(entry["issue"], project["path"], 0.0) for entry in plan
+            for project in entry["projects"] if project["exists"] and "restore_error" not in project]
+    if args.jobs > 1:
+        jobs = order_longest_first(plan, history, repo_root)
+        total_cost = sum(cost for _, _, cost in jobs)
+        print(f"Scheduling {len(jobs)} builds longest-first: ~{total_cost:.0f} s of work, "
+              f"~{total_cost / args.jobs:.0f} s on {args.jobs} workers")
+    priority_issues = {entry["issue"] for entry in plan if entry.get("priority")}
+    jobs.sort(key=lambda job: job[0] not in priority_issues)
+    
+    modes = {project_path: build_mode(project_path, scratch) for _, project_path, _ in jobs}
+    timeouts = {project_path: adaptive_timeout(history.get(project_path.relative_to(repo_root).as_posix(), []),
+                                               modes[project_path], args.timeout_factor, args.timeout)
+                for _, project_path, _ in jobs}
+    
+    builds = {}
+    try:
+        with ThreadPoolExecutor(max_workers=args.jobs) as test_executor, \
+                ThreadPoolExecutor(max_workers=args.jobs) as executor:
+            if args.batch > 1:
+                builds = submit_batches(executor, [job for job in jobs if job[1] not in frameworks],
+                                        args.batch, repo_root, cache, dotnet_version, args.force,
+                                        log_dir, timeouts, governor, args.log_format)
+            for issue_name, project_path, _ in jobs:
+                if project_path not in builds:
+                    framework = frameworks.get(project_path)
+                    builds[project_path] = executor.submit(
+                        build_with_cache, project_path, repo_root / issue_name, repo_root,
+                        cache, f"{dotnet_version}|-f {framework}" if framework else dotnet_version,
+                        args.force, log_dir, args.fail_fast_per_project, timeouts[project_path],
+                        ["-f", framework] if framework else (), scratch, args.test, governor,
+                        args.log_format)
+            for issue_name, project_path, _ in jobs:
+                builds[project_path].add_done_callback(
+                    record_when_done(issue_name, str(project_path.relative_to(repo_root))))
+                if args.test and project_path not in tests:
+                    tests[project_path] = Future()
+                    builds[project_path].add_done_callback(test_when_green(issue_name, project_path))
+            
+            for entry in plan:
+                report_issue(entry, builds, repo_root, results, failures, error_output_dir, cache, stream,
+                             tests, test_outcomes)
+                if entry.get("priority"):
+                    priority_issues.discard(entry["issue"])
+                    if not priority_issues:
+                        print_interim_summary(plan, results, failures, not args.json_file)
+    finally:
+        for project_path, future in builds.items():
+            if (future.done() and not future.exception() and not future.result()["cached"]
+                    and not future.result().get("batched")):
+                project = project_path.relative_to(repo_root).as_posix()
+                profile.append(record_build_history(history, project, future.result(), modes[project_path]))
+        save_state_file(cache_path, cache)
+        save_state_file(history_path, history)
+        stream["file"].close()
+        if scratch:
+            close_scratch_root(scratch)
+        if governor:
+            print(f"\nGovernor: -maxcpucount:{governor['maxcpucount']} per build, "
+                  f"{governor['held']} builds held back for {governor['held_seconds']:.0f} s in total "
+                  f"(load limit {governor['max_load']:g}, memory reserve {governor['reserve_kb'] // 1024} MB)")
+    
+    return profile, test_outcomes
+
 
-def find_project_files(issue_dir: Path) -> List[Path]:
-    """Find all .csproj and .sln files in an issue directory."""
-    project_files = []
+def open_inotify() -> Optional[Dict[str, Any]]:
+    """
+    Start an inotify instance through libc.
+    Returns: Watcher with the inotify descriptor and the watched directories, or None where unavailable
+    """
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    return {"kind": "inotify", "libc": libc, "fd": fd, "dirs": {}}
+
+
+def add_inotify_watches(watcher: Dict[str, Any], root: Path) -> List[Path]:
+    """
+    Watch a directory and every directory below it, except build output directories.
+    Returns: Build inputs already present, which may have been written before the watch existed
+    """
+    mask = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    present = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in BUILD_OUTPUT_DIRS]
+        wd = watcher["libc"].inotify_add_watch(watcher["fd"], os.fsencode(dirpath), mask)
+        if wd < 0:
+            print(f"Warning: cannot watch {dirpath}: {os.strerror(ctypes.get_errno())}", file=sys.stderr)
+            continue
+        watcher["dirs"][wd] = Path(dirpath)
+        present.extend(Path(dirpath) / name for name in filenames if is_build_input(name))
+    return present
+
+
+def read_inotify_changes(watcher: Dict[str, Any], timeout: Optional[float]) -> Set[Path]:
+    """
+    Wait up to timeout seconds (forever if None) for inotify events.
+    Returns: Build inputs created, written, moved or deleted
+    """
+    changes = set()
+    readable, _, _ = select.select([watcher["fd"]], [], [], timeout)
+    if not readable:
+        return changes
+    try:
+        data = os.read(watcher["fd"], 64 * 1024)
+    except BlockingIOError:
+        return changes
     
-    # Find .sln files first (prefer solution files)
-    sln_files = list(issue_dir.rglob("*.sln"))
-    if sln_files:
-        project_files.extend(sln_files)
-    else:
-        # If no .sln, find .csproj files
-        csproj_files = list(issue_dir.rglob("*.csproj"))
-        project_files.extend(csproj_files)
+    offset = 0
+    while offset < len(data):
+        wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+        name = os.fsdecode(data[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + length].rstrip(b"\0"))
+        offset += INOTIFY_EVENT.size + length
+        if mask & IN_Q_OVERFLOW:
+            print("Warning: inotify queue overflow, some changes were missed", file=sys.stderr)
+            continue
+        directory = watcher["dirs"].get(wd)
+        if directory is None or not name:
+            continue
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO) and name not in BUILD_OUTPUT_DIRS:
+                changes.update(add_inotify_watches(watcher, directory / name))
+        elif is_build_input(name):
+            changes.add(directory / name)
+    return changes
+
+
+def snapshot_build_inputs(issue_dirs: List[Path]) -> Dict[Path, int]:
+    """Record the mtime of every build input below the issue directories, for polling."""
+    snapshot = {}
+    for issue_dir in issue_dirs:
+        for dirpath, dirnames, filenames in os.walk(issue_dir):
+            dirnames[:] = [d for d in dirnames if d not in BUILD_OUTPUT_DIRS]
+            for name in filenames:
+                if is_build_input(name):
+                    path = Path(dirpath) / name
+                    try:
+                        snapshot[path] = path.stat().st_mtime_ns
+                    except OSError:
+                        continue
+    return snapshot
+
+
+def open_watcher(issue_dirs: List[Path]) -> Dict[str, Any]:
+    """Watch the issue directories with inotify, or else by polling their build inputs."""
+    watcher = open_inotify()
+    if watcher is not None:
+        for issue_dir in issue_dirs:
+            add_inotify_watches(watcher, issue_dir)
+        return watcher
+    return {"kind": "polling", "issue_dirs": issue_dirs, "snapshot": snapshot_build_inputs(issue_dirs)}
+
+
+def next_changes(watcher: Dict[str, Any], timeout: Optional[float]) -> Set[Path]:
+    """
+    Wait up to timeout seconds (forever if None) for changed build inputs.
+    Returns: Paths of the build inputs changed, added or removed
+    """
+    if watcher["kind"] == "inotify":
+        return read_inotify_changes(watcher, timeout)
     
-    return project_files
+    interval = WATCH_POLL_SECONDS if timeout is None else min(timeout, WATCH_POLL_SECONDS)
+    waited = 0.0
+    while True:
+        time.sleep(interval)
+        waited += interval
+        snapshot = snapshot_build_inputs(watcher["issue_dirs"])
+        previous = watcher["snapshot"]
+        watcher["snapshot"] = snapshot
+        changes = {path for path in snapshot.keys() | previous.keys() if snapshot.get(path) != previous.get(path)}
+        if changes or (timeout is not None and waited >= timeout):
+            return changes
 
 
-def build_project(project_path: Path, timeout: int = 300) -> Tuple[bool, str, str]:
+def affected_projects(changes: Set[Path], index: Dict[str, Dict[str, Any]],
+                      repo_root: Path) -> List[Tuple[str, Path]]:
     """
-    Build a project using dotnet build.
-    Returns: (success, stdout, stderr)
+    Map changed files to the projects to rebuild: per file, the projects of its issue
+    with the deepest directory containing it, or all of them if none contains it.
+    Index entries of issues whose directories changed are rescanned in place.
+    Returns: Sorted list of (issue name, project path)
     """
-    try:
-        result = subprocess.run(
-            ["dotnet", "build", str(project_path), "--no-restore"],
-            cwd=project_path.parent,
-            capture_output=True,
-            text=True,
-            timeout=timeout
-        )
+    projects = set()
+    for path in changes:
+        issue_name = path.relative_to(repo_root).parts[0]
+        issue_dir = repo_root / issue_name
+        if issue_name not in index or not issue_dir.is_dir():
+            continue
+        if not is_index_entry_current(issue_dir, index[issue_name]):
+            index[issue_name] = scan_issue_dir(issue_dir)
+        if index[issue_name]["markers"]:
+            continue
         
-        return result.returncode == 0, result.stdout, result.stderr
-    except subprocess.TimeoutExpired:
-        return False, "", f"Build timed out after {timeout} seconds"
-    except Exception as e:
-        return False, "", str(e)
+        candidates = project_files_from_index(issue_dir, index[issue_name])
+        containing = [project for project in candidates if project.parent in path.parents]
+        if containing:
+            deepest = max(len(project.parent.parts) for project in containing)
+            candidates = [project for project in containing if len(project.parent.parts) == deepest]
+        projects.update((issue_name, project) for project in candidates)
+    return sorted(projects)
 
 
-def load_json_projects(json_path: Path) -> Dict[str, List[str]]:
+def watch_builds(plan: List[Dict[str, Any]], args: argparse.Namespace, repo_root: Path, log_dir: Path) -> int:
     """
-    Load project paths from JSON file.
-    Returns: Dictionary mapping issue names to list of project paths
+    Watch the issue directories of the plan and rebuild the projects affected by
+    each burst of changes, printing the outcome and the first errors right away.
+    The discovery index, build cache and history stay in memory between rebuilds,
+    and builds run with MSBuild node reuse so that the worker nodes stay warm.
+    Returns: Exit code (0 when stopped with Ctrl+C)
     """
+    issue_dirs = [repo_root / entry["issue"] for entry in plan if entry["status"] != "not_found"]
+    index = load_discovery_index(repo_root, issue_dirs)
+    cache_path = repo_root / STATE_DIR_NAME / "build-cache.json"
+    history_path = repo_root / STATE_DIR_NAME / "build-history.json"
+    cache = load_state_file(cache_path)
+    history = load_state_file(history_path)
+    dotnet_version = get_dotnet_version()
+    
+    watcher = open_watcher(issue_dirs)
+    print(f"Watching {len(issue_dirs)} issue directories ({watcher['kind']}), press Ctrl+C to stop")
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        projects_by_issue = defaultdict(list)
-        for item in data.get('failed_builds', []):
-            issue = item.get('issue', '')
-            project = item.get('project', '')
-            if issue and project:
-                projects_by_issue[issue].append(project)
+        with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+            while True:
+                changes = next_changes(watcher, None)
+                while True:
+                    # Wait for the burst of saves to settle before building
+                    more = next_changes(watcher, WATCH_DEBOUNCE_SECONDS)
+                    if not more:
+                        break
+                    changes |= more
+                
+                builds = []
+                for issue_name, project_path in affected_projects(changes, index, repo_root):
+                    project = project_path.relative_to(repo_root).as_posix()
+                    timeout = adaptive_timeout(history.get(project, []), "incremental", args.timeout_factor,
+                                               args.timeout)
+                    builds.append((project_path, executor.submit(
+                        build_with_cache, project_path, repo_root / issue_name, repo_root, cache,
+                        dotnet_version, args.force, log_dir, args.fail_fast_per_project, timeout,
+                        ["-nodeReuse:true"], log_format=args.log_format)))
+                
+                for project_path, future in builds:
+                    build = future.result()
+                    rel_path = project_path.relative_to(repo_root)
+                    stamp = time.strftime("%H:%M:%S")
+                    if build["cached"]:
+                        print(f"[{stamp}] {rel_path} [OK] SUCCESS (cached)")
+                        continue
+                    profile = record_build_history(history, rel_path.as_posix(), build, "incremental")
+                    if build["success"]:
+                        print(f"[{stamp}] {rel_path} [OK] SUCCESS ({profile['wall_time']:.1f} s)")
+                        cache[rel_path.as_posix()] = {"hash": build["hash"]}
+                        continue
+                    cache.pop(rel_path.as_posix(), None)
+                    label = "[TIME] TIMED OUT" if build["timed_out"] else "[FAIL] FAILED"
+                    print(f"[{stamp}] {rel_path} {label} ({profile['wall_time']:.1f} s)")
+                    for line in build["errors"][:5]:
+                        print(f"    {line}")
+                    print(f"    Log: {build['log']}")
+                if builds:
+                    save_state_file(cache_path, cache)
+                    save_state_file(history_path, history)
+                    save_state_file(repo_root / STATE_DIR_NAME / "discovery-index.json", index)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    finally:
+        if watcher["kind"] == "inotify":
+            os.close(watcher["fd"])
+    return 0
+
+
+def print_build_summary(results: Dict[str, List[str]], failures: Dict[str, List[Dict[str, Any]]],
+                        show_skipped: bool, profile: List[Dict[str, Any]], profile_top: Optional[int],
+                        title: str = "BUILD SUMMARY"):
+    """Print the BUILD SUMMARY of a run and the details of its failed and timed out builds."""
+    print("\n" + "=" * 80)
+    print(title)
+    print("=" * 80)
+    total_checked = (len(results['success']) + len(results['failed']) + len(results['timeout']) +
+                    len(results['no_project']) + len(results['skipped']))
+    print(f"Total issues checked: {total_checked}")
+    print(f"  [OK] Successful builds: {len(results['success'])}")
+    print(f"  [FAIL] Failed builds: {len(results['failed'])}")
+    print(f"  [TIME] Timed out builds: {len(results['timeout'])}")
+    print(f"  [N/A] No project files: {len(results['no_project'])}")
+    if show_skipped:
+        print(f"  [SKIP] Skipped (ignore markers): {len(results['skipped'])}")
+    
+    # Print failed builds details
+    if results["failed"]:
+        print("\n" + "=" * 80)
+        print("FAILED BUILDS")
+        print("=" * 80)
         
-        return dict(projects_by_issue)
-    except Exception as e:
-        print(f"Error loading JSON file {json_path}: {e}", file=sys.stderr)
-        sys.exit(1)
+        for issue_name in sorted(results["failed"]):
+            print(f"\n[{issue_name}]")
+            for failure in failures[issue_name]:
+                print(f"  Project: {failure['project']}")
+                if failure['timed_out']:
+                    print("  Timed out")
+                elif failure['errors']:
+                    print("  Errors:")
+                    for line in failure['errors'][:5]:  # Show first 5 error lines
+                        print(f"    {line}")
+                elif failure['tail']:
+                    print(f"  Output: {failure['tail'][-1][:200]}...")
+                if failure['log']:
+                    print(f"  Log: {failure['log']}")
+                print()
+    
+    # Print timed out builds
+    if results["timeout"]:
+        print("\n" + "=" * 80)
+        print("TIMED OUT BUILDS")
+        print("=" * 80)
+        for issue_name in sorted(results["timeout"]):
+            for failure in failures[issue_name]:
+                print(f"  [{issue_name}] {failure['project']}")
+    
+    if profile_top and profile:
+        print_build_profile(profile, profile_top)
+    
+    # Print issues with no project files (if any)
+    if results["no_project"]:
+        print("\n" + "=" * 80)
+        print("ISSUES WITH NO PROJECT FILES")
+        print("=" * 80)
+        for issue_name in sorted(results["no_project"]):
+            print(f"  {issue_name}")
+
+
+def print_interim_summary(plan: List[Dict[str, Any]], results: Dict[str, List[str]],
+                          failures: Dict[str, List[Dict[str, Any]]], show_skipped: bool):
+    """Print the summary of the priority issues of a plan, while the other issues are still building."""
+    priority = {entry["issue"] for entry in plan if entry.get("priority")}
+    priority_results = {status: [issue_name for issue_name in issues if issue_name in priority]
+                        for status, issues in results.items()}
+    print_build_summary(priority_results, failures, show_skipped, [], None,
+                        title=f"INTERIM SUMMARY ({len(priority)} priority issues, "
+                              f"{len(plan) - len(priority)} more to go)")
+    print("=" * 80, flush=True)
+
+
+def write_failed_builds_json(json_path: Path, failures: Dict[str, List[Dict[str, Any]]]):
+    """Write the failed and timed out projects in the failed-builds.json format read back by this script."""
+    failed_builds = [{"issue": issue_name, "project": str(PureWindowsPath(failure["project"]))}
+                     for issue_name in sorted(failures) for failure in failures[issue_name]]
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({"failed_builds": failed_builds}, f, indent=2)
+        f.write("\n")
+
+
+def read_shard_results(results_path: Path) -> List[Dict[str, Any]]:
+    """
+    Read a shard's results stream.
+    Returns: List of records, starting with the run record
+    """
+    with open(results_path, 'r', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    if not records or "run" not in records[0]:
+        raise ValueError("not a check-builds.py results stream")
+    return records
+
+
+def merge_shards(results_paths: List[Path], output_dir: Path) -> Tuple[Dict[str, List[str]], Dict[str, List[Dict[str, Any]]], str]:
+    """
+    Combine the results streams of the shards of one sweep.
+    The logs of the failed builds and the _not_found.txt files are collected, from
+    the recorded paths or else from the directory of each stream, into output_dir,
+    next to a merged results.jsonl.
+    Returns: Results by class, failures by issue and the selection ("all" or "json") of the sweep
+    """
+    shards = {}
+    for results_path in results_paths:
+        records = read_shard_results(results_path)
+        run = records[0]["run"]
+        if not run["shard"]:
+            raise ValueError(f"{results_path} is not from a sharded run (--shard i/N)")
+        if run["shard"] in shards:
+            raise ValueError(f"shard {run['shard']} given twice")
+        shards[run["shard"]] = (results_path, run, records[1:])
+    
+    counts = {int(shard.split('/')[1]) for shard in shards}
+    if len(counts) != 1 or len(shards) != next(iter(counts)):
+        count = max(counts)
+        missing = sorted(set(f"{i}/{count}" for i in range(1, count + 1)) - set(shards))
+        raise ValueError(f"incomplete shard set: got {', '.join(sorted(shards))}"
+                         + (f", missing {', '.join(missing)}" if missing else ""))
+    selections = {run["selection"] for _, run, _ in shards.values()}
+    if len(selections) != 1:
+        raise ValueError("the shards mix builds of all issues and of a JSON file")
+    if len({run.get("filter") for _, run, _ in shards.values()}) != 1:
+        raise ValueError("the shards were built with different --tfm/--label/--state/--package selectors")
+    
+    output_dir.mkdir(parents=True, exist_ok=True)
+    issue_records = {}
+    project_records = defaultdict(list)
+    for results_path, _, records in shards.values():
+        for not_found_file in results_path.parent.glob("*_not_found.txt"):
+            shutil.copy2(not_found_file, output_dir / not_found_file.name)
+        for record in records:
+            if "status" in record:
+                if record["issue"] in issue_records:
+                    raise ValueError(f"{record['issue']} was built by more than one shard")
+                issue_records[record["issue"]] = record
+                continue
+            if record["log"]:
+                log_path = Path(record["log"])
+                if not log_path.exists():
+                    log_path = results_path.parent / PureWindowsPath(record["log"]).name
+                if log_path.exists():
+                    merged_log = output_dir / log_path.name
+                    if log_path.resolve() != merged_log.resolve():
+                        for path in (log_path, *diagnostic_log_paths(log_path)):
+                            if path.exists():
+                                shutil.copy2(path, output_dir / path.name)
+                    record["log"] = str(merged_log)
+            project_records[record["issue"]].append(record)
+    
+    results = {"success": [], "failed": [], "timeout": [], "no_project": [], "skipped": []}
+    failures = defaultdict(list)
+    selection = selections.pop()
+    # Merging the same shards again yields the same run id
+    shard_ids = sorted(run.get("id") or str(results_path.resolve()) for results_path, run, _ in shards.values())
+    run_id = hashlib.sha1("|".join(shard_ids).encode('utf-8')).hexdigest()
+    started = min((run["started"] for _, run, _ in shards.values() if run.get("started")), default=None)
+    with open(output_dir / "results.jsonl", 'w', encoding='utf-8') as f:
+        f.write(json.dumps({"run": {"id": run_id, "started": started, "shard": None,
+                                    "selection": selection}}) + "\n")
+        for issue_name in sorted(issue_records):
+            issue_record = issue_records[issue_name]
+            results[issue_record["status"]].append(issue_name)
+            records = sorted(project_records[issue_name],
+                             key=lambda record: issue_record["projects"].index(record["project"]))
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+                if not record["success"]:
+                    failures[issue_name].append({key: record[key] for key in ("project", "errors", "tail", "log", "timed_out")})
+            f.write(json.dumps(issue_record) + "\n")
+    
+    return results, failures, selection
+
+
+def merge_main(argv: List[str]) -> int:
+    """Merge the results of a sharded sweep (check-builds.py merge ...)."""
+    repo_root = Path(__file__).parent
+    parser = argparse.ArgumentParser(
+        prog='check-builds.py merge',
+        description='Combine the results streams of all shards of a sweep into one summary, '
+                    'one failed-builds.json and one error directory.',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python check-builds.py merge agent1/results-1-of-2.jsonl agent2/results-2-of-2.jsonl
+  python check-builds.py merge shards/*.jsonl --output-dir sweep_errors --failed-json sweep.json
+        """
+    )
+    parser.add_argument(
+        'results_files',
+        nargs='+',
+        type=Path,
+        help='Results stream of every shard, with the logs of its failed builds in the same directory'
+    )
+    parser.add_argument(
+        '--output-dir',
+        type=Path,
+        default=repo_root / "failed-builds_errors",
+        help='Directory receiving the merged logs and results.jsonl (default: failed-builds_errors)'
+    )
+    parser.add_argument(
+        '--failed-json',
+        type=Path,
+        help='Failed builds list to write (default: failed-builds.json in the output directory, '
+             'leaving the failed-builds.json of the repo untouched)'
+    )
+    args = parser.parse_args(argv)
+    if args.failed_json is None:
+        args.failed_json = args.output_dir / "failed-builds.json"
+    
+    try:
+        results, failures, selection = merge_shards(args.results_files, args.output_dir)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error merging shard results: {e}", file=sys.stderr)
+        return 1
+    
+    print(f"Merged {len(args.results_files)} shards into: {args.output_dir}")
+    write_failed_builds_json(args.failed_json, failures)
+    print(f"Failed builds written to: {args.failed_json}")
+    print_build_summary(results, failures, selection == "all", [], None)
+    
+    return 0 if not results["failed"] and not results["timeout"] else 1
 
 
 def main():
     """Main function to check all issue builds."""
+    if sys.argv[1:2] == ["merge"]:
+        return merge_main(sys.argv[2:])
+    
     parser = argparse.ArgumentParser(
         description='Build issue projects and report compilation failures.',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -91,6 +2846,22 @@ def main():
 Examples:
   python check-builds.py                    # Build all issues
   python check-builds.py failed-builds.json # Build only projects in JSON file
+  python check-builds.py --jobs 8           # Build 8 projects at a time
+  python check-builds.py --force            # Ignore the build cache
+  python check-builds.py --fail-fast-per-project  # Stop each build at its first error
+  python check-builds.py --profile 20       # Show the 20 most expensive builds
+  python check-builds.py --batch 10 -j 4    # 4 MSBuild invocations of 10 projects at a time
+  python check-builds.py --restore -j 8     # Restore offline from a local feed, then build
+  python check-builds.py --test -j 8        # Build, then test each green project right away
+  python check-builds.py --priority -j 8    # Previous failures, regressions and edits first
+  python check-builds.py --watch            # Rebuild each project as soon as its files change
+  python check-builds.py --tfm 'net4*' --state open  # Open issues with .NET Framework projects
+  python check-builds.py --label is:bug --package 'NUnit3TestAdapter<5'  # Bugs on adapter 4.x or older
+  python check-builds.py --scratch -j 8     # Restore and build into /dev/shm, leaving bin/obj untouched
+  python check-builds.py --governor -j 16   # Admit builds by load and free memory, split the CPUs
+  python check-builds.py --compress-logs --log-cap 512  # zstd (or gzip) logs, capped at ~512 KB of text
+  python check-builds.py --shard 2/4 --shard-weights last-sweep.jsonl  # Second of 4 balanced shards
+  python check-builds.py merge results-*.jsonl  # Merge the shard results into one summary
         """
     )
     parser.add_argument(
@@ -99,7 +2870,198 @@ Examples:
         type=str,
         help='Optional JSON file containing list of projects to build (e.g., failed-builds.json)'
     )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=1,
+        help='Number of projects to build concurrently (default: 1, 0 = one per CPU)'
+    )
+    parser.add_argument(
+        '--batch',
+        type=int,
+        default=1,
+        metavar='N',
+        help='Build up to N projects per MSBuild invocation through a generated traversal project '
+             '(default: 1, no batching)'
+    )
+    parser.add_argument(
+        '--restore',
+        action='store_true',
+        help='Restore the projects first, offline, from a local feed filled once with the '
+             'unique packages of all selected issues (.check-builds/feed)'
+    )
+    parser.add_argument(
+        '--test',
+        action='store_true',
+        help='Run dotnet test on each project as soon as it builds, judging it from its TRX results, '
+             'and update test-passes.json / test-fails.json as outcomes arrive'
+    )
+    parser.add_argument(
+        '--priority',
+        action='store_true',
+        help='Build first the issues that failed in failed-builds.json or test-fails.json, were modified '
+             'since the last run, or regressed against the IssueRunner baseline, with an interim summary'
+    )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Instead of a sweep, watch the selected issues and rebuild the affected project '
+             'whenever build inputs change (inotify, or polling where unavailable)'
+    )
+    parser.add_argument(
+        '--tfm',
+        action='append',
+        metavar='PATTERN',
+        help='Build only the projects targeting a matching framework (e.g. net8.0, net4*); '
+             'repeatable or comma-separated. A multi-targeted project is built with -f '
+             'when exactly one of its frameworks matches'
+    )
+    parser.add_argument(
+        '--label',
+        action='append',
+        metavar='PATTERN',
+        help='Build only the issues with a matching label (e.g. is:bug); repeatable or comma-separated'
+    )
+    parser.add_argument(
+        '--state',
+        action='append',
+        metavar='STATE',
+        help='Build only the issues in this GitHub state (open, closed); repeatable or comma-separated'
+    )
+    parser.add_argument(
+        '--package',
+        type=parse_package_selector,
+        action='append',
+        metavar='NAME[OP VERSION]',
+        help='Build only the issues referencing this package, optionally constrained by version '
+             '(e.g. NUnit3TestAdapter<5, NUnit>=4.0); repeatable, all must match'
+    )
+    parser.add_argument(
+        '--shard',
+        type=parse_shard,
+        metavar='i/N',
+        help='Build only the i-th of N shards of the selected issues, balanced by estimated build time'
+    )
+    parser.add_argument(
+        '--shard-weights',
+        type=str,
+        metavar='RESULTS',
+        help='Results stream of a previous sweep whose build times balance the shards '
+             '(default: times from issue_results.json and target framework counts)'
+    )
+    parser.add_argument(
+        '--governor',
+        action='store_true',
+        help='Start each build only while the load average and MemAvailable allow it, given the peak RSS '
+             'recorded for the project, and split the CPUs between the jobs with -maxcpucount'
+    )
+    parser.add_argument(
+        '--max-load',
+        type=float,
+        metavar='LOAD',
+        help='Load average above which the governor holds back new builds (default: number of CPUs)'
+    )
+    parser.add_argument(
+        '--memory-reserve',
+        type=int,
+        default=GOVERNOR_DEFAULT_RESERVE_MB,
+        metavar='MB',
+        help=f'Memory the governor keeps available beyond the expected peak RSS of the builds '
+             f'(default: {GOVERNOR_DEFAULT_RESERVE_MB})'
+    )
+    parser.add_argument(
+        '--scratch',
+        nargs='?',
+        const=SCRATCH_DEFAULT_PARENT,
+        metavar='DIR',
+        help=f'Restore and build every project into its own bin/obj below DIR (default: {SCRATCH_DEFAULT_PARENT}, '
+             f'tmpfs), removed when done, instead of bin/obj in the issue tree'
+    )
+    parser.add_argument(
+        '--scratch-limit',
+        type=int,
+        default=SCRATCH_DEFAULT_LIMIT_MB,
+        metavar='MB',
+        help=f'Size limit of the scratch directory; builds started while it is over the limit '
+             f'run in the issue tree (default: {SCRATCH_DEFAULT_LIMIT_MB})'
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Rebuild every project, even if its inputs are unchanged since the last green build'
+    )
+    parser.add_argument(
+        '--timeout',
+        type=int,
+        default=DEFAULT_TIMEOUT_SECONDS,
+        help=f'Build timeout in seconds, raised for projects whose build history asks for more '
+             f'(default: {DEFAULT_TIMEOUT_SECONDS})'
+    )
+    parser.add_argument(
+        '--timeout-factor',
+        type=float,
+        default=3.0,
+        help=f'Timeout of projects with history of the same build mode (incremental, clean or scratch), '
+             f'as a multiple of their 95th percentile build time, between --timeout and '
+             f'{TIMEOUT_CEILING_SECONDS} s (default: 3.0)'
+    )
+    parser.add_argument(
+        '--log-dir',
+        type=str,
+        help='Directory for the build logs of failed projects '
+             '(default: the _errors directory of the JSON file, or .check-builds/logs)'
+    )
+    parser.add_argument(
+        '--compress-logs',
+        nargs='?',
+        const='auto',
+        choices=['auto', 'gzip', 'zstd'],
+        help='Write the build logs compressed (.gz, or .zst when the zstandard module is installed); '
+             'analyze-build-errors.py reads them transparently'
+    )
+    parser.add_argument(
+        '--log-cap',
+        type=int,
+        metavar='KB',
+        help='Keep at most about KB kilobytes of each build log: its head and tail, and every line '
+             'with an error or warning in between'
+    )
+    parser.add_argument(
+        '--results',
+        type=str,
+        help='JSON Lines file receiving one record per project build '
+             '(default: results.jsonl in the log directory)'
+    )
+    parser.add_argument(
+        '--failed-json',
+        type=str,
+        help='Also write the failed and timed out projects to this file, in the failed-builds.json format'
+    )
+    parser.add_argument(
+        '--profile',
+        type=int,
+        nargs='?',
+        const=10,
+        metavar='N',
+        help='Report the N most expensive builds (default: 10) and their change since the previous run'
+    )
+    parser.add_argument(
+        '--fail-fast-per-project',
+        action='store_true',
+        help='Stop a build at its first error CS####/NU#### line (quick triage)'
+    )
     args = parser.parse_args()
+    if args.scratch and args.batch > 1:
+        parser.error("--scratch cannot be combined with --batch, batched builds are not restored")
+    if args.scratch and args.watch:
+        parser.error("--scratch cannot be combined with --watch, which rebuilds incrementally in the issue tree")
+    try:
+        args.log_format = parse_log_format(args.compress_logs, args.log_cap)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    if args.jobs <= 0:
+        args.jobs = os.cpu_count() or 1
     
     repo_root = Path(__file__).parent
     
@@ -130,6 +3092,7 @@ Examples:
     results = {
         "success": [],
         "failed": [],
+        "timeout": [],
         "no_project": [],
         "skipped": []
     }
@@ -150,176 +3113,81 @@ Examples:
     
     if json_projects:
         # Build only projects from JSON file
-        for issue_name, project_paths in sorted(json_projects.items()):
-            issue_dir = repo_root / issue_name
-            if not issue_dir.exists():
-                print(f"\n[{issue_name}] ISSUE DIRECTORY NOT FOUND")
-                results["no_project"].append(issue_name)
-                if error_output_dir:
-                    error_file = error_output_dir / f"{issue_name}_not_found.txt"
-                    with open(error_file, 'w', encoding='utf-8') as f:
-                        f.write(f"Issue directory not found: {issue_name}\n")
-                continue
-            
-            print(f"\n[{issue_name}]", end=" ", flush=True)
-            
-            issue_success = True
-            for project_path_str in project_paths:
-                # Convert Windows path separators if needed
-                project_path = repo_root / project_path_str.replace('\\', os.sep)
-                
-                if not project_path.exists():
-                    print(f"\n  Project not found: {project_path_str}")
-                    issue_success = False
-                    error_msg = f"Project file not found: {project_path}"
-                    failures[issue_name].append({
-                        "project": project_path_str,
-                        "stdout": "",
-                        "stderr": error_msg
-                    })
-                    if error_output_dir:
-                        error_file = error_output_dir / f"{issue_name}_{Path(project_path_str).stem}_not_found.txt"
-                        with open(error_file, 'w', encoding='utf-8') as f:
-                            f.write(f"Project: {project_path_str}\n")
-                            f.write(f"Error: {error_msg}\n")
-                    continue
-                
-                rel_path = project_path.relative_to(repo_root)
-                print(f"\n  Building: {rel_path}", end=" ", flush=True)
-                
-                success, stdout, stderr = build_project(project_path)
-                
-                if success:
-                    print("[OK] SUCCESS")
-                else:
-                    print("[FAIL] FAILED")
-                    issue_success = False
-                    failures[issue_name].append({
-                        "project": str(rel_path),
-                        "stdout": stdout,
-                        "stderr": stderr
-                    })
-                    
-                    # Save error message to file
-                    if error_output_dir:
-                        # Create a safe filename from the project path
-                        safe_project_name = str(rel_path).replace('\\', '_').replace('/', '_').replace(':', '_')
-                        error_file = error_output_dir / f"{issue_name}_{safe_project_name}_error.txt"
-                        with open(error_file, 'w', encoding='utf-8') as f:
-                            f.write(f"Project: {rel_path}\n")
-                            f.write(f"Issue: {issue_name}\n")
-                            f.write("=" * 80 + "\n\n")
-                            if stdout:
-                                f.write("STDOUT:\n")
-                                f.write("-" * 80 + "\n")
-                                f.write(stdout)
-                                f.write("\n\n")
-                            if stderr:
-                                f.write("STDERR:\n")
-                                f.write("-" * 80 + "\n")
-                                f.write(stderr)
-                                f.write("\n\n")
-            
-            if issue_success:
-                results["success"].append(issue_name)
-                print("  → All builds succeeded")
-            else:
-                results["failed"].append(issue_name)
+        plan = plan_json_builds(repo_root, json_projects)
     else:
         # Build all issues (original behavior)
-        for issue_dir in issue_dirs:
-            issue_name = issue_dir.name
-            print(f"\n[{issue_name}]", end=" ", flush=True)
-            
-            # Check for ignore markers
-            ignore_files = ["ignore", "ignore.md", "explicit", "explicit.md", 
-                           "wip", "wip.md", "gui", "gui.md", "closedasnotplanned", 
-                           "closedasnotplanned.md"]
-            has_ignore = any((issue_dir / f).exists() for f in ignore_files)
-            
-            if has_ignore:
-                print("SKIPPED (has ignore marker)")
-                results["skipped"].append(issue_name)
-                continue
-            
-            # Find project files
-            project_files = find_project_files(issue_dir)
-            
-            if not project_files:
-                print("NO PROJECT FILES")
-                results["no_project"].append(issue_name)
-                continue
-            
-            # Build each project file
-            issue_success = True
-            for project_file in project_files:
-                rel_path = project_file.relative_to(repo_root)
-                print(f"\n  Building: {rel_path}", end=" ", flush=True)
-                
-                success, stdout, stderr = build_project(project_file)
-                
-                if success:
-                    print("[OK] SUCCESS")
-                else:
-                    print("[FAIL] FAILED")
-                    issue_success = False
-                    failures[issue_name].append({
-                        "project": str(rel_path),
-                        "stdout": stdout,
-                        "stderr": stderr
-                    })
-            
-            if issue_success:
-                results["success"].append(issue_name)
-                print("  → All builds succeeded")
-            else:
-                results["failed"].append(issue_name)
+        plan = plan_all_builds(repo_root, issue_dirs)
     
-    # Print summary
-    print("\n" + "=" * 80)
-    print("BUILD SUMMARY")
-    print("=" * 80)
-    total_checked = (len(results['success']) + len(results['failed']) + 
-                    len(results['no_project']) + len(results['skipped']))
-    print(f"Total issues checked: {total_checked}")
-    print(f"  [OK] Successful builds: {len(results['success'])}")
-    print(f"  [FAIL] Failed builds: {len(results['failed'])}")
-    print(f"  [N/A] No project files: {len(results['no_project'])}")
-    if not json_projects:
-        print(f"  [SKIP] Skipped (ignore markers): {len(results['skipped'])}")
+    frameworks = {}
+    if args.tfm or args.label or args.state or args.package:
+        total_issues = len(plan)
+        plan, frameworks = select_plan(plan, load_metadata_index(repo_root), repo_root, args)
+        print(f"Selected {len(plan)} of {total_issues} issues"
+              + (f", {len(frameworks)} multi-targeted projects built with -f" if frameworks else ""))
     
-    # Print failed builds details
-    if results["failed"]:
-        print("\n" + "=" * 80)
-        print("FAILED BUILDS")
-        print("=" * 80)
-        
-        for issue_name in sorted(results["failed"]):
-            print(f"\n[{issue_name}]")
-            for failure in failures[issue_name]:
-                print(f"  Project: {failure['project']}")
-                if failure['stderr']:
-                    # Extract error summary from stderr
-                    error_lines = failure['stderr'].split('\n')
-                    error_summary = [line for line in error_lines 
-                                   if 'error' in line.lower() or 'failed' in line.lower()]
-                    if error_summary:
-                        print("  Errors:")
-                        for line in error_summary[:5]:  # Show first 5 error lines
-                            print(f"    {line}")
-                    else:
-                        print(f"  Stderr: {failure['stderr'][:200]}...")
-                print()
+    if args.priority:
+        priority = find_priority_issues(repo_root, [entry["issue"] for entry in plan])
+        plan = prioritize_plan(plan, priority)
+        reason_counts = defaultdict(int)
+        for issue_reasons in priority.values():
+            for reason in issue_reasons:
+                reason_counts[reason] += 1
+        print(f"Priority: {len(priority)} issues first "
+              f"({', '.join(f'{reason}: {count}' for reason, count in sorted(reason_counts.items())) or 'none found'})")
     
-    # Print issues with no project files (if any)
-    if results["no_project"]:
-        print("\n" + "=" * 80)
-        print("ISSUES WITH NO PROJECT FILES")
-        print("=" * 80)
-        for issue_name in sorted(results["no_project"]):
-            print(f"  {issue_name}")
+    if args.shard:
+        weights = load_shard_weights(Path(args.shard_weights)) if args.shard_weights else {}
+        total_issues = len(plan)
+        plan, loads = shard_plan(plan, args.shard, weights, repo_root)
+        print(f"Shard {args.shard[0]}/{args.shard[1]}: {len(plan)} of {total_issues} issues, "
+              f"~{loads[args.shard[0] - 1]:.0f} s of estimated build time "
+              f"(shards: {min(loads):.0f}-{max(loads):.0f} s)")
+    
+    if args.log_dir:
+        log_dir = Path(args.log_dir)
+    elif error_output_dir:
+        log_dir = error_output_dir
+    else:
+        log_dir = repo_root / STATE_DIR_NAME / "logs"
+    # dotnet runs in each project's directory, so the MSBuild file loggers need absolute paths
+    log_dir = log_dir.resolve()
+    log_dir.mkdir(parents=True, exist_ok=True)
+    
+    if args.watch:
+        return watch_builds(plan, args, repo_root, log_dir)
+    
+    if args.results:
+        results_path = Path(args.results).resolve()
+    elif args.shard:
+        results_path = log_dir / f"results-{args.shard[0]}-of-{args.shard[1]}.jsonl"
+    else:
+        results_path = log_dir / "results.jsonl"
+    print(f"Build results will be streamed to: {results_path}")
+    
+    if args.restore:
+        # Built with --no-restore, these would only fail with misleading assets file errors,
+        # so they are not built and are reported as failed builds with their restore output
+        restore_failed = run_restore(plan, repo_root, args.jobs)
+        if restore_failed:
+            plan = [dict(entry, projects=[dict(project, restore_error=restore_failed[project["path"]])
+                                          if project["path"] in restore_failed else project
+                                          for project in entry["projects"]])
+                    for entry in plan]
+            print(f"Skipping the build of {len(restore_failed)} projects that failed to restore")
+    
+    if args.jobs > 1:
+        print(f"Building with {args.jobs} parallel jobs")
+    profile, test_outcomes = run_builds(plan, args, repo_root, results, failures, error_output_dir,
+                                        log_dir, results_path, frameworks)
+    
+    print_build_summary(results, failures, not json_projects, profile, args.profile)
+    if args.test:
+        print_test_summary(test_outcomes)
+    if args.failed_json:
+        write_failed_builds_json(Path(args.failed_json), failures)
+        print(f"\nFailed builds written to: {args.failed_json}")
     
-    return 0 if not results["failed"] else 1
+    return 0 if not results["failed"] and not results["timeout"] else 1
 
 
 if __name__ == "__main__":
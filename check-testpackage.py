@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Script to check the E*.dump files written by the NUnit engine for their
+TestPackage element and count the DLLs it holds (port of check-testpackage.ps1).
+
+Dump files are found with a single walk that skips directories which never hold
+them, and are scanned through mmap in a pool of worker processes (the search and
+decoding hold the GIL, so threads would not run them in parallel), reading each
+only up to the end of its first TestPackage element. One JSON line per dump is streamed as it is
+scanned, followed by the report of the dumps with several DLLs.
+
+Usage:
+    python check-testpackage.py                  # Scan the repo, JSONL in .check-builds/testpackage.jsonl
+    python check-testpackage.py Issue1377        # Scan one directory
+    python check-testpackage.py --jsonl - -j 16  # Stream the JSONL to stdout, report to stderr
+"""
+
+import argparse
+import itertools
+import json
+import mmap
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# Set UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+
+# State directory shared with check-builds.py
+STATE_DIR_NAME = ".check-builds"
+
+# Directories never holding engine dumps (these are written under bin/.../Dump)
+PRUNED_DIRS = {".git", ".vs", "obj", "packages", "node_modules", STATE_DIR_NAME}
+
+# TestPackage element: <TestPackage>: name.dll</TestPackage> or <TestPackage>name.dll</TestPackage>
+TEST_PACKAGE_OPEN = b'<TestPackage>'
+TEST_PACKAGE_CLOSE = b'</TestPackage>'
+TEST_PACKAGE_PATTERN = re.compile(r'<TestPackage>(.*?)</TestPackage>', re.DOTALL)
+DLL_PATTERN = re.compile(r'[a-zA-Z0-9_\-.]+\.dll', re.IGNORECASE)
+UTF16_BOMS = (b'\xff\xfe', b'\xfe\xff')
+
+# Dumps shown in the sample section of the report
+SAMPLE_COUNT = 5
+
+# Dumps sent to a worker process at a time, so that small dumps are not scanned one round trip each
+SCAN_CHUNK_SIZE = 16
+
+
+def is_dump_file(name: str) -> bool:
+    """Check a file name against E*.dump, case-insensitively like Get-ChildItem -Filter."""
+    return name[:1] in ('E', 'e') and name.lower().endswith('.dump')
+
+
+def find_dump_files(root: Path) -> Iterator[Path]:
+    """
+    Walk root once with os.scandir, skipping the directories in PRUNED_DIRS.
+    Returns: Iterator over the E*.dump files
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                for item in it:
+                    if item.is_dir(follow_symlinks=False):
+                        if item.name not in PRUNED_DIRS:
+                            stack.append(Path(item.path))
+                    elif is_dump_file(item.name):
+                        yield Path(item.path)
+        except OSError as e:
+            print(f"Warning: cannot read {directory}: {e}", file=sys.stderr)
+
+
+def read_test_package(dump_path: Path) -> Optional[str]:
+    """
+    Read the content of the first TestPackage element of a dump, stopping at its
+    closing tag. UTF-16 dumps are decoded whole.
+    Returns: The element content, or None if the dump has no TestPackage element
+    """
+    with open(dump_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            if buf[:2] in UTF16_BOMS:
+                match = TEST_PACKAGE_PATTERN.search(buf[:].decode('utf-16'))
+                return match.group(1) if match else None
+            start = buf.find(TEST_PACKAGE_OPEN)
+            if start < 0:
+                return None
+            start += len(TEST_PACKAGE_OPEN)
+            end = buf.find(TEST_PACKAGE_CLOSE, start)
+            if end < 0:
+                return None
+            return buf[start:end].decode('utf-8', errors='replace')
+
+
+def scan_dump(dump_path: Path, root: Path) -> Dict[str, Any]:
+    """
+    Extract the DLLs of the TestPackage element of a dump.
+    Returns: Record with the dump path (relative to root), the TestPackage content,
+             the DLL count and the DLLs, or the error that prevented reading it
+    """
+    record = {"file": os.path.relpath(dump_path, root), "test_package": None, "dll_count": 0, "dlls": []}
+    try:
+        content = read_test_package(dump_path)
+    except (OSError, ValueError) as e:
+        record["error"] = str(e)
+        return record
+    if content is not None:
+        content = re.sub(r'^:\s*', '', content.strip())
+        record["test_package"] = content
+        record["dlls"] = DLL_PATTERN.findall(content)
+        record["dll_count"] = len(record["dlls"])
+    return record
+
+
+def print_report(records: List[Dict[str, Any]], out):
+    """Print the summary of the scanned dumps, in the sections of check-testpackage.ps1."""
+    multiple = [record for record in records if record["dll_count"] > 1]
+    no_dll = [record for record in records if "error" not in record
+              and (record["dll_count"] == 0 or record["test_package"] is None)]
+    errors = [record for record in records if "error" in record]
+    
+    print("\n=== Summary ===", file=out)
+    print(f"Total dump files checked: {len(records) - len(errors)}", file=out)
+    if errors:
+        print(f"Dump files that could not be read: {len(errors)}", file=out)
+    
+    print("\n=== TestPackage Analysis ===", file=out)
+    print(f"Files with 1 DLL: {sum(1 for record in records if record['dll_count'] == 1)}", file=out)
+    print(f"Files with multiple DLLs: {len(multiple)}", file=out)
+    print(f"Files with no DLL found: {len(no_dll)}", file=out)
+    
+    if multiple:
+        print("\n=== Files with Multiple DLLs ===", file=out)
+        for record in multiple:
+            print(f"\nFile: {record['file']}", file=out)
+            print(f"  TestPackage: {record['test_package']}", file=out)
+            print(f"  DLL Count: {record['dll_count']}", file=out)
+            print(f"  DLLs: {', '.join(record['dlls'])}", file=out)
+    else:
+        print("\n✓ No files found with multiple DLLs in TestPackage", file=out)
+    
+    if no_dll:
+        print("\n=== Files with No DLL Found ===", file=out)
+        for record in no_dll:
+            print(f"\nFile: {record['file']}", file=out)
+            print(f"  TestPackage: '{record['test_package'] or ''}'", file=out)
+            print(f"  DLL Count: {record['dll_count']}", file=out)
+    
+    if errors:
+        print("\n=== Files that could not be read ===", file=out)
+        for record in errors:
+            print(f"  {record['file']}: {record['error']}", file=out)
+    
+    print("\n=== DLL Count Distribution ===", file=out)
+    distribution = Counter(record["dll_count"] for record in records if "error" not in record)
+    for dll_count, files in sorted(distribution.items()):
+        print(f"  {dll_count} DLL(s): {files} files", file=out)
+    
+    samples = [record for record in records if "error" not in record][:SAMPLE_COUNT]
+    if samples:
+        print("\n=== Sample TestPackage Contents ===", file=out)
+        for record in samples:
+            print(f"\nFile: {record['file']}", file=out)
+            print(f"  TestPackage: {record['test_package'] or ''}", file=out)
+            print(f"  DLL Count: {record['dll_count']}", file=out)
+
+
+def main():
+    """Main function."""
+    default_jsonl = Path(STATE_DIR_NAME) / "testpackage.jsonl"
+    parser = argparse.ArgumentParser(
+        description='Check the TestPackage element of the NUnit engine E*.dump files and count its DLLs.',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python check-testpackage.py
+  python check-testpackage.py Issue1377
+  python check-testpackage.py --jsonl - -j 16
+  python check-testpackage.py --jsonl dumps.jsonl --multiple-only
+        """
+    )
+    parser.add_argument(
+        'root',
+        nargs='?',
+        type=str,
+        default='.',
+        help='Directory searched for E*.dump files (default: current directory)'
+    )
+    parser.add_argument(
+        '--jsonl',
+        type=str,
+        metavar='PATH',
+        help=f'Stream one JSON line per dump to PATH, - for stdout (default: {default_jsonl})'
+    )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Number of worker processes scanning dumps (default: 0 = one per CPU, 1 = no worker process)'
+    )
+    parser.add_argument(
+        '--multiple-only',
+        action='store_true',
+        help='Only report the dumps whose TestPackage holds more than one DLL'
+    )
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    root = Path(args.root)
+    if not root.is_dir():
+        parser.error(f"{root} is not a directory")
+    out = sys.stderr if args.jsonl == '-' else sys.stdout
+    if args.jsonl == '-':
+        jsonl = sys.stdout
+    else:
+        jsonl_path = Path(args.jsonl) if args.jsonl else Path(__file__).parent / default_jsonl
+        jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+        jsonl = open(jsonl_path, 'w', encoding='utf-8')
+    
+    records = []
+    executor = ProcessPoolExecutor(max_workers=args.jobs or None) if args.jobs != 1 else None
+    try:
+        dump_paths = find_dump_files(root)
+        if executor:
+            scanned = executor.map(scan_dump, dump_paths, itertools.repeat(root), chunksize=SCAN_CHUNK_SIZE)
+        else:
+            scanned = map(scan_dump, dump_paths, itertools.repeat(root))
+        for record in scanned:
+            if "error" in record:
+                print(f"Warning: Error reading {record['file']}: {record['error']}", file=sys.stderr)
+            records.append(record)
+            jsonl.write(json.dumps(record) + "\n")
+            jsonl.flush()
+    finally:
+        if executor:
+            executor.shutdown()
+        if jsonl is not sys.stdout:
+            jsonl.close()
+    
+    if args.multiple_only:
+        multiple = [record for record in records if record["dll_count"] > 1]
+        print(f"\nFiles with multiple DLLs: {len(multiple)} of {len(records)}", file=out)
+        for record in multiple:
+            print(f"  {record['file']}: {', '.join(record['dlls'])}", file=out)
+    else:
+        print_report(records, out)
+    
+    print(f"\nScanned {len(records)} dump file(s) in {time.perf_counter() - start:.2f}s", file=out)
+    if args.jsonl != '-':
+        print(f"Per-dump results: {jsonl_path}", file=out)
+
+
+if __name__ == "__main__":
+    main()
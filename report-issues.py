@@ -0,0 +1,717 @@
+#!/usr/bin/env python3
+"""
+Script to generate the regression test report (Markdown and JSON) from the
+IssueRunner results (.nunit/IssueRunner/results.json, or the issue_results.json
+files of the Issue* directories with --per-issue), compared against the
+IssueRunner baseline. Issues found on one side only are reported as new or missing.
+
+A compact summary of every results file is kept in .check-builds/report-index.json,
+keyed by the file's mtime and size (and content hash), so only the files that
+changed since the last report are read again. Results files are read with a
+streaming parser that skips the large *_output fields without decoding them.
+
+Usage:
+    python report-issues.py                       # Write .check-builds/TestReport.md and report.json
+    python report-issues.py --markdown -          # Print the Markdown report
+    python report-issues.py --markdown TestReport.md --json report.json
+    python report-issues.py --baseline old-results.json
+    python report-issues.py --per-issue           # Current results from the Issue*/issue_results.json files
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Set UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
+
+
+# State directory shared with check-builds.py and analyze-build-errors.py
+STATE_DIR_NAME = ".check-builds"
+REPORT_INDEX_NAME = "report-index.json"
+
+# Bumped whenever the indexed summary changes shape, to discard older indexes
+REPORT_INDEX_VERSION = 1
+
+ISSUE_RUNNER_DIR = Path(".nunit") / "IssueRunner"
+ISSUE_RESULTS_NAME = "issue_results.json"
+ISSUE_DIR_PATTERN = re.compile(r'Issue(\d+)$')
+
+# Fields never decoded by the streaming parser (complete command output)
+SKIPPED_FIELD_SUFFIXES = ("_output",)
+
+# Fields of a results entry kept in the summary index
+SUMMARY_FIELDS = ("number", "project_path", "target_frameworks", "update_result", "restore_result",
+                  "build_result", "test_result", "test_conclusion", "run_result", "reason", "last_run")
+
+# Error fields kept, shortened, for the failure details
+ERROR_FIELDS = ("update_error", "restore_error", "build_error", "test_error")
+ERROR_EXCERPT_CHARS = 400
+
+# Status of an issue with several projects: the first status found among its projects
+ISSUE_STATUS_ORDER = ("fail", "not run", "success", "skipped")
+
+# Tokens of the streaming JSON parser
+JSON_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+JSON_WHITESPACE = re.compile(rb'[ \t\r\n]*')
+JSON_SCALAR = re.compile(rb'[^,\]}\s]+')
+JSON_STRUCTURE = re.compile(rb'["\[\]{}]')
+UTF8_BOM = b'\xef\xbb\xbf'
+
+
+def skip_whitespace(buf, pos: int) -> int:
+    """Returns: Position of the first non-whitespace byte at or after pos"""
+    return JSON_WHITESPACE.match(buf, pos).end()
+
+
+def string_end(buf, pos: int) -> int:
+    """Returns: Position just past the JSON string starting at pos"""
+    match = JSON_STRING.match(buf, pos)
+    if match is None:
+        raise ValueError(f"unterminated string at byte {pos}")
+    return match.end()
+
+
+def value_end(buf, pos: int) -> int:
+    """
+    Find the end of the JSON value starting at pos without decoding it.
+    Returns: Position just past the value
+    """
+    first = buf[pos:pos + 1]
+    if first == b'"':
+        return string_end(buf, pos)
+    if first in (b'[', b'{'):
+        depth = 0
+        while True:
+            match = JSON_STRUCTURE.search(buf, pos)
+            if match is None:
+                raise ValueError(f"unterminated value at byte {pos}")
+            token = match.group()
+            if token == b'"':
+                pos = string_end(buf, match.start())
+                continue
+            pos = match.end()
+            depth += 1 if token in (b'[', b'{') else -1
+            if depth == 0:
+                return pos
+    match = JSON_SCALAR.match(buf, pos)
+    if match is None:
+        raise ValueError(f"expected a value at byte {pos}")
+    return match.end()
+
+
+def read_object(buf, pos: int, skipped_suffixes: Tuple[str, ...]) -> Tuple[Dict[str, Any], int]:
+    """
+    Read the JSON object starting at pos, leaving out the fields whose name ends
+    with one of skipped_suffixes (their values are skipped, never decoded).
+    Returns: Tuple of (object, position just past it)
+    """
+    if buf[pos:pos + 1] != b'{':
+        raise ValueError(f"expected an object at byte {pos}")
+    obj = {}
+    pos = skip_whitespace(buf, pos + 1)
+    if buf[pos:pos + 1] == b'}':
+        return obj, pos + 1
+    while True:
+        key_end = string_end(buf, pos)
+        key = json.loads(buf[pos:key_end])
+        pos = skip_whitespace(buf, key_end)
+        if buf[pos:pos + 1] != b':':
+            raise ValueError(f"expected ':' at byte {pos}")
+        pos = skip_whitespace(buf, pos + 1)
+        end = value_end(buf, pos)
+        if not key.endswith(skipped_suffixes):
+            obj[key] = json.loads(buf[pos:end])
+        pos = skip_whitespace(buf, end)
+        separator = buf[pos:pos + 1]
+        if separator == b'}':
+            return obj, pos + 1
+        if separator != b',':
+            raise ValueError(f"expected ',' or '}}' at byte {pos}")
+        pos = skip_whitespace(buf, pos + 1)
+
+
+def iter_json_entries(buf, skipped_suffixes: Tuple[str, ...] = SKIPPED_FIELD_SUFFIXES) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the objects of a JSON array (or a single JSON object) one at a time.
+    Returns: Iterator over the objects, without their skipped fields
+    """
+    pos = skip_whitespace(buf, len(UTF8_BOM) if buf[:len(UTF8_BOM)] == UTF8_BOM else 0)
+    if buf[pos:pos + 1] == b'{':
+        yield read_object(buf, pos, skipped_suffixes)[0]
+        return
+    if buf[pos:pos + 1] != b'[':
+        raise ValueError("expected a JSON array or object")
+    pos = skip_whitespace(buf, pos + 1)
+    if buf[pos:pos + 1] == b']':
+        return
+    while True:
+        if buf[pos:pos + 1] == b'{':
+            entry, pos = read_object(buf, pos, skipped_suffixes)
+            yield entry
+        else:
+            pos = value_end(buf, pos)
+        pos = skip_whitespace(buf, pos)
+        separator = buf[pos:pos + 1]
+        if separator == b']':
+            return
+        if separator != b',':
+            raise ValueError(f"expected ',' or ']' at byte {pos}")
+        pos = skip_whitespace(buf, pos + 1)
+
+
+def entry_status(entry: Dict[str, Any]) -> str:
+    """Returns: success, fail, not run or skipped, as shown in the report"""
+    if entry.get("run_result") == "Skipped":
+        return "skipped"
+    return {"Success": "success", "Failed": "fail"}.get(entry.get("test_result"), "not run")
+
+
+def summarize_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reduce a results entry to what the report needs.
+    Returns: The summary fields, the report status and the shortened errors
+    """
+    summary = {field: entry.get(field) for field in SUMMARY_FIELDS}
+    summary["status"] = entry_status(entry)
+    summary["errors"] = {field: entry[field][:ERROR_EXCERPT_CHARS] for field in ERROR_FIELDS
+                         if isinstance(entry.get(field), str) and entry[field].strip()}
+    return summary
+
+
+def summarize_results_file(results_path: Path) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Stream a results file into entry summaries.
+    Returns: Tuple of (entry summaries, SHA-1 of the file content)
+    """
+    with open(results_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return [], hashlib.sha1().hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            summaries = [summarize_entry(entry) for entry in iter_json_entries(buf)]
+            return summaries, hashlib.sha1(buf).hexdigest()
+
+
+def file_hash(path: Path) -> str:
+    """Returns: SHA-1 of the file content"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return hashlib.sha1().hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            return hashlib.sha1(buf).hexdigest()
+
+
+def load_report_index(index_path: Path) -> Dict[str, Any]:
+    """
+    Load the summary index kept between reports.
+    Returns: Dictionary mapping results file paths to their index entries, empty
+             if missing, unreadable or written by another index version
+    """
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(index, dict) or index.get("version") != REPORT_INDEX_VERSION:
+        return {}
+    return index.get("files", {})
+
+
+def save_report_index(index_path: Path, files: Dict[str, Any]):
+    """Write the summary index, replacing the previous one atomically."""
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_suffix(".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"version": REPORT_INDEX_VERSION, "files": files}, f, sort_keys=True)
+    os.replace(tmp_path, index_path)
+
+
+def load_summaries(results_paths: List[Path], repo_root: Path, stored: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+    """
+    Get the entry summaries of every results file, reading again only the files
+    whose mtime or size changed since they were indexed. A file whose mtime changed
+    but whose content hash did not (checkout, touch) is not parsed again.
+    Returns: Tuple of (new index of the files, number of files parsed)
+    """
+    files = {}
+    parsed = 0
+    for results_path in results_paths:
+        key = os.path.relpath(results_path, repo_root).replace(os.sep, '/')
+        try:
+            stat = results_path.stat()
+        except OSError:
+            continue
+        entry = stored.get(key)
+        if entry is not None and entry["size"] == stat.st_size:
+            if entry["mtime_ns"] == stat.st_mtime_ns:
+                files[key] = entry
+                continue
+            content_hash = file_hash(results_path)
+            if entry["sha1"] == content_hash:
+                files[key] = dict(entry, mtime_ns=stat.st_mtime_ns)
+                continue
+        try:
+            summaries, content_hash = summarize_results_file(results_path)
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not read {key}: {e}", file=sys.stderr)
+            continue
+        parsed += 1
+        files[key] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha1": content_hash,
+                      "entries": summaries}
+    return files, parsed
+
+
+def find_issue_results(repo_root: Path) -> List[Path]:
+    """Returns: The issue_results.json file of every Issue* directory, sorted"""
+    results_paths = []
+    with os.scandir(repo_root) as it:
+        for dir_entry in it:
+            if dir_entry.name.startswith("Issue") and dir_entry.is_dir():
+                results_path = Path(dir_entry.path) / ISSUE_RESULTS_NAME
+                if results_path.is_file():
+                    results_paths.append(results_path)
+    return sorted(results_paths)
+
+
+def find_issue_folders(repo_root: Path) -> Dict[int, str]:
+    """Returns: Dictionary mapping issue numbers to the name of their Issue* directory"""
+    folders = {}
+    with os.scandir(repo_root) as it:
+        for dir_entry in it:
+            match = ISSUE_DIR_PATTERN.match(dir_entry.name)
+            if match and dir_entry.is_dir():
+                folders.setdefault(int(match.group(1)), dir_entry.name)
+    return folders
+
+
+def issue_status(entries: List[Dict[str, Any]]) -> str:
+    """Returns: Status of an issue from the statuses of its projects (see ISSUE_STATUS_ORDER)"""
+    statuses = {entry["status"] for entry in entries}
+    return next((status for status in ISSUE_STATUS_ORDER if status in statuses), "not run")
+
+
+def issue_conclusion(entries: List[Dict[str, Any]]) -> str:
+    """Returns: The distinct conclusions (or skip reasons) of the projects of an issue"""
+    conclusions = []
+    for entry in entries:
+        conclusion = entry.get("test_conclusion") or entry.get("reason") or ""
+        if conclusion and conclusion not in conclusions:
+            conclusions.append(conclusion)
+    return "; ".join(conclusions)
+
+
+def group_by_issue(files: Dict[str, Any], folders: Optional[Dict[int, str]] = None) -> Dict[int, Dict[str, Any]]:
+    """
+    Group the entry summaries of the indexed files by issue number. Entries of an
+    issue_results.json file belong to its Issue* directory; those of a results file
+    covering every issue (results.json) get their folder from folders.
+    Returns: Dictionary mapping issue numbers to their folder, projects, status and conclusion
+    """
+    issues = {}
+    for key, indexed in sorted(files.items()):
+        folder = key.split('/')[0] if key.endswith('/' + ISSUE_RESULTS_NAME) else None
+        for entry in indexed["entries"]:
+            number = entry.get("number")
+            if not isinstance(number, int):
+                digits = re.search(r'\d+', folder or "")
+                if digits is None:
+                    continue
+                number = int(digits.group())
+            issue = issues.setdefault(number, {"number": number, "projects": [],
+                                               "folder": folder or (folders or {}).get(number)})
+            issue["projects"].append(entry)
+    for issue in issues.values():
+        issue["status"] = issue_status(issue["projects"])
+        issue["conclusion"] = issue_conclusion(issue["projects"])
+    return issues
+
+
+def read_json_file(json_path: Path, default: Any) -> Any:
+    """Returns: The content of a (small) JSON file, or default if missing or malformed"""
+    try:
+        with open(json_path, 'r', encoding='utf-8-sig') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def load_runner_context(repo_root: Path) -> Tuple[Dict[int, Dict[str, Any]], Optional[str], Dict[str, str]]:
+    """
+    Read the issue metadata, repository and package versions recorded by IssueRunner.
+    Returns: Tuple of (metadata by issue number, repository URL, package versions under test)
+    """
+    runner_dir = repo_root / ISSUE_RUNNER_DIR
+    metadata = read_json_file(runner_dir / "issues_metadata.json", [])
+    metadata = {entry["number"]: entry for entry in metadata
+                if isinstance(entry, dict) and isinstance(entry.get("number"), int)}
+    repository = read_json_file(runner_dir / "repository.json", {})
+    repo_url = None
+    if isinstance(repository, dict) and repository.get("owner") and repository.get("name"):
+        repo_url = f"https://github.com/{repository['owner']}/{repository['name']}"
+    packages = read_json_file(runner_dir / "nunit-packages-current.json", {})
+    packages = packages.get("packages", {}) if isinstance(packages, dict) else {}
+    return metadata, repo_url, packages
+
+
+def compare_to_baseline(issues: Dict[int, Dict[str, Any]],
+                        baseline: Optional[Dict[int, Dict[str, Any]]]) -> Dict[int, Dict[str, Any]]:
+    """
+    Set the baseline status of every issue and classify its change: regression
+    (succeeded in the baseline, no longer does), fixed (now succeeds), new (not in
+    the baseline) or None. Skipped issues are never a regression.
+    Returns: The baseline issues missing from the current results, with change "missing"
+    """
+    for issue in issues.values():
+        previous = baseline.get(issue["number"]) if baseline is not None else None
+        issue["baseline_status"] = previous["status"] if previous else None
+        if baseline is None:
+            issue["change"] = None
+        elif previous is None:
+            issue["change"] = "new"
+        elif previous["status"] == "success" and issue["status"] in ("fail", "not run"):
+            issue["change"] = "regression"
+        elif previous["status"] in ("fail", "not run") and issue["status"] == "success":
+            issue["change"] = "fixed"
+        else:
+            issue["change"] = None
+    return {number: dict(previous, status=None, baseline_status=previous["status"], change="missing")
+            for number, previous in (baseline or {}).items() if number not in issues}
+
+
+def count_statuses(issues: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Returns: Total, success and fail counts of a list of issues"""
+    return {"total": len(issues),
+            "success": sum(1 for issue in issues if issue["status"] == "success"),
+            "fail": sum(1 for issue in issues if issue["status"] == "fail")}
+
+
+def escape_cell(text: Any) -> str:
+    """Returns: Text usable in a Markdown table cell"""
+    return str(text or "").replace('\n', ' ').replace('|', '\\|')
+
+
+def issue_link(issue: Dict[str, Any]) -> str:
+    """Returns: Markdown link to the GitHub issue, or its plain number"""
+    url = issue.get("url")
+    return f"[#{issue['number']}]({url})" if url else f"#{issue['number']}"
+
+
+def render_issue_table(issues: List[Dict[str, Any]], lines: List[str]):
+    """Append the | Issue | Title | Test | Conclusion | table of issues to lines."""
+    lines.append("| Issue | Title | Test | Conclusion |")
+    lines.append("| --- | --- | --- | --- |")
+    for issue in issues:
+        icon = "✅" if issue["status"] == "success" else "❗"
+        lines.append(f"| {icon} {issue_link(issue)} | {escape_cell(issue['title'])} | {issue['status']} | "
+                     f"{escape_cell(issue['conclusion'])} |")
+
+
+def render_change_table(issues: List[Dict[str, Any]], lines: List[str]):
+    """Append the | Issue | Title | Baseline | Test | Conclusion | table of issues to lines."""
+    lines.append("| Issue | Title | Baseline | Test | Conclusion |")
+    lines.append("| --- | --- | --- | --- | --- |")
+    for issue in issues:
+        lines.append(f"| {issue_link(issue)} | {escape_cell(issue['title'])} | {issue['baseline_status'] or '-'} | "
+                     f"{issue['status'] or '-'} | {escape_cell(issue['conclusion'])} |")
+
+
+def render_issue_details(issue: Dict[str, Any], repo_url: Optional[str], lines: List[str]):
+    """Append the details section of a failing issue to lines."""
+    lines.append(f"#### Issue #{issue['number']}: {issue['title']}")
+    lines.append("")
+    lines.append(f"**Link**: {issue_link(issue)}")
+    lines.append("")
+    if repo_url and issue["folder"]:
+        lines.append(f"**Repro folder**: [{issue['folder']}]({repo_url}/tree/master/{issue['folder']})")
+        lines.append("")
+    if issue["labels"]:
+        lines.append(f"**Labels**: {', '.join(issue['labels'])}")
+        lines.append("")
+    lines.append(f"**Conclusion**: {issue['conclusion']}")
+    lines.append("")
+    errors = [(entry["project_path"], field, text) for entry in issue["projects"]
+              for field, text in entry.get("errors", {}).items()]
+    if errors:
+        lines.append("**Errors**:")
+        lines.append("")
+        lines.append("```")
+        for project_path, field, text in errors:
+            lines.append(f"=== {project_path} ({field.replace('_error', '')}) ===")
+            lines.append(text.rstrip())
+        lines.append("```")
+        lines.append("")
+
+
+def render_markdown(report: Dict[str, Any], issues: List[Dict[str, Any]],
+                    missing: List[Dict[str, Any]]) -> str:
+    """
+    Render the report in the layout of the IssueRunner TestReport.md, with the
+    changes against the baseline added, including the issues of one side only.
+    Returns: The Markdown text
+    """
+    closed = [issue for issue in issues if issue["state"] != "open"]
+    opened = [issue for issue in issues if issue["state"] == "open"]
+    summary = report["summary"]
+    lines = ["# Test Report", "", "## Summary", ""]
+    for label, counts in (("Regression tests", summary["closed"]), ("Open issues", summary["open"])):
+        lines.append(f"- {label}: total {counts['total']}, success {counts['success']}, fail {counts['fail']}")
+    if report["baseline"] is not None:
+        lines.append(f"- Against the baseline: {summary['regressions']} regression(s), "
+                     f"{summary['fixed']} fixed, {summary['new']} new, {summary['missing']} missing")
+    lines.append("")
+    
+    lines.extend(["## What we are testing", ""])
+    if report["repository"]:
+        lines.extend([f"- Repository: {report['repository']}", ""])
+    if report["packages"]:
+        lines.extend(["Package versions under test:", ""])
+        lines.extend(f"- {name}: {version}" for name, version in sorted(report["packages"].items()))
+        lines.append("")
+    
+    if report["baseline"] is not None:
+        lines.extend(["## Changes against the baseline", ""])
+        for change, heading, empty in (("regression", "Regressions", "No regressions."),
+                                       ("fixed", "Fixed", "No fixed."),
+                                       ("new", "New (not in the baseline)", "No new issues."),
+                                       ("missing", "Missing from the current results", "No missing issues.")):
+            changed = [issue for issue in issues + missing if issue["change"] == change]
+            lines.extend([f"### {heading}", ""])
+            if changed:
+                render_change_table(changed, lines)
+            else:
+                lines.append(empty)
+            lines.append("")
+    
+    counts = summary["closed"]
+    lines.extend(["## Regression tests (closed issues)", "",
+                  f"- Total: {counts['total']}, Success: {counts['success']}, Fail: {counts['fail']}", ""])
+    render_issue_table(closed, lines)
+    lines.append("")
+    failures = [issue for issue in closed if issue["status"] != "success"]
+    if failures:
+        lines.extend(["### Closed failures (details)", ""])
+        for issue in failures:
+            render_issue_details(issue, report["repository"], lines)
+    
+    counts = summary["open"]
+    lines.extend(["## Open issues", "",
+                  f"- Total: {counts['total']}, Success: {counts['success']}, Fail: {counts['fail']}", ""])
+    succeeded = [issue for issue in opened if issue["status"] == "success"]
+    if succeeded:
+        lines.extend(["### Succeeded (candidates to close)", "",
+                      "| Issue | Title | Conclusion |", "| --- | --- | --- |"])
+        lines.extend(f"| {issue_link(issue)} | {escape_cell(issue['title'])} | {escape_cell(issue['conclusion'])} |"
+                     for issue in succeeded)
+        lines.append("")
+    failing = [issue for issue in opened if issue["status"] == "fail"]
+    if failing:
+        lines.extend(["### Failing (confirmed repros)", ""])
+        for issue in failing:
+            render_issue_details(issue, report["repository"], lines)
+    return "\n".join(lines).rstrip() + "\n"
+
+
+def build_report(repo_root: Path, current_path: Optional[Path], baseline_path: Optional[Path], index_path: Path,
+                 rebuild: bool = False) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]], int]:
+    """
+    Index the results files and assemble the report data. The current results are
+    read from current_path (results.json), or from the issue_results.json files
+    when it is None.
+    Returns: Tuple of (JSON report, issues sorted by number, baseline issues missing
+             from the current results, number of files parsed)
+    """
+    stored = {} if rebuild else load_report_index(index_path)
+    results_paths = [current_path] if current_path is not None else find_issue_results(repo_root)
+    if baseline_path is not None:
+        results_paths.append(baseline_path)
+    files, parsed = load_summaries(results_paths, repo_root, stored)
+    if parsed or set(files) != set(stored) or any(files[key] is not stored.get(key) for key in files):
+        save_report_index(index_path, files)
+    
+    folders = find_issue_folders(repo_root)
+    baseline = None
+    if baseline_path is not None:
+        baseline_key = os.path.relpath(baseline_path, repo_root).replace(os.sep, '/')
+        baseline_file = files.pop(baseline_key, None)
+        if baseline_file is None:
+            print(f"Warning: baseline {baseline_key} not found, changes are not reported", file=sys.stderr)
+        else:
+            baseline = group_by_issue({baseline_key: baseline_file}, folders)
+    
+    metadata, repo_url, packages = load_runner_context(repo_root)
+    issues = group_by_issue(files, folders)
+    missing = compare_to_baseline(issues, baseline)
+    for number, issue in list(issues.items()) + list(missing.items()):
+        meta = metadata.get(number, {})
+        issue["title"] = meta.get("title") or issue["folder"] or ""
+        issue["state"] = str(meta.get("state") or "closed").lower()
+        issue["labels"] = meta.get("labels") or []
+        issue["url"] = meta.get("url") or (f"{repo_url}/issues/{number}" if repo_url else None)
+    ordered = [issues[number] for number in sorted(issues)]
+    missing = [missing[number] for number in sorted(missing)]
+    
+    closed = [issue for issue in ordered if issue["state"] != "open"]
+    opened = [issue for issue in ordered if issue["state"] == "open"]
+    summary = {"closed": count_statuses(closed), "open": count_statuses(opened)}
+    for change in ("regression", "fixed", "new"):
+        key = "regressions" if change == "regression" else change
+        summary[key] = sum(1 for issue in ordered if issue["change"] == change)
+    summary["missing"] = len(missing)
+    fields = ("number", "title", "state", "labels", "url", "folder", "status", "baseline_status", "change", "conclusion")
+    report = {
+        "generated": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        "repository": repo_url,
+        "packages": packages,
+        "current": (os.path.relpath(current_path, repo_root).replace(os.sep, '/') if current_path is not None
+                    else f"Issue*/{ISSUE_RESULTS_NAME}"),
+        "baseline": os.path.relpath(baseline_path, repo_root).replace(os.sep, '/') if baseline is not None else None,
+        "summary": summary,
+        "issues": [{field: issue[field] for field in fields} for issue in ordered],
+        "regressions": [issue["number"] for issue in ordered if issue["change"] == "regression"],
+        "fixed": [issue["number"] for issue in ordered if issue["change"] == "fixed"],
+        "new": [issue["number"] for issue in ordered if issue["change"] == "new"],
+        "missing": [{field: issue[field] for field in fields} for issue in missing],
+    }
+    return report, ordered, missing, parsed
+
+
+def write_output(path_arg: str, repo_root: Path, text: str) -> Optional[Path]:
+    """
+    Write a report to a path (relative to the repo root), or to stdout for '-'.
+    Returns: The path written, or None for stdout
+    """
+    if path_arg == '-':
+        sys.stdout.write(text)
+        return None
+    path = Path(path_arg)
+    if not path.is_absolute():
+        path = repo_root / path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return path
+
+
+def main():
+    """Main function."""
+    default_markdown = Path(STATE_DIR_NAME) / "TestReport.md"
+    default_json = Path(STATE_DIR_NAME) / "report.json"
+    default_current = ISSUE_RUNNER_DIR / "results.json"
+    default_baseline = ISSUE_RUNNER_DIR / "results-baseline.json"
+    parser = argparse.ArgumentParser(
+        description='Generate the regression test report from the IssueRunner results.',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python report-issues.py
+  python report-issues.py --markdown -
+  python report-issues.py --markdown TestReport.md --json report.json
+  python report-issues.py --baseline old-results.json
+  python report-issues.py --no-baseline --rebuild-index
+  python report-issues.py --per-issue
+        """
+    )
+    parser.add_argument(
+        '--markdown',
+        type=str,
+        default=str(default_markdown),
+        metavar='PATH',
+        help=f'Markdown report, - for stdout (default: {default_markdown})'
+    )
+    parser.add_argument(
+        '--json',
+        type=str,
+        default=str(default_json),
+        metavar='PATH',
+        help=f'JSON report, - for stdout (default: {default_json})'
+    )
+    parser.add_argument(
+        '--no-json',
+        action='store_true',
+        help='Do not write the JSON report'
+    )
+    parser.add_argument(
+        '--current',
+        type=str,
+        default=str(default_current),
+        metavar='PATH',
+        help=f'Current results the report is made of (default: {default_current})'
+    )
+    parser.add_argument(
+        '--per-issue',
+        action='store_true',
+        help=f'Read the current results from the {ISSUE_RESULTS_NAME} files of the Issue* directories instead'
+    )
+    parser.add_argument(
+        '--baseline',
+        type=str,
+        default=str(default_baseline),
+        metavar='PATH',
+        help=f'Baseline results the report is compared against (default: {default_baseline})'
+    )
+    parser.add_argument(
+        '--no-baseline',
+        action='store_true',
+        help='Do not compare against a baseline'
+    )
+    parser.add_argument(
+        '--rebuild-index',
+        action='store_true',
+        help=f'Read every results file again instead of using {STATE_DIR_NAME}/{REPORT_INDEX_NAME}'
+    )
+    args = parser.parse_args()
+    
+    if args.markdown == '-' and args.json == '-' and not args.no_json:
+        parser.error("--markdown and --json cannot both be written to stdout")
+    
+    start = time.perf_counter()
+    repo_root = Path(__file__).parent
+    current_path = None
+    if not args.per_issue:
+        current_path = Path(args.current)
+        if not current_path.is_absolute():
+            current_path = repo_root / current_path
+        if not current_path.is_file():
+            print(f"Warning: {args.current} not found, reading the {ISSUE_RESULTS_NAME} files instead",
+                  file=sys.stderr)
+            current_path = None
+    baseline_path = None
+    if not args.no_baseline:
+        baseline_path = Path(args.baseline)
+        if not baseline_path.is_absolute():
+            baseline_path = repo_root / baseline_path
+    
+    index_path = repo_root / STATE_DIR_NAME / REPORT_INDEX_NAME
+    report, issues, missing, parsed = build_report(repo_root, current_path, baseline_path, index_path,
+                                                   args.rebuild_index)
+    written = [write_output(args.markdown, repo_root, render_markdown(report, issues, missing))]
+    if not args.no_json:
+        written.append(write_output(args.json, repo_root, json.dumps(report, indent=2) + "\n"))
+    
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    summary = report["summary"]
+    status = sys.stderr if None in written else sys.stdout
+    print(f"Report of {len(issues)} issues from {report['current']} ({parsed} results file(s) read, "
+          f"the rest from the index) in {elapsed_ms:.0f} ms", file=status)
+    if report["baseline"] is not None:
+        print(f"Against {report['baseline']}: {summary['regressions']} regression(s), "
+              f"{summary['fixed']} fixed, {summary['new']} new, {summary['missing']} missing", file=status)
+    for path in written:
+        if path is not None:
+            print(f"Wrote {os.path.relpath(path, repo_root)}", file=status)
+    return 1 if summary["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+"""
+Shared fixtures of the tests of the repository scripts.
+
+The scripts have hyphenated names and are not importable as modules, so they are
+loaded from their files once per test session.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_script(file_name: str):
+    """Import one of the hyphenated scripts of the repository as a module."""
+    spec = importlib.util.spec_from_file_location(file_name[:-3].replace('-', '_'), REPO_ROOT / file_name)
+    module = importlib.util.module_from_spec(spec)
+    # The scripts rewrap the console streams on Windows, which must not leak into pytest
+    streams = sys.stdout, sys.stderr
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        sys.stdout, sys.stderr = streams
+    return module
+
+
+@pytest.fixture(scope="session")
+def check_builds():
+    return load_script("check-builds.py")
+
+
+@pytest.fixture(scope="session")
+def analyzer():
+    return load_script("analyze-build-errors.py")
+
+
+@pytest.fixture(scope="session")
+def bench():
+    return load_script("bench-builds.py")
@@ -0,0 +1,91 @@
+"""Tests of analyze-build-errors.py: error fingerprints, log and results stream parsing."""
+
+import gzip
+import json
+
+import pytest
+
+CS0246 = ("C:\\repos\\issues\\Issue{n}\\Tests.cs(1{n},5): error CS0246: The type or namespace name '{name}' "
+          "could not be found (are you missing a using directive or an assembly reference?) "
+          "[C:\\repos\\issues\\Issue{n}\\Issue{n}.csproj]")
+
+
+def test_fingerprint_masks_paths_identifiers_and_numbers(analyzer):
+    first = analyzer.fingerprint_error(CS0246.format(n=12, name="NUnit"))
+    second = analyzer.fingerprint_error(CS0246.format(n=3456, name="Moq"))
+    assert first == second
+    assert first.startswith("CS0246: The type or namespace name <id> could not be found")
+    assert "Issue" not in first
+
+
+def test_fingerprint_keeps_the_code_apart(analyzer):
+    error = CS0246.format(n=1, name="NUnit")
+    assert analyzer.fingerprint_error(error) != analyzer.fingerprint_error(error.replace("CS0246", "CS0234"))
+
+
+def test_fingerprint_of_other_lines(analyzer):
+    assert (analyzer.fingerprint_error("Build FAILED after 12 retries with NUnit 4.1.0  ")
+            == "Build FAILED after <n> retries with NUnit <version>")
+    assert (analyzer.fingerprint_error("error: could not copy /tmp/a/b/c.dll to 'obj'")
+            == "error: could not copy <path> to <id>")
+
+
+def test_cluster_errors_groups_by_fingerprint(analyzer):
+    stats = [{"issue": f"Issue{n}", "errors": [("C# Compiler (CS0246)", CS0246.format(n=n, name=f"T{n}"))]}
+             for n in (1, 2, 3)]
+    stats.append({"issue": "Issue4", "errors": [("Other Error", "error: something else")]})
+    clusters = analyzer.cluster_errors(stats)
+    assert [(len(cluster["issues"]), cluster["count"]) for cluster in clusters] == [(3, 3), (1, 1)]
+    assert clusters[0]["issues"] == {"Issue1", "Issue2", "Issue3"}
+
+
+@pytest.mark.parametrize("line, category, code", [
+    (CS0246.format(n=1, name="NUnit"), "C# Compiler (CS0246)", "CS0246"),
+    ("A.csproj : error NU1101: Unable to find package NUnit.Foo [A.csproj]", "Other Error", "NU1101"),
+    ("Tests.cs(4,9): error NUnit2005: Consider using Assert.That analyzer [A.csproj]",
+     "NUnit Analyzer (NUnit2005)", "NUnit2005"),
+])
+def test_classify_error(analyzer, line, category, code):
+    assert analyzer.classify_error(line) == (category, code)
+
+
+def test_iter_error_lines_splits_bare_carriage_returns(analyzer, tmp_path):
+    log_file = tmp_path / "build.log"
+    log_file.write_bytes(b"progress 10%\rerror one\rprogress 20%\n"
+                         b"line with Error two\r\n"
+                         b"no problem here\n"
+                         b"  \r  ERROR three  \n")
+    assert list(analyzer.iter_error_lines(log_file)) == ["error one", "line with Error two", "ERROR three"]
+
+
+def test_build_errors_are_deduplicated_and_read_compressed(analyzer, tmp_path):
+    error = CS0246.format(n=1, name="NUnit")
+    output = f"  Determining projects to restore...\n{error}\n\nBuild FAILED.\n\n{error}\n    1 Error(s)\n"
+    log_file = tmp_path / "Issue1_build.log"
+    with gzip.open(tmp_path / "Issue1_build.log.gz", 'wt', encoding='utf-8') as f:
+        f.write(output)
+    assert analyzer.find_log_file(log_file) == tmp_path / "Issue1_build.log.gz"
+    assert analyzer.extract_errors_from_file(log_file) == [("C# Compiler (CS0246)", error)]
+
+
+def test_build_errors_fall_back_to_any_error_line(analyzer, tmp_path):
+    log_file = tmp_path / "build.log"
+    log_file.write_text("Restore failed\nUnhandled Error: the SDK could not be resolved\n", encoding='utf-8')
+    assert [line for _, line in analyzer.extract_errors_from_file(log_file)] == [
+        "Unhandled Error: the SDK could not be resolved"]
+
+
+def test_results_stream_with_an_incomplete_last_line(analyzer, tmp_path):
+    records = [
+        {"run": {"id": "abc", "shard": None, "selection": "all"}},
+        {"issue": "Issue1", "project": "Issue1/A.csproj", "success": True, "errors": []},
+        {"issue": "Issue2", "project": "Issue2/B.csproj", "success": False,
+         "errors": [CS0246.format(n=2, name="NUnit")] * 3},
+        {"issue": "Issue2", "status": "failed", "projects": ["Issue2/B.csproj"]},
+    ]
+    results_file = tmp_path / "results.jsonl"
+    results_file.write_text("".join(json.dumps(record) + "\n" for record in records)
+                            + '{"issue": "Issue3", "proj', encoding='utf-8')
+    assert analyzer.load_results_stream(results_file) == records
+    assert analyzer.failed_builds_from_stream(results_file, max_errors=2) == [
+        ("Issue2", "Issue2/B.csproj", [("C# Compiler (CS0246)", CS0246.format(n=2, name="NUnit"))] * 2)]
@@ -0,0 +1,59 @@
+"""Tests of batched builds: attribution of diagnostics and outputs to batch members, traversal projects."""
+
+import xml.etree.ElementTree as ElementTree
+from pathlib import Path
+from urllib.parse import unquote
+
+import pytest
+
+ROOT = Path("/repo")
+MEMBERS = [
+    ROOT / "Issue1" / "A" / "A.csproj",
+    ROOT / "Issue1" / "Issue1.sln",
+    ROOT / "Issue2" / "src" / "Issue2.sln",
+    ROOT / "Issue2" / "src" / "Sub" / "Sub.sln",
+    ROOT / "Issue3" / "Issue3.csproj",
+]
+
+
+@pytest.mark.parametrize("diagnostic_project, member", [
+    # A member itself, even when a solution contains it
+    ("/repo/Issue1/A/A.csproj", MEMBERS[0]),
+    ("  /repo/Issue1/A/A.csproj ", MEMBERS[0]),
+    # A project of a solution member
+    ("/repo/Issue1/B/B.csproj", MEMBERS[1]),
+    # The solution with the deepest directory wins
+    ("/repo/Issue2/src/Sub/P/P.csproj", MEMBERS[3]),
+    ("/repo/Issue2/src/Other/O.csproj", MEMBERS[2]),
+    # A project member does not claim the projects next to it
+    ("/repo/Issue3/Other.csproj", None),
+    ("/repo/Issue4/X.csproj", None),
+])
+def test_batch_member_for(check_builds, diagnostic_project, member):
+    assert check_builds.batch_member_for(diagnostic_project, MEMBERS) == member
+
+
+@pytest.mark.parametrize("project_name, output_path, member", [
+    ("A", "/repo/Issue1/A/bin/Debug/net8.0/A.dll", MEMBERS[0]),
+    ("B", "/repo/Issue1/B/bin/Debug/net8.0/B.dll", MEMBERS[1]),
+    ("P", "/repo/Issue2/src/Sub/P/bin/Debug/net8.0/P.dll", MEMBERS[3]),
+    ("Issue3", "/repo/Issue3/bin/Release/net462/Issue3.dll", MEMBERS[4]),
+    # Output redirected out of the tree (--scratch): matched by project name
+    ("a", "/dev/shm/scratch/A-1234/bin/Debug/net8.0/A.dll", MEMBERS[0]),
+    ("Unknown", "/dev/shm/scratch/Unknown/bin/Unknown.dll", None),
+])
+def test_output_member_for(check_builds, project_name, output_path, member):
+    assert check_builds.output_member_for(project_name, output_path, MEMBERS) == member
+
+
+def test_traversal_project_takes_paths_literally(check_builds, tmp_path):
+    project_paths = [tmp_path / "a;b%c@d$e&f'g*h?" / "P1.csproj", tmp_path / 'q"uo<te>' / "P2.csproj",
+                     tmp_path / "plain" / "P3.csproj"]
+    traversal_path = tmp_path / "batch.proj"
+    check_builds.write_traversal_project(traversal_path, project_paths)
+
+    items = ElementTree.parse(traversal_path).getroot().findall("./ItemGroup/BatchProject")
+    includes = [item.get("Include") for item in items]
+    assert [unquote(include) for include in includes] == [str(path) for path in project_paths]
+    for include in includes:
+        assert not set(include) & set(check_builds.MSBUILD_SPECIAL_CHARACTERS.replace('%', ''))
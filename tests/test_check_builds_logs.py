@@ -0,0 +1,55 @@
+"""Tests of the build log size cap (--log-cap): capped_log(), write_log() and finish_log()."""
+
+import io
+
+import pytest
+
+ERROR_LINE = "Program.cs(3,7): error CS0246: The type or namespace name 'Foo' could not be found [A.csproj]\n"
+WARNING_LINE = "Program.cs(9,1): warning CS0168: The variable 'e' is declared but never used [A.csproj]\n"
+
+
+def write_capped(check_builds, chunks, cap):
+    out = io.StringIO()
+    log = check_builds.capped_log(out, cap)
+    for chunk in chunks:
+        check_builds.write_log(log, chunk)
+    check_builds.finish_log(log)
+    return out.getvalue()
+
+
+def noise(start, count):
+    return [f"  noise line {index:05d}\n" for index in range(start, start + count)]
+
+
+def test_uncapped_log_is_written_as_is(check_builds):
+    chunks = noise(0, 500) + [ERROR_LINE]
+    assert write_capped(check_builds, chunks, None) == "".join(chunks)
+
+
+def test_log_under_the_cap_is_written_as_is(check_builds):
+    chunks = noise(0, 10) + [ERROR_LINE] + noise(10, 10)
+    assert write_capped(check_builds, chunks, 10_000) == "".join(chunks)
+
+
+def test_capped_log_keeps_head_tail_and_diagnostics(check_builds):
+    cap = 2000
+    lines = noise(0, 200) + [ERROR_LINE, WARNING_LINE] + noise(200, 200)
+    written = write_capped(check_builds, lines, cap)
+
+    before, _, rest = written.partition("\n[... ")
+    note, _, tail = rest.partition(" ...]\n\n")
+    omitted = int(note.split()[0])
+    assert f"log capped at {cap} bytes" in note
+    # The first half of the cap as is, then the diagnostics evicted from the tail
+    head = "".join(lines[:(cap // 2) // len(lines[0]) + 1])
+    assert before == head + ERROR_LINE + WARNING_LINE
+    # The last lines within the other half of the cap
+    assert tail.endswith(lines[-1]) and len(tail) <= cap - cap // 2
+    assert written.count("noise line") + omitted == 400
+
+
+@pytest.mark.parametrize("cap", [64, 1000, 4096])
+def test_capped_log_size_is_bounded(check_builds, cap):
+    written = write_capped(check_builds, noise(0, 2000), cap)
+    # Head and tail within the cap, plus the note and the line crossing the head's end
+    assert len(written) <= cap + 200
@@ -0,0 +1,135 @@
+"""Tests of issue selection (--package, --label, --state, --tfm) and of the adaptive build timeouts."""
+
+import argparse
+from pathlib import Path
+
+import pytest
+
+PACKAGES = {"nunit": ["3.14.0", "4.1.0"], "nunit3testadapter": ["4.5.0-beta.1"]}
+
+
+@pytest.mark.parametrize("value, selector", [
+    ("NUnit", ("nunit", None, None)),
+    ("NUnit3TestAdapter<5", ("nunit3testadapter", "<", "5")),
+    ("NUnit >= 4.1.0", ("nunit", ">=", "4.1.0")),
+    ("NUnit!=3.14", ("nunit", "!=", "3.14")),
+])
+def test_parse_package_selector(check_builds, value, selector):
+    assert check_builds.parse_package_selector(value) == selector
+
+
+@pytest.mark.parametrize("value", ["", "NUnit<", "NUnit~4", "<4"])
+def test_parse_package_selector_rejects(check_builds, value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        check_builds.parse_package_selector(value)
+
+
+def test_version_key(check_builds):
+    assert check_builds.version_key("4.3") == (4, 3, 0, 0)
+    assert check_builds.version_key("4.5.0-beta.1") == (4, 5, 0, 0)
+    assert check_builds.version_key("10.0") > check_builds.version_key("9.9.9")
+
+
+@pytest.mark.parametrize("selector, matches", [
+    (("nunit", None, None), True),
+    (("moq", None, None), False),
+    (("nunit", "<", "4"), True),
+    (("nunit", ">=", "5"), False),
+    (("nunit", "=", "4.1"), True),
+    (("nunit", "!=", "3.14.0"), True),
+    # Prerelease versions compare by their release part
+    (("nunit3testadapter", ">=", "4.5"), True),
+])
+def test_package_matches(check_builds, selector, matches):
+    assert check_builds.package_matches(PACKAGES, selector) is matches
+
+
+def selection_args(**values) -> argparse.Namespace:
+    return argparse.Namespace(**{"tfm": None, "label": None, "state": None, "package": None, **values})
+
+
+@pytest.fixture
+def selection(tmp_path):
+    """Plan and metadata index of three issues, the shape load_metadata_index() gives them."""
+    def project(issue, rel_path):
+        return {"name": f"{issue}/{rel_path}", "path": tmp_path / issue / rel_path, "exists": True}
+
+    plan = [
+        {"issue": "Issue1", "status": None, "projects": [project("Issue1", "A/A.csproj")]},
+        {"issue": "Issue2", "status": None, "projects": [project("Issue2", "Issue2.sln")]},
+        {"issue": "Issue3", "status": None, "projects": [project("Issue3", "C.csproj")]},
+        {"issue": "Issue4", "status": "no_project", "projects": []},
+        {"issue": "Issue5", "status": None, "projects": [project("Issue5", "E.csproj")]},
+    ]
+    index = {
+        "Issue1": {"state": "closed", "labels": ["is:bug", "pri:normal"], "packages": {"nunit": ["3.14.0"]},
+                   "projects": {"A/A.csproj": ["net6.0", "net8.0"]}, "result_frameworks": []},
+        "Issue2": {"state": "open", "labels": ["is:enhancement"], "packages": {"nunit": ["4.1.0"]},
+                   "projects": {"X/X.csproj": ["net462"], "Y/Y.csproj": ["net8.0"]}, "result_frameworks": []},
+        "Issue3": {"state": "closed", "labels": [], "packages": {},
+                   "projects": {"C.csproj": []}, "result_frameworks": ["net462"]},
+        "Issue4": {"state": "closed", "labels": [], "packages": {}, "projects": {}, "result_frameworks": []},
+        # Issue5 is not indexed (no metadata) and is never selected
+    }
+    return plan, index, tmp_path
+
+
+def selected_issues(check_builds, selection, **values):
+    plan, index, repo_root = selection
+    selected, frameworks = check_builds.select_plan(plan, index, repo_root, selection_args(**values))
+    return [entry["issue"] for entry in selected], {path.name: tfm for path, tfm in frameworks.items()}
+
+
+def test_select_plan_without_selectors_keeps_indexed_issues_with_projects(check_builds, selection):
+    assert selected_issues(check_builds, selection) == (["Issue1", "Issue2", "Issue3"], {})
+
+
+def test_select_plan_by_label_state_and_package(check_builds, selection):
+    assert selected_issues(check_builds, selection, label=["IS:BUG"])[0] == ["Issue1"]
+    assert selected_issues(check_builds, selection, label=["is:*"])[0] == ["Issue1", "Issue2"]
+    assert selected_issues(check_builds, selection, state=["open"])[0] == ["Issue2"]
+    assert selected_issues(check_builds, selection, package=[("nunit", ">=", "4")])[0] == ["Issue2"]
+    assert selected_issues(check_builds, selection, label=["is:*"], state=["closed"])[0] == ["Issue1"]
+
+
+def test_select_plan_by_target_framework(check_builds, selection):
+    # Issue1's multi-targeted project is built for the matching framework only,
+    # Issue2's solution is selected through one of its projects and built whole
+    assert selected_issues(check_builds, selection, tfm=["net8*"]) == (["Issue1", "Issue2"], {"A.csproj": "net8.0"})
+    # Issue3 sets no framework literally, the frameworks of issue_results.json are used
+    assert selected_issues(check_builds, selection, tfm=["net462"]) == (["Issue2", "Issue3"], {})
+    assert selected_issues(check_builds, selection, tfm=["net6.0,net8.0"]) == (["Issue1", "Issue2"], {})
+
+
+def samples(mode, *wall_times, timed_out=False):
+    return [{"mode": mode, "wall_time": wall_time, "timed_out": timed_out} for wall_time in wall_times]
+
+
+def test_adaptive_timeout_uses_the_history_of_the_build_mode(check_builds):
+    history = samples("incremental", 5, 6, 7) + samples("scratch", 200, 220, 240)
+    # p95 of 200, 220 and 240 s is 238 s
+    assert check_builds.adaptive_timeout(history, "scratch", 3.0, 300) == 714
+    # Fast incremental builds never bring the timeout below --timeout
+    assert check_builds.adaptive_timeout(history, "incremental", 3.0, 300) == 300
+    # No clean build recorded yet
+    assert check_builds.adaptive_timeout(history, "clean", 3.0, 120) == 120
+
+
+def test_adaptive_timeout_ignores_timed_out_and_unclassified_samples(check_builds):
+    history = samples("clean", 1000, timed_out=True) + [{"wall_time": 900}] + samples("clean", 100, 110)
+    # p95 of 100 and 110 s is 109.5 s
+    assert check_builds.adaptive_timeout(history, "clean", 3.0, 60) == 328
+    assert check_builds.adaptive_timeout(samples("clean", 5000), "clean", 3.0, 60) == \
+        check_builds.TIMEOUT_CEILING_SECONDS
+
+
+def test_build_mode(check_builds, tmp_path):
+    project = tmp_path / "Issue1" / "A" / "A.csproj"
+    solution = tmp_path / "Issue1" / "Issue1.sln"
+    project.parent.mkdir(parents=True)
+    assert check_builds.build_mode(project, None) == "clean"
+    assert check_builds.build_mode(solution, None) == "clean"
+    (project.parent / "obj").mkdir()
+    assert check_builds.build_mode(project, None) == "incremental"
+    assert check_builds.build_mode(solution, None) == "incremental"
+    assert check_builds.build_mode(project, {"root": Path("/dev/shm/scratch")}) == "scratch"
@@ -0,0 +1,135 @@
+"""Tests of the sharding of a sweep: shard_plan() and merge_shards()."""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from conftest import REPO_ROOT
+
+ISSUE_COUNT = 30
+
+
+@pytest.fixture(scope="module")
+def synthetic_repo(bench, tmp_path_factory):
+    """Synthetic issue repository with a copy of check-builds.py and the stub dotnet of bench-builds.py."""
+    repo_root = tmp_path_factory.mktemp("issues")
+    repo = bench.generate_repo(repo_root, ISSUE_COUNT, list(bench.FALLBACK_BUILD_OUTPUTS), seed=1)
+    assert repo["failed"], "the synthetic repository needs failing builds"
+    shutil.copy2(REPO_ROOT / "check-builds.py", repo_root / "check-builds.py")
+    bench.write_stub_dotnet(repo_root / ".stub-bin")
+    return repo_root
+
+
+def run_sweep(repo_root: Path, log_dir: Path, *args: str) -> subprocess.CompletedProcess:
+    """Run check-builds.py over the synthetic repository against the stub dotnet."""
+    env = {**os.environ, "PATH": f"{repo_root / '.stub-bin'}{os.pathsep}{os.environ.get('PATH', '')}"}
+    completed = subprocess.run([sys.executable, str(repo_root / "check-builds.py"), "--force", "-j", "2",
+                                "--log-dir", str(log_dir), *args],
+                               cwd=repo_root, env=env, capture_output=True, text=True, encoding='utf-8')
+    assert "BUILD SUMMARY" in completed.stdout, completed.stderr
+    return completed
+
+
+def read_stream(results_path: Path):
+    """Returns: Issue statuses, and per issue the outcome of its project builds, by project"""
+    statuses = {}
+    builds = {}
+    with open(results_path, 'r', encoding='utf-8') as f:
+        for record in map(json.loads, f):
+            if "status" in record:
+                statuses[record["issue"]] = record["status"]
+            elif "project" in record:
+                builds.setdefault(record["issue"], {})[record["project"]] = (
+                    record["success"], record["timed_out"], record["errors"], record["tail"])
+    return statuses, builds
+
+
+def plan_of(check_builds, repo_root: Path):
+    issue_dirs = sorted(d for d in repo_root.iterdir() if d.is_dir() and d.name.startswith("Issue"))
+    return check_builds.plan_all_builds(repo_root, issue_dirs)
+
+
+def test_shard_plan_partitions_the_plan(check_builds, synthetic_repo):
+    plan = plan_of(check_builds, synthetic_repo)
+    shards = [check_builds.shard_plan(plan, (index, 3), {}, synthetic_repo) for index in (1, 2, 3)]
+
+    issues = [entry["issue"] for entry in plan]
+    assigned = [entry["issue"] for selected, _ in shards for entry in selected]
+    assert sorted(assigned) == sorted(issues)
+    for selected, _ in shards:
+        # Plan order is kept within a shard
+        names = [entry["issue"] for entry in selected]
+        assert names == [issue for issue in issues if issue in names]
+
+
+def test_shard_plan_is_deterministic_and_balanced(check_builds, synthetic_repo):
+    plan = plan_of(check_builds, synthetic_repo)
+    first, loads = check_builds.shard_plan(plan, (1, 2), {}, synthetic_repo)
+    again, loads_again = check_builds.shard_plan(list(plan), (1, 2), {}, synthetic_repo)
+    assert [entry["issue"] for entry in first] == [entry["issue"] for entry in again]
+    assert loads == loads_again
+
+    # Greedy assignment, heaviest issue first: shards differ by at most the heaviest issue
+    costs = [sum(check_builds.estimate_build_cost(project["path"], synthetic_repo / entry["issue"], {},
+                                                  check_builds.load_issue_build_times(synthetic_repo / entry["issue"]),
+                                                  synthetic_repo)
+                 for project in entry["projects"]) for entry in plan]
+    assert max(loads) - min(loads) <= max(costs) + 1e-9
+
+
+def test_merged_shards_match_a_single_run(check_builds, synthetic_repo, tmp_path):
+    single_dir = tmp_path / "single"
+    run_sweep(synthetic_repo, single_dir)
+    shard_paths = []
+    for index in (1, 2):
+        shard_dir = tmp_path / f"shard{index}"
+        run_sweep(synthetic_repo, shard_dir, "--shard", f"{index}/2")
+        shard_paths.append(shard_dir / f"results-{index}-of-2.jsonl")
+
+    merged_dir = tmp_path / "merged"
+    results, failures, selection = check_builds.merge_shards(shard_paths, merged_dir)
+
+    single_statuses, single_builds = read_stream(single_dir / "results.jsonl")
+    assert selection == "all"
+    assert results["failed"] and len(single_statuses) == ISSUE_COUNT
+    assert {status: sorted(issues) for status, issues in results.items()} == {
+        status: sorted(issue for issue, issue_status in single_statuses.items() if issue_status == status)
+        for status in results}
+    assert read_stream(merged_dir / "results.jsonl") == (single_statuses, single_builds)
+
+    single_failures = {issue: {project: build[2] for project, build in projects.items() if not build[0]}
+                       for issue, projects in single_builds.items()}
+    assert {issue: {failure["project"]: failure["errors"] for failure in issue_failures}
+            for issue, issue_failures in failures.items()} == {
+        issue: projects for issue, projects in single_failures.items() if projects}
+    for issue_failures in failures.values():
+        for failure in issue_failures:
+            assert Path(failure["log"]).parent == merged_dir
+            assert Path(failure["log"]).exists()
+
+
+def write_shard(path: Path, shard: str, records):
+    path.write_text("\n".join(json.dumps(record) for record in
+                              [{"run": {"id": shard, "shard": shard, "selection": "all", "filter": None}}, *records])
+                    + "\n", encoding='utf-8')
+    return path
+
+
+def test_merge_shards_rejects_an_incomplete_shard_set(check_builds, tmp_path):
+    first = write_shard(tmp_path / "results-1-of-3.jsonl", "1/3", [])
+    second = write_shard(tmp_path / "results-2-of-3.jsonl", "2/3", [])
+    with pytest.raises(ValueError, match="missing 3/3"):
+        check_builds.merge_shards([first, second], tmp_path / "merged")
+
+
+def test_merge_shards_rejects_an_issue_built_twice(check_builds, tmp_path):
+    record = {"issue": "Issue1", "status": "success", "projects": []}
+    first = write_shard(tmp_path / "results-1-of-2.jsonl", "1/2", [record])
+    second = write_shard(tmp_path / "results-2-of-2.jsonl", "2/2", [record])
+    with pytest.raises(ValueError, match="Issue1 was built by more than one shard"):
+        check_builds.merge_shards([first, second], tmp_path / "merged")